@@ -2,53 +2,80 @@ from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from db.session import create_db_engine, create_scoped_session
+from db.data_version import DataVersionTracker
+from config.settings import JSON_ENCODER, PROFILE_REQUESTS
+from helpers.json_encoder import init_json_provider
+from helpers.profiling import init_profiling
+from helpers.result_cache import create_result_cache
 from db.models import Base, Team, TeamAffiliate, Roster, Player, GameSchedule, Lineup
-from scripts.load_data import load_data
 from handlers.team_routes import create_team_bp 
 from handlers.schedule_routes import create_schedule_bp
 from handlers.lineup_routes import create_lineup_bp
+from handlers.export_routes import create_export_bp
+from handlers.game_routes import create_game_bp
 from handlers.doc_route import create_docs_bp
+from handlers.metrics_routes import create_metrics_bp
 
 
 
 
-app = Flask(__name__)
-
 # Configure logging
 logging.basicConfig(
     level=logging.DEBUG,  # Set log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'postgresql://user:password@db:5432/lac_fullstack_dev')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Initialize SQLAlchemy
-engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
-Session = sessionmaker(bind=engine)
-session = Session()
-
-app.logger.debug("loading data")
-# Load data only on startup
-with app.app_context():
-    load_data(session)
-
-app.register_blueprint(create_team_bp(session))
-app.register_blueprint(create_schedule_bp(session))
-app.register_blueprint(create_lineup_bp(session))
-app.register_blueprint(create_docs_bp(session))
-# If not using migrate
-# Base.metadata.create_all(engine)
-
-@app.route('/')
-def index():
-    teams = session.query(Team).all()
-    teams_list = [{"team_id": team.team_id, "team_name": team.team_name} for team in teams]  # Convert to list of dictionaries
-    return jsonify(teams_list)  # Use jsonify to return JSON response
+
+def create_app(database_url):
+    """Build the API app on its own engine and session registry for database_url."""
+    app = Flask(__name__)
+    # jsonify and the NDJSON exports encode through this provider
+    init_json_provider(app, JSON_ENCODER)
+
+    # Database configuration
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Initialize SQLAlchemy
+    # Pool size, overflow, timeout, recycle and pre-ping come from config/settings.py
+    engine = create_db_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+    # Thread-local registry: each request gets its own session and pooled connection
+    session = create_scoped_session(engine)
+    if PROFILE_REQUESTS:
+        # Per-route SQL, serialization and total time for /metrics
+        init_profiling(app, engine)
+
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        # Close the request's session and return its connection to the pool
+        session.remove()
+
+    # Data is loaded ahead of time with `python -m scripts.ingest`, not on import
+    # Cached responses and ETags are keyed on the loader's data_version counters
+    data_versions = DataVersionTracker(session)
+    # Results of the analytic routes, kept in this worker and shared with the others (RESULT_CACHE_TIERS)
+    result_cache = create_result_cache(app.config['SQLALCHEMY_DATABASE_URI'])
+
+    app.register_blueprint(create_team_bp(session, data_versions))
+    app.register_blueprint(create_schedule_bp(session, data_versions, result_cache))
+    app.register_blueprint(create_lineup_bp(session, data_versions, result_cache))
+    app.register_blueprint(create_export_bp(session, data_versions))
+    app.register_blueprint(create_game_bp(session, data_versions))
+    app.register_blueprint(create_docs_bp(session))
+    app.register_blueprint(create_metrics_bp(engine, result_cache))
+    # If not using migrate
+    # Base.metadata.create_all(engine)
+
+    @app.route('/')
+    def index():
+        teams = session.query(Team).all()
+        teams_list = [{"team_id": team.team_id, "team_name": team.team_name} for team in teams]  # Convert to list of dictionaries
+        return jsonify(teams_list)  # Use jsonify to return JSON response
+
+    return app
 
 
+app = create_app(os.environ.get('DATABASE_URL', 'postgresql://user:password@db:5432/lac_fullstack_dev'))
 
 
 if __name__ == '__main__':
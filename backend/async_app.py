@@ -0,0 +1,182 @@
+"""
+Async serving mode for the dashboard endpoints.
+
+A Starlette app that runs the Flask blueprints' queries through an asyncpg
+pool, so a slow query holds a pool connection but not a worker, and one
+request can run independent queries at the same time. Responses have the
+same bodies as the Flask endpoints.
+
+Served endpoints:
+    /teams/, /teams/<YYYY-MM>
+    /schedule/past-games/<team_id>/<year>
+    /lineups/wide
+    /games/<game_id>/stints
+    /pages/team-dashboard/<team_id>?month=YYYY-MM[&game_id=]
+        month standings, the team's past games that year and, with game_id,
+        the game's wide lineups, queried concurrently
+
+Usage (from the backend directory):
+    uvicorn async_app:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import contextlib
+import orjson
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from db.async_pool import create_async_pool, fetch_dicts
+from handlers.team_routes import STANDINGS_QUERY, STANDINGS_BY_MONTH_QUERY
+from handlers.schedule_routes import PAST_GAMES_QUERY
+from handlers.game_routes import GAME_EXISTS
+from handlers.lineup_routes import WIDE_LINEUPS_PAGE, wide_lineups_filters, wide_lineups_cursor
+from handlers.validators import validate_month_format, year_range
+from helpers.json_encoder import OrjsonProvider
+from helpers.stint_engine import GAME_LINEUPS, LineupColumns, compute_stints
+
+# The options OrjsonProvider uses for responses outside debug mode
+JSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+
+
+class JSONResponse(Response):
+    """A response with the body jsonify writes through OrjsonProvider."""
+    media_type = 'application/json'
+
+    def render(self, content):
+        return orjson.dumps(content, default=OrjsonProvider.default, option=JSON_OPTIONS) + b'\n'
+
+
+def int_arg(request, name):
+    """An int query parameter, or None if it is missing or not an int (like Flask's type=int)."""
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def fetch(request, query, params=None):
+    return fetch_dicts(request.app.state.pool, query, params)
+
+
+async def standings(request):
+    return JSONResponse(await fetch(request, STANDINGS_QUERY))
+
+
+async def standings_by_month(request):
+    month = request.path_params['month']
+    is_valid, error = validate_month_format(month)
+    if not is_valid:
+        return JSONResponse(error, status_code=400)
+    return JSONResponse(await fetch(request, STANDINGS_BY_MONTH_QUERY, {'month': month}))
+
+
+def past_games_rows(request, team_id, year):
+    year_start, year_end = year_range(year)
+    return fetch(request, PAST_GAMES_QUERY, {'team_id': team_id, 'year_start': year_start, 'year_end': year_end})
+
+
+async def past_games(request):
+    return JSONResponse(await past_games_rows(request, request.path_params['team_id'], request.path_params['year']))
+
+
+async def wide_lineups_page(request, page_size, **filters):
+    conditions, params = wide_lineups_filters(page_size, **filters)
+    lineups = await fetch(request, WIDE_LINEUPS_PAGE.get(conditions).sql, params)
+    response = {
+        "lineups": lineups,
+        "pagination": {
+            "page_size": page_size,
+        }
+    }
+    if lineups:
+        response["pagination"]["next_cursor"] = wide_lineups_cursor(lineups)
+    return response
+
+
+async def wide_lineups(request):
+    page_size = min(int(request.query_params.get('page_size', 50)), 100)  # Cap at 100 items per page
+    return JSONResponse(await wide_lineups_page(
+        request,
+        page_size,
+        last_game_id=int_arg(request, 'last_game_id'),
+        last_team_id=int_arg(request, 'last_team_id'),
+        last_lineup_num=int_arg(request, 'last_lineup_num'),
+        game_id=int_arg(request, 'game_id'),
+        player_id=int_arg(request, 'player_id'),
+    ))
+
+
+async def game_stints(request):
+    game_id = request.path_params['game_id']
+    team_id = int_arg(request, 'team_id')
+    params = {'game_id': game_id}
+    conditions = []
+    if team_id is not None:
+        conditions.append('team_id')
+        params['team_id'] = team_id
+
+    columns = LineupColumns()
+    for row in await fetch(request, GAME_LINEUPS.get(conditions).sql, params):
+        columns.append(row['team_id'], row['player_id'], row['player_name'], row['period'], row['time_in'], row['time_out'])
+    if not len(columns):
+        game = await fetch(request, GAME_EXISTS.sql, {'game_id': game_id})
+        if not game:
+            return JSONResponse({"error": f"Game {game_id} not found."}, status_code=404)
+
+    return JSONResponse({
+        "game_id": game_id,
+        "players": compute_stints(columns),
+    })
+
+
+async def team_dashboard(request):
+    """
+    Everything the team dashboard page loads, in one request.
+
+    The standings, schedule and lineups queries do not depend on each other, so
+    each runs on its own pool connection at the same time; the response takes
+    as long as the slowest of them rather than their sum.
+    """
+    team_id = request.path_params['team_id']
+    month = request.query_params.get('month', '')
+    is_valid, error = validate_month_format(month)
+    if not is_valid:
+        return JSONResponse(error, status_code=400)
+    game_id = int_arg(request, 'game_id')
+
+    queries = [
+        fetch(request, STANDINGS_BY_MONTH_QUERY, {'month': month}),
+        past_games_rows(request, team_id, int(month[:4])),
+    ]
+    if game_id is not None:
+        queries.append(wide_lineups_page(request, 100, game_id=game_id))
+    results = await asyncio.gather(*queries)
+
+    page = {
+        "standings": results[0],
+        "past_games": results[1],
+    }
+    if game_id is not None:
+        page["lineups"] = results[2]["lineups"]
+    return JSONResponse(page)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    app.state.pool = await create_async_pool()
+    try:
+        yield
+    finally:
+        await app.state.pool.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/teams/', standings),
+        Route('/teams/{month}', standings_by_month),
+        Route('/schedule/past-games/{team_id:int}/{year:int}', past_games),
+        Route('/lineups/wide', wide_lineups),
+        Route('/games/{game_id:int}/stints', game_stints),
+        Route('/pages/team-dashboard/{team_id:int}', team_dashboard),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,315 @@
+"""
+Deterministic synthetic data for the benchmark suite.
+
+Writes N seasons of a 30 team league in the JSON shapes of dev_test_data, so
+the files load with scripts.ingest like the real ones:
+
+    team.json, team_affiliate.json  30 NBA teams and their G League affiliates
+    game_schedule.json              82 games per team per season, October to April
+    player.json, roster.json        15 man rosters, with a few players replaced each season
+    lineup.json                     every lineup of every game, from a rotation model
+
+Lineups follow a substitution pattern close to a real rotation: the starters
+open the first and third periods, each player has a minutes budget by depth
+(starters about 32-36, the deep bench little or none), and at each dead ball
+one to three of the most played players on the floor are swapped for the
+bench players with the most of their budget left. Some games go to overtime.
+
+The same --seed and --seasons always write the same files.
+
+Usage (from the backend directory):
+    python -m benchmarks.generate_data --out-dir /tmp/bench_data [--seasons 3] [--seed 0] [--first-season 2021]
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+TEAM_COUNT = 30
+GAMES_PER_TEAM = 82
+ROSTER_SIZE = 15
+ACTIVE_PLAYERS = 13
+ROSTER_TURNOVER = 3  # players replaced on each roster between seasons
+FIRST_TEAM_ID = 1610612737
+FIRST_AFFILIATE_ID = 1612709900
+FIRST_PLAYER_ID = 1700000
+POSITIONS = ['PG', 'SG', 'SF', 'PF', 'C']
+
+# Periods and overtimes in deciseconds, the resolution of lineup times
+PERIOD_LENGTH = 7200
+OVERTIME_LENGTH = 3000
+REGULATION_PERIODS = 4
+OVERTIME_CHANCE = 0.06
+
+# Minutes a coach plans for each depth chart slot of the active players; they sum to 240
+MINUTES_BY_DEPTH = [35, 34, 33, 32, 30, 24, 20, 16, 10, 6, 0, 0, 0]
+# Seconds between dead balls at which the rotation changes
+STINT_SECONDS = (90, 240)
+# How many players change at a substitution, and how often
+SUBSTITUTION_SIZES = [1, 2, 3]
+SUBSTITUTION_WEIGHTS = [6, 3, 1]
+
+SEASON_DAYS = 170
+TIP_TIMES = ['19:00:00', '19:30:00', '20:00:00', '20:30:00', '22:00:00']
+
+FIRST_NAMES = ['James', 'Marcus', 'Tyler', 'Jalen', 'Devin', 'Chris', 'Kevin', 'Anthony', 'Luka', 'Nikola',
+               'Trae', 'Jordan', 'Cameron', 'Isaiah', 'Darius', 'Malik', 'Andre', 'Victor', 'Paolo', 'Scottie']
+LAST_NAMES = ['Walker', 'Johnson', 'Williams', 'Brown', 'Davis', 'Miller', 'Wilson', 'Moore', 'Taylor', 'Thomas',
+              'Jackson', 'White', 'Harris', 'Martin', 'Thompson', 'Robinson', 'Clark', 'Lewis', 'Young', 'Allen',
+              'King', 'Wright', 'Scott', 'Green', 'Baker', 'Adams', 'Nelson', 'Hill', 'Campbell', 'Mitchell']
+
+
+def generate_teams():
+    """The NBA teams and a G League affiliate for each, as team.json and team_affiliate.json records."""
+    teams = []
+    affiliates = []
+    for index in range(TEAM_COUNT):
+        number = index + 1
+        teams.append({"teamId": FIRST_TEAM_ID + index, "leagueLk": "NBA", "teamName": f"Team {number:02d}",
+                      "teamNameShort": f"T{number:02d}", "teamNickname": f"Nickname {number:02d}"})
+        affiliates.append({"nba_teamId": FIRST_TEAM_ID + index, "nba_abrv": f"T{number:02d}",
+                           "glg_teamId": float(FIRST_AFFILIATE_ID + index), "glg_abrv": f"G{number:02d}"})
+    teams += [{"teamId": FIRST_AFFILIATE_ID + index, "leagueLk": "GLG", "teamName": f"G League {index + 1:02d}",
+               "teamNameShort": f"G{index + 1:02d}", "teamNickname": f"Affiliate {index + 1:02d}"}
+              for index in range(TEAM_COUNT)]
+    return teams, affiliates
+
+
+def round_robin(team_ids):
+    """
+    Single round robin rounds by the circle method.
+
+    Returns:
+        list: len(team_ids) - 1 rounds, each a list of team pairs in which every team plays once.
+    """
+    teams = list(team_ids)
+    rounds = []
+    for _ in range(len(teams) - 1):
+        rounds.append([(teams[index], teams[-1 - index]) for index in range(len(teams) // 2)])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+def generate_schedule(rng, team_ids, seasons, first_season):
+    """
+    GAMES_PER_TEAM games for every team in each season.
+
+    A season is GAMES_PER_TEAM rounds in which every team plays once, taken from
+    repeated round robins. Home court goes to whichever team of a pair has had
+    fewer home games that season. A round is spread over two days, so rest
+    between games varies from none (a back to back) to a few days.
+
+    Returns:
+        list: game_schedule.json records ordered by game_date, with game_ids in that order.
+    """
+    games = []
+    for season in range(first_season, first_season + seasons):
+        order = list(team_ids)
+        rng.shuffle(order)
+        rounds = round_robin(order)
+        home_games = dict.fromkeys(team_ids, 0)
+        opening_night = datetime(season, 10, 24)
+        for round_index in range(GAMES_PER_TEAM):
+            round_day = opening_night + timedelta(days=round_index * SEASON_DAYS // GAMES_PER_TEAM)
+            for home_id, away_id in rounds[round_index % len(rounds)]:
+                if (home_games[home_id], rng.random()) > (home_games[away_id], 0.5):
+                    home_id, away_id = away_id, home_id
+                home_games[home_id] += 1
+                game_day = round_day + timedelta(days=rng.randint(0, 1))
+                home_score, away_score = rng.randint(92, 136), rng.randint(90, 134)
+                if home_score == away_score:
+                    home_score += rng.choice([-1, 1]) * rng.randint(1, 8)
+                games.append({"home_id": home_id, "home_score": home_score, "away_id": away_id,
+                              "away_score": away_score,
+                              "game_date": f"{game_day:%Y-%m-%d} {rng.choice(TIP_TIMES)}"})
+
+    games.sort(key=lambda game: (game["game_date"], game["home_id"]))
+    return [{"game_id": game_id, **game} for game_id, game in enumerate(games, start=1)]
+
+
+def generate_rosters(rng, team_ids, seasons):
+    """
+    Rosters for each season, with ROSTER_TURNOVER new players per team each season.
+
+    Returns:
+        tuple: (players, rosters) where players maps player_id to (first_name, last_name)
+            and rosters[season_index][team_id] is that season's player_ids in depth chart order.
+    """
+    players = {}
+    next_player_id = FIRST_PLAYER_ID
+
+    def new_player():
+        nonlocal next_player_id
+        player_id = next_player_id
+        next_player_id += 1
+        players[player_id] = (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+        return player_id
+
+    rosters = [{team_id: [new_player() for _ in range(ROSTER_SIZE)] for team_id in team_ids}]
+    for _ in range(seasons - 1):
+        season_rosters = {}
+        for team_id, roster in rosters[-1].items():
+            roster = list(roster)
+            for _ in range(ROSTER_TURNOVER):
+                roster[rng.randrange(ROSTER_SIZE)] = new_player()
+            # Some of the bench moves up or down the depth chart over the summer
+            for _ in range(2):
+                first, second = rng.sample(range(3, ROSTER_SIZE), 2)
+                roster[first], roster[second] = roster[second], roster[first]
+            season_rosters[team_id] = roster
+        rosters.append(season_rosters)
+    return players, rosters
+
+
+def minutes_budget(rng, active_players):
+    """Deciseconds each active player is planned to play, jittered around MINUTES_BY_DEPTH."""
+    minutes = [max(0.0, planned + rng.uniform(-3, 3)) if planned else 0.0 for planned in MINUTES_BY_DEPTH]
+    scale = 240 / sum(minutes)
+    return {player_id: minutes[depth] * scale * 600 for depth, player_id in enumerate(active_players)}
+
+
+def substitute(rng, on_court, played, budget):
+    """
+    Swap one to three players on the floor for bench players.
+
+    Those who have used the most of their budget come off, and the bench players
+    with the most budget left come on.
+    """
+    bench = [player_id for player_id in budget if player_id not in on_court]
+    count = min(rng.choices(SUBSTITUTION_SIZES, SUBSTITUTION_WEIGHTS)[0], len(bench))
+    tired = sorted(on_court, key=lambda player_id: (played[player_id] / max(budget[player_id], 1), player_id), reverse=True)
+    fresh = sorted(bench, key=lambda player_id: (budget[player_id] - played[player_id], -player_id), reverse=True)
+
+    lineup = set(on_court)
+    for leaving, entering in zip(tired[:count], fresh[:count]):
+        # Only sub a player in with more budget left than the player they replace
+        if budget[entering] - played[entering] > budget[leaving] - played[leaving]:
+            lineup.remove(leaving)
+            lineup.add(entering)
+    return sorted(lineup)
+
+
+def team_lineups(rng, game_id, team_id, roster, periods):
+    """
+    lineup.json records for one team in one game.
+
+    Each stretch between substitutions is a lineup of five players, numbered
+    from 1 through the game, with time_in and time_out as seconds remaining
+    in the period.
+    """
+    active_players = [player_id for player_id in roster if rng.random() > 0.08][:ACTIVE_PLAYERS]
+    active_players += [player_id for player_id in roster if player_id not in active_players][:ACTIVE_PLAYERS - len(active_players)]
+    budget = minutes_budget(rng, active_players)
+    played = dict.fromkeys(active_players, 0)
+    starters = sorted(active_players[:5])
+
+    records = []
+    lineup_num = 0
+    on_court = starters
+    for period in range(1, periods + 1):
+        length = PERIOD_LENGTH if period <= REGULATION_PERIODS else OVERTIME_LENGTH
+        if period in (1, 3):
+            on_court = starters
+        elif period > REGULATION_PERIODS:
+            # Overtime goes to the players who have played the most
+            on_court = sorted(sorted(active_players, key=lambda player_id: played[player_id], reverse=True)[:5])
+        else:
+            on_court = substitute(rng, on_court, played, budget)
+
+        remaining = length
+        while remaining > 0:
+            stint = rng.randint(STINT_SECONDS[0] * 10, STINT_SECONDS[1] * 10)
+            time_out = remaining - stint if remaining - stint > STINT_SECONDS[0] * 5 else 0
+            lineup_num += 1
+            for player_id in on_court:
+                played[player_id] += remaining - time_out
+                records.append({"teamId": team_id, "playerId": player_id, "lineupNum": lineup_num, "period": period,
+                                "timeIn": remaining / 10, "timeOut": time_out / 10, "gameId": game_id})
+            remaining = time_out
+            if remaining:
+                on_court = substitute(rng, on_court, played, budget)
+    return records
+
+
+def generate_lineups(seed, games, rosters, first_season):
+    """
+    Yield the lineup.json records of every game.
+
+    Each game draws from a generator seeded with seed and its game_id, so a game's
+    lineups do not change when games are added before it.
+    """
+    for game in games:
+        rng = random.Random(f"{seed}:{game['game_id']}")
+        game_date = datetime.strptime(game["game_date"], '%Y-%m-%d %H:%M:%S')
+        # Seasons start in October, so January to September belong to the previous year's season
+        season_index = (game_date.year if game_date.month >= 10 else game_date.year - 1) - first_season
+        periods = REGULATION_PERIODS
+        while rng.random() < OVERTIME_CHANCE:
+            periods += 1
+        for team_id in (game["home_id"], game["away_id"]):
+            yield from team_lineups(rng, game["game_id"], team_id, rosters[season_index][team_id], periods)
+
+
+def write_json(path, records):
+    """Write records as a JSON array, one record per line, without holding them all in memory."""
+    count = 0
+    with open(path, 'w') as file:
+        file.write('[')
+        for record in records:
+            file.write(',\n' if count else '\n')
+            file.write(json.dumps(record))
+            count += 1
+        file.write('\n]\n')
+    return count
+
+
+def generate(out_dir, seasons=1, seed=0, first_season=2021):
+    """
+    Write every data file for seasons seasons into out_dir.
+
+    Returns:
+        dict: The number of records written to each file.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    teams, affiliates = generate_teams()
+    team_ids = [team["teamId"] for team in teams if team["leagueLk"] == "NBA"]
+    games = generate_schedule(rng, team_ids, seasons, first_season)
+    players, rosters = generate_rosters(rng, team_ids, seasons)
+
+    roster_records = []
+    for team_id, roster in rosters[-1].items():
+        for depth, player_id in enumerate(roster):
+            first_name, last_name = players[player_id]
+            roster_records.append({"team_id": team_id, "player_id": player_id, "first_name": first_name,
+                                   "last_name": last_name, "position": POSITIONS[depth % len(POSITIONS)],
+                                   "contract_type": "TWO_WAY" if depth >= ROSTER_SIZE - 2 else "NBA"})
+
+    files = {
+        'team.json': teams,
+        'team_affiliate.json': affiliates,
+        'game_schedule.json': games,
+        'player.json': [{"player_id": player_id, "first_name": first_name, "last_name": last_name}
+                        for player_id, (first_name, last_name) in players.items()],
+        'roster.json': roster_records,
+        'lineup.json': generate_lineups(seed, games, rosters, first_season),
+    }
+    return {file_name: write_json(os.path.join(out_dir, file_name), records) for file_name, records in files.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic multi-season dataset.")
+    parser.add_argument('--out-dir', required=True, help="Directory to write the data files to")
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--first-season', type=int, default=2021, help="Year the first season starts in")
+    args = parser.parse_args(argv)
+
+    counts = generate(args.out_dir, args.seasons, args.seed, args.first_season)
+    for file_name, count in counts.items():
+        print(f"{file_name:<22} {count:>9} records")
+
+
+if __name__ == '__main__':
+    main()
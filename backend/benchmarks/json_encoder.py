@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of the response JSON encoders.
+
+Builds a player-stints shaped result in an in-memory SQLite database and times
+turning it into a response body with each path:
+
+    dict(row) + flask     the original [dict(row) for row in result] and jsonify
+    row_dicts + flask     row_dicts(result) and Flask's DefaultJSONProvider
+    row_dicts + orjson    row_dicts(result) and OrjsonProvider
+
+Usage (from the backend directory):
+    python -m benchmarks.json_encoder [--rows 20000] [--repeat 5]
+"""
+import argparse
+import timeit
+import warnings
+from datetime import datetime, timedelta
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine, text, DateTime, Numeric
+from helpers.json_encoder import OrjsonProvider, orjson, row_dicts
+
+
+def build_rows(connection, rows):
+    connection.execute(text("""
+        CREATE TABLE stints (
+            game_date TIMESTAMP, team TEXT, opponent TEXT, player_name TEXT,
+            period INTEGER, stint_number INTEGER, stint_start NUMERIC, stint_end NUMERIC
+        )
+    """))
+    start = datetime(2024, 1, 1, 19)
+    connection.execute(text("""
+        INSERT INTO stints VALUES (:game_date, :team, :opponent, :player_name, :period, :stint_number, :stint_start, :stint_end)
+    """), [
+        {
+            'game_date': start + timedelta(days=index // 200),
+            'team': f"Team {index % 30}",
+            'opponent': f"Team {(index + 7) % 30}",
+            'player_name': f"Player {index % 450}",
+            'period': index % 4 + 1,
+            'stint_number': index % 3 + 1,
+            'stint_start': 720 - index % 600 - 0.5,
+            'stint_end': 120 - index % 120,
+        }
+        for index in range(rows)
+    ])
+
+
+def fetch(connection):
+    """Fetch the rows up front, typed like Postgres returns them, so only conversion and encoding are timed."""
+    # SQLite has no native Decimal; the float round trip is fine for timing
+    warnings.filterwarnings('ignore', message='.*does \\*not\\* support Decimal objects natively')
+    query = text("SELECT * FROM stints").columns(game_date=DateTime, stint_start=Numeric(4, 1), stint_end=Numeric(4, 1))
+    result = connection.execute(query)
+    return list(result.keys()), result.fetchall()
+
+
+class FetchedResult:
+    """The parts of a result that row_dicts uses, over already fetched rows."""
+
+    def __init__(self, keys, rows):
+        self._keys = keys
+        self._rows = rows
+
+    def keys(self):
+        return self._keys
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the response JSON encoders.")
+    parser.add_argument('--rows', type=int, default=20000, help="Rows in the encoded result")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per path; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    engine = create_engine('sqlite:///:memory:')
+    with engine.connect() as connection:
+        build_rows(connection, args.rows)
+        keys, rows = fetch(connection)
+
+    paths = [('dict(row) + flask', DefaultJSONProvider, lambda: [dict(row) for row in rows]),
+             ('row_dicts + flask', DefaultJSONProvider, lambda: row_dicts(FetchedResult(keys, rows)))]
+    if orjson is not None:
+        paths.append(('row_dicts + orjson', OrjsonProvider, lambda: row_dicts(FetchedResult(keys, rows))))
+
+    app = Flask(__name__)
+    baseline = None
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, provider_class, convert in paths:
+        provider = provider_class(app)
+        with app.app_context():
+            seconds = min(timeit.repeat(lambda: provider.response(convert()), number=1, repeat=args.repeat))
+        baseline = baseline or seconds
+        print(f"  {name:<20} {seconds * 1000:8.1f} ms  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Load test comparing the Flask API with the async API (async_app.py).
+
+Each target gets the same mix of dashboard requests from --concurrency client
+threads, and the latency of every request is recorded. The report gives
+p50/p95/p99 latency and throughput per target, overall and per path.
+
+Start both servers first, for example:
+    flask run --port 5000 --with-threads
+    uvicorn async_app:app --port 8000
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --target flask=http://localhost:5000 --target async=http://localhost:8000 \\
+        [--requests 2000] [--concurrency 32] [--path /teams/2024-01 ...]
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# What the coach and medical dashboards load, served by both APIs
+DEFAULT_PATHS = [
+    '/teams/',
+    '/teams/2024-01',
+    '/schedule/past-games/1610612746/2024',
+    '/lineups/wide?page_size=50',
+    '/lineups/wide?game_id=8&page_size=100',
+    '/games/8/stints',
+]
+
+
+def percentile(sorted_values, fraction):
+    """The value at fraction (0-1) of sorted_values, by nearest rank."""
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def fetch(url):
+    """Milliseconds to GET url and read its body, and whether it succeeded."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+
+def run_target(base_url, paths, requests, concurrency):
+    """Send requests GETs spread over paths from concurrency threads."""
+    latencies = {path: [] for path in paths}
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(index):
+        nonlocal errors
+        path = paths[index % len(paths)]
+        milliseconds, ok = fetch(base_url.rstrip('/') + path)
+        with lock:
+            if ok:
+                latencies[path].append(milliseconds)
+            else:
+                errors += 1
+
+    # Warm up pools and caches with one pass over the paths
+    for path in paths:
+        fetch(base_url.rstrip('/') + path)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(requests)))
+    seconds = time.perf_counter() - start
+    return latencies, errors, seconds
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'mean': statistics.fmean(values) if values else float('nan'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare latency of the Flask and async APIs under concurrent load.")
+    parser.add_argument('--target', action='append', required=True, metavar='NAME=URL',
+                        help="A server to test, e.g. flask=http://localhost:5000; repeat for each server")
+    parser.add_argument('--path', action='append', help="A request path to include; defaults to the dashboard mix")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per target")
+    parser.add_argument('--concurrency', type=int, default=32, help="Client threads")
+    args = parser.parse_args(argv)
+
+    paths = args.path or DEFAULT_PATHS
+    print(f"{args.requests} requests per target over {len(paths)} paths, {args.concurrency} concurrent clients\n")
+    print(f"{'target':<10} {'path':<42} {'ok':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        latencies, errors, seconds = run_target(base_url, paths, args.requests, args.concurrency)
+        for path in paths:
+            summary = summarize(latencies[path])
+            print(f"{name:<10} {path[:42]:<42} {summary['count']:>6} {summary['p50']:>9.1f} {summary['p95']:>9.1f} {summary['p99']:>9.1f}")
+        overall = summarize([value for values in latencies.values() for value in values])
+        print(f"{name:<10} {'all':<42} {overall['count']:>6} {overall['p50']:>9.1f} {overall['p95']:>9.1f} {overall['p99']:>9.1f}"
+              f"   {overall['count'] / seconds:.0f} req/s, {errors} errors\n")
+
+
+if __name__ == '__main__':
+    main()
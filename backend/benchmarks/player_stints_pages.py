@@ -0,0 +1,72 @@
+"""
+Page-depth benchmark of /lineups/player-stints.
+
+Walks the endpoint page by page, following next_cursor, and reports the
+latency of every --every'th page. With the cursor bounding the game_schedule
+scan, page N should cost about the same as page 1.
+
+Needs a loaded Postgres database (DATABASE_URL, as for the API).
+
+Usage (from the backend directory):
+    python -m benchmarks.player_stints_pages [--pages 200] [--page-size 100] [--every 20] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+from flask import Flask
+from config.settings import DATABASE_URL
+from db.data_version import DataVersionTracker
+from db.session import create_db_engine, create_scoped_session
+from handlers.lineup_routes import create_lineup_bp
+from helpers.json_encoder import init_json_provider
+
+
+def create_client(database_url):
+    session = create_scoped_session(create_db_engine(database_url))
+    app = Flask(__name__)
+    init_json_provider(app, 'orjson')
+    app.register_blueprint(create_lineup_bp(session, DataVersionTracker(session)))
+
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        session.remove()
+
+    return app.test_client()
+
+
+def time_page(client, query, repeat):
+    """Median milliseconds to fetch query, and the response body."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get('/lineups/player-stints', query_string=query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), response.get_json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time /lineups/player-stints pages by depth.")
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    parser.add_argument('--pages', type=int, default=200, help="Deepest page to walk to")
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--every', type=int, default=20, help="Report every nth page")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed fetches per page")
+    args = parser.parse_args(argv)
+
+    client = create_client(args.database_url)
+    query = {'page_size': args.page_size}
+    print(f"{'page':>6} {'ms':>9} {'rows':>6}")
+    for page in range(1, args.pages + 1):
+        report = page == 1 or page % args.every == 0
+        milliseconds, body = time_page(client, query, args.repeat if report else 1)
+        if report:
+            print(f"{page:>6} {milliseconds:>9.2f} {len(body['stints']):>6}")
+        cursor = body['pagination'].get('next_cursor')
+        if not body['stints'] or cursor is None:
+            print(f"Reached the last page at page {page}")
+            break
+        query = {'page_size': args.page_size, **cursor}
+
+
+if __name__ == '__main__':
+    main()
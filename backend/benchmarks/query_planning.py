@@ -0,0 +1,195 @@
+"""
+Planning time against execution time of the registered queries.
+
+For each case, a registered query with parameters taken from the loaded
+data, the query is run --repeat times each way:
+
+    text      through text(), planned on every run
+    prepared  as the registry runs it on Postgres, PREPAREd once per
+              connection and EXECUTEd after that
+
+and the report gives the median Planning Time and Execution Time from
+EXPLAIN (ANALYZE) and the median wall time of running the query and fetching
+its rows. Planning is what a prepared statement saves: for the CTE queries
+over small indexed ranges it can be a large part of the total, while for the
+scans of whole tables it is noise.
+
+The prepared runs start on a connection that has not run the query yet, so
+they include Postgres's first custom plans; plans shows the generic and
+custom plan counts from pg_prepared_statements at the end.
+
+Needs a loaded Postgres database (DATABASE_URL, as for the API).
+
+Usage (from the backend directory):
+    python -m benchmarks.query_planning [--repeat 20] [--query wide_lineups ...] [--output results.json]
+"""
+import argparse
+import json
+import statistics
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from config.settings import DATABASE_URL
+from handlers.game_routes import BATCH_GAMES_BY_ID, BATCH_GAMES_BY_TEAM, BATCH_LINEUPS
+from handlers.lineup_routes import (
+    WIDE_LINEUPS_PAGE, PLAYER_STINTS_PAGE, PLAYER_STINTS_CURSOR_PAGE, STINT_AVERAGES_PAGE, WIN_LOSS_STINTS_PAGE,
+    UNIT_MINUTES, UNIT_SEARCH, COURT_TIME,
+)
+from handlers.schedule_routes import PAST_GAMES, MOST_B2B, MOST_REST, MOST_3_IN_4S
+from handlers.validators import year_range, day_range
+from handlers.team_routes import STANDINGS, STANDINGS_BY_MONTH
+from helpers.stint_engine import GAME_LINEUPS
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, FORMAT JSON) "
+
+
+def query_cases(session):
+    """
+    The queries to time, as (RegisteredQuery, params) pairs, with ids and dates from the loaded data.
+
+    As in benchmarks.suite, the game, team and unit are from a game a quarter of
+    the way through the schedule, and the date ranges cover that game's month.
+    """
+    game = session.execute(text("""
+        SELECT game_id, home_id, game_date FROM game_schedule
+        ORDER BY game_date, game_id
+        OFFSET (SELECT COUNT(*) / 4 FROM game_schedule) LIMIT 1
+    """)).mappings().one()
+    unit = sorted(session.execute(text("""
+        SELECT player_ids FROM lineup_unit
+        WHERE game_id = :game_id AND team_id = :team_id
+        ORDER BY lineup_num LIMIT 1
+    """), {'game_id': game['game_id'], 'team_id': game['home_id']}).scalar_one())
+
+    game_id = game['game_id']
+    team_id = game['home_id']
+    year_start, year_end = year_range(game['game_date'].year)
+    start_date = f"{game['game_date']:%Y-%m}-01"
+    end_date = f"{game['game_date']:%Y-%m}-28"
+    range_start, range_end = day_range(start_date, end_date)
+    game_ids = list(range(game_id, game_id + 20))
+    wide_cursor = {'last_game_id': game_id, 'last_team_id': team_id, 'last_lineup_num': 1}
+    stints_cursor = {
+        'last_game_date': game['game_date'], 'last_game_id': game_id, 'last_team_name': '',
+        'last_player_name': '', 'last_period': 1, 'last_stint_number': 1,
+    }
+
+    return [
+        (STANDINGS, {}),
+        (STANDINGS_BY_MONTH, {'month': f"{game['game_date']:%Y-%m}"}),
+        (PAST_GAMES, {'team_id': team_id, 'year_start': year_start, 'year_end': year_end}),
+        (MOST_B2B, {}),
+        (MOST_REST, {'start_date': start_date, 'end_date': end_date}),
+        (MOST_3_IN_4S, {'range_start': range_start, 'range_end': range_end}),
+        (WIDE_LINEUPS_PAGE.get(), {'page_size': 100}),
+        (WIDE_LINEUPS_PAGE.get(['cursor']), {'page_size': 100, **wide_cursor}),
+        (WIDE_LINEUPS_PAGE.get(['game_id']), {'page_size': 100, 'game_id': game_id}),
+        (WIDE_LINEUPS_PAGE.get(['player_id']), {'page_size': 100, 'player_id': unit[0]}),
+        (PLAYER_STINTS_PAGE, {'page_size': 100}),
+        (PLAYER_STINTS_CURSOR_PAGE, {'page_size': 100, **stints_cursor}),
+        (STINT_AVERAGES_PAGE.get(), {'page_size': 100}),
+        (STINT_AVERAGES_PAGE.get(['cursor']), {'page_size': 100, 'last_player_name': 'M'}),
+        (WIN_LOSS_STINTS_PAGE.get(), {'page_size': 100}),
+        (UNIT_MINUTES.get(), {'player_ids': unit}),
+        (UNIT_SEARCH.get(), {'player_ids': unit[:2], 'page_size': 25}),
+        (COURT_TIME.get(), {'player_ids': unit[:2]}),
+        (COURT_TIME.get(['dates']), {'player_ids': unit[:2], 'start': range_start, 'end': range_end}),
+        (GAME_LINEUPS.get(), {'game_id': game_id}),
+        (BATCH_GAMES_BY_ID, {'game_ids': game_ids, 'game_limit': 100}),
+        (BATCH_GAMES_BY_TEAM, {'team_id': team_id, 'start': range_start, 'end': range_end, 'game_limit': 100}),
+        (BATCH_LINEUPS.get(), {'game_ids': game_ids}),
+    ]
+
+
+def plan_times(result):
+    """Planning Time and Execution Time, in milliseconds, of an EXPLAIN (ANALYZE, FORMAT JSON) result."""
+    plan = result.scalar()[0]
+    return plan['Planning Time'], plan['Execution Time']
+
+
+def summarize(planning, execution, wall):
+    return {
+        'planning_ms': round(statistics.median(planning), 3),
+        'execution_ms': round(statistics.median(execution), 3),
+        'wall_ms': round(statistics.median(wall), 3),
+    }
+
+
+def time_text(session, query, params, repeat):
+    """Median planning, execution and wall time of query run through text()."""
+    explain = text(EXPLAIN_PREFIX + query.sql)
+    planning, execution, wall = [], [], []
+    for _ in range(repeat):
+        planning_ms, execution_ms = plan_times(session.execute(explain, params))
+        planning.append(planning_ms)
+        execution.append(execution_ms)
+        start = time.perf_counter()
+        session.execute(query.text, params).fetchall()
+        wall.append((time.perf_counter() - start) * 1000)
+    return summarize(planning, execution, wall)
+
+
+def time_prepared(session, query, params, repeat):
+    """Median planning, execution and wall time of query run as a prepared statement, and its plan counts."""
+    connection = session.connection()
+    query.prepare(connection)
+    planning, execution, wall = [], [], []
+    for _ in range(repeat):
+        planning_ms, execution_ms = plan_times(query.run_prepared(connection, params, EXPLAIN_PREFIX + query.execute_sql))
+        planning.append(planning_ms)
+        execution.append(execution_ms)
+        start = time.perf_counter()
+        query.run_prepared(connection, params).fetchall()
+        wall.append((time.perf_counter() - start) * 1000)
+    results = summarize(planning, execution, wall)
+    generic, custom = connection.exec_driver_sql(
+        "SELECT generic_plans, custom_plans FROM pg_prepared_statements WHERE name = %(name)s",
+        {'name': query.statement}
+    ).one()
+    results['plans'] = {'generic': generic, 'custom': custom}
+    return results
+
+
+def print_results(results):
+    print(f"{'query':<40} {'plan ms':>9} {'exec ms':>9} {'wall ms':>9}   {'plan ms':>9} {'exec ms':>9} {'wall ms':>9} {'plans':>9}")
+    print(f"{'':<40} {'text':^29}   {'prepared':^29} {'(g/c)':>9}")
+    for name, timings in results.items():
+        text_timings, prepared = timings['text'], timings['prepared']
+        plans = f"{prepared['plans']['generic']}/{prepared['plans']['custom']}"
+        print(
+            f"{name:<40} {text_timings['planning_ms']:>9.3f} {text_timings['execution_ms']:>9.3f} {text_timings['wall_ms']:>9.3f}"
+            f"   {prepared['planning_ms']:>9.3f} {prepared['execution_ms']:>9.3f} {prepared['wall_ms']:>9.3f} {plans:>9}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare planning and execution time of the registered queries.")
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs of each query each way")
+    parser.add_argument('--query', action='append', help="Only time the registered queries with this name prefix")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    if engine.dialect.name != 'postgresql':
+        parser.error("the planning benchmark needs a Postgres database")
+
+    results = {}
+    with Session(engine) as session:
+        for query, params in query_cases(session):
+            if args.query and not any(query.name.startswith(prefix) for prefix in args.query):
+                continue
+            results[query.name] = {
+                'text': time_text(session, query, params, args.repeat),
+                'prepared': time_prepared(session, query, params, args.repeat),
+            }
+        session.rollback()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+Benchmark suite: ingest throughput and the latency of every API route.
+
+Generates a synthetic dataset with benchmarks.generate_data, applies the
+migrations to a scratch schema of a local Postgres database, and then:
+
+    1. times scripts.ingest loading each data file, in rows per second
+    2. times --requests calls of every route the Flask app registers, through
+       the test client, and reports p50/p99 latency per route
+
+Routes are called with ids and dates taken from the loaded data. A route
+that has no case in route_cases is listed under uncovered_routes, so a new
+endpoint shows up in the results until it gets one.
+
+Results are written as JSON, named after the commit by default, so two runs
+can be compared; --compare reports the routes and files that got slower by
+more than --threshold and exits with status 1 if there are any.
+
+Usage (from the backend directory):
+    python -m benchmarks.suite [--database-url URL] [--seasons 1] [--seed 0] [--engine batch] \\
+        [--requests 50] [--output results.json] [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+import ijson
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from benchmarks.generate_data import generate
+from benchmarks.load_test import percentile
+from config.settings import DATABASE_URL
+from scripts.ingest import run_ingest
+from scripts.load_data import DATA_FILES
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+SCHEMA = 'benchmark'
+# Changes smaller than these are noise, whatever the ratio
+MIN_REGRESSION_MS = 1.0
+MIN_REGRESSION_SECONDS = 1.0
+
+
+def schema_url(database_url, schema):
+    """database_url with every connection's search_path set to schema."""
+    return str(make_url(database_url).update_query_dict({'options': f'-csearch_path={schema}'}))
+
+
+def create_schema(database_url, schema):
+    """Drop and recreate schema and apply every migration to it."""
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+        connection.execute(text(f"SET search_path TO {schema}"))
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '*.up.sql'))):
+            with open(path) as file:
+                connection.exec_driver_sql(file.read())
+    engine.dispose()
+
+
+def drop_schema(database_url, schema):
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+    engine.dispose()
+
+
+def count_records(file_path):
+    with open(file_path, 'rb') as file:
+        return sum(1 for _ in ijson.items(file, 'item'))
+
+
+def time_ingest(session, data_dir, engine):
+    """
+    Load each data file in turn with scripts.ingest and time it.
+
+    Returns:
+        dict: rows, seconds and rows_per_second for each file, and their total.
+    """
+    results = {}
+    for file_name, _ in DATA_FILES:
+        file_path = os.path.join(data_dir, file_name)
+        if not os.path.exists(file_path):
+            continue
+        rows = count_records(file_path)
+        start = time.perf_counter()
+        run_ingest(session, data_dir, [file_name], force=True, engine=engine)
+        seconds = time.perf_counter() - start
+        results[file_name] = {'rows': rows, 'seconds': round(seconds, 3), 'rows_per_second': round(rows / seconds, 1)}
+
+    rows = sum(result['rows'] for result in results.values())
+    seconds = sum(result['seconds'] for result in results.values())
+    results['total'] = {'rows': rows, 'seconds': round(seconds, 3), 'rows_per_second': round(rows / seconds, 1)}
+    return results
+
+
+def route_cases(session):
+    """
+    The requests to time, as (endpoint, path) pairs, with ids and dates from the loaded data.
+
+    The game, team and players are from a game a quarter of the way through the
+    schedule, and the date ranges cover that game's month.
+    """
+    game = session.execute(text("""
+        SELECT game_id, home_id, game_date FROM game_schedule
+        ORDER BY game_date, game_id
+        OFFSET (SELECT COUNT(*) / 4 FROM game_schedule) LIMIT 1
+    """)).mappings().one()
+    unit = session.execute(text("""
+        SELECT player_ids FROM lineup_unit
+        WHERE game_id = :game_id AND team_id = :team_id
+        ORDER BY lineup_num LIMIT 1
+    """), {'game_id': game['game_id'], 'team_id': game['home_id']}).scalar_one()
+    player_ids = ','.join(str(player_id) for player_id in sorted(unit))
+    pair = ','.join(str(player_id) for player_id in sorted(unit)[:2])
+    game_ids = ','.join(str(game_id) for game_id in range(game['game_id'], game['game_id'] + 20))
+
+    game_id = game['game_id']
+    team_id = game['home_id']
+    player_id = sorted(unit)[0]
+    year = game['game_date'].year
+    month = f"{game['game_date']:%Y-%m}"
+    start_date = f"{game['game_date']:%Y-%m}-01"
+    end_date = f"{game['game_date']:%Y-%m}-28"
+
+    def path(route, **params):
+        return f"{route}?{urlencode(params)}" if params else route
+
+    return [
+        ('index', '/'),
+        ('docs.get_docs', '/docs/'),
+        ('metrics.get_pool_metrics', '/metrics/pool'),
+        ('metrics.get_request_metrics', '/metrics'),
+        ('metrics.get_slow_queries', '/metrics/slow-queries'),
+        ('metrics.get_result_cache_metrics', '/metrics/result-cache'),
+        ('team.get_standings', '/teams/'),
+        ('team.get_standings_by_month', f'/teams/{month}'),
+        ('schedule.past_games', f'/schedule/past-games/{team_id}/{year}'),
+        ('schedule.most_back_to_back_games', '/schedule/most-b2b'),
+        ('schedule.most_rest', f'/schedule/most-rest/{start_date}/{end_date}'),
+        ('schedule.most_3_in_4s', f'/schedule/most-3-in-4s/{start_date}/{end_date}'),
+        ('lineup.get_wide_lineups', path('/lineups/wide', page_size=100)),
+        ('lineup.get_wide_lineups', path('/lineups/wide', game_id=game_id, page_size=100)),
+        ('lineup.get_wide_lineups', path('/lineups/wide', player_id=player_id, page_size=100)),
+        ('lineup.get_player_stints', path('/lineups/player-stints', page_size=100)),
+        ('lineup.stint_averages', path('/lineups/stint-averages', page_size=100)),
+        ('lineup.stint_averages', path('/lineups/stint-averages', page_size=100, backend='numpy')),
+        ('lineup.win_loss_stints', path('/lineups/win-loss-stints', page_size=100)),
+        ('lineup.win_loss_stints', path('/lineups/win-loss-stints', page_size=100, backend='numpy')),
+        ('lineup.get_unit_minutes', path('/lineups/units/minutes', player_ids=player_ids)),
+        ('lineup.search_units', path('/lineups/units/search', player_ids=pair, page_size=25)),
+        ('lineup.get_shared_minutes', path('/lineups/shared-minutes', player_ids=pair)),
+        ('lineup.get_shared_minutes', path('/lineups/shared-minutes', player_ids=pair, start_date=start_date, end_date=end_date)),
+        ('game.get_game_stints', f'/games/{game_id}/stints'),
+        ('game.get_games_batch', path('/games/batch', game_ids=game_ids)),
+        ('game.get_games_batch', path('/games/batch', team_id=team_id, start_date=start_date, end_date=end_date)),
+        ('export.export_wide_lineups', path('/exports/lineups/wide', format='arrow', game_id=game_id)),
+        ('export.export_player_stints', path('/exports/lineups/player-stints', format='parquet', game_id=game_id)),
+    ]
+
+
+def time_routes(client, cases, requests):
+    """
+    Call each case once to warm up, then requests times, and summarize its latency in milliseconds.
+
+    Returns:
+        dict: endpoint, status, p50_ms, p99_ms, mean_ms and max_ms, keyed by path.
+    """
+    results = {}
+    for endpoint, path in cases:
+        client.get(path)
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(path)
+            response.get_data()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[path] = {
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'max_ms': round(timings[-1], 3),
+        }
+    return results
+
+
+def compare_results(baseline, current, threshold):
+    """
+    The measurements of current that are worse than baseline by more than threshold (a fraction).
+
+    Routes regress when p50 or p99 grows, ingest files when rows_per_second drops.
+    Changes under MIN_REGRESSION_MS or MIN_REGRESSION_SECONDS are ignored, as are
+    entries missing from either run.
+
+    Returns:
+        list: (name, metric, baseline value, current value) for each regression.
+    """
+    regressions = []
+    for path, result in current.get('routes', {}).items():
+        before = baseline.get('routes', {}).get(path)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if (result[metric] > before[metric] * (1 + threshold)
+                    and result[metric] - before[metric] > MIN_REGRESSION_MS):
+                regressions.append((path, metric, before[metric], result[metric]))
+
+    for file_name, result in current.get('ingest', {}).items():
+        before = baseline.get('ingest', {}).get(file_name)
+        if before is None:
+            continue
+        if (result['rows_per_second'] < before['rows_per_second'] * (1 - threshold)
+                and result['seconds'] - before['seconds'] > MIN_REGRESSION_SECONDS):
+            regressions.append((file_name, 'rows_per_second', before['rows_per_second'], result['rows_per_second']))
+    return regressions
+
+
+def current_commit():
+    """The checked out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(database_url, data_dir, seasons, seed, engine, requests):
+    """Load data_dir into a scratch schema, time the ingest and every route, and return the results."""
+    from app import create_app
+
+    create_schema(database_url, SCHEMA)
+    url = schema_url(database_url, SCHEMA)
+    db_engine = create_engine(url)
+    session = sessionmaker(bind=db_engine)()
+    try:
+        ingest = time_ingest(session, data_dir, engine)
+        cases = route_cases(session)
+    finally:
+        session.close()
+        db_engine.dispose()
+
+    app = create_app(url)
+    covered = {endpoint for endpoint, _ in cases}
+    uncovered = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                       if rule.endpoint != 'static' and rule.endpoint not in covered)
+    routes = time_routes(app.test_client(), cases, requests)
+
+    return {
+        'commit': current_commit(),
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'parameters': {'seasons': seasons, 'seed': seed, 'engine': engine, 'requests': requests},
+        'ingest': ingest,
+        'routes': routes,
+        'uncovered_routes': uncovered,
+    }
+
+
+def print_results(results):
+    print(f"{'file':<22} {'rows':>9} {'seconds':>9} {'rows/s':>10}")
+    for file_name, result in results['ingest'].items():
+        print(f"{file_name:<22} {result['rows']:>9} {result['seconds']:>9.2f} {result['rows_per_second']:>10.0f}")
+    print(f"\n{'path':<72} {'status':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for path, result in results['routes'].items():
+        print(f"{path[:72]:<72} {result['status']:>6} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+    if results['uncovered_routes']:
+        print(f"\nNo benchmark case for: {', '.join(results['uncovered_routes'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time ingest and every API route on a synthetic dataset.")
+    parser.add_argument('--database-url', default=DATABASE_URL, help="Postgres database to create the scratch schema in")
+    parser.add_argument('--data-dir', help="Load this generated dataset instead of generating one")
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', choices=['batch', 'copy', 'parallel'], default='batch', help="Ingest loader")
+    parser.add_argument('--requests', type=int, default=50, help="Timed requests per route")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="Earlier results file to check for regressions against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Slowdown that counts as a regression, as a fraction")
+    parser.add_argument('--keep-schema', action='store_true', help=f"Leave the {SCHEMA} schema in place afterwards")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or temp_dir
+        if not args.data_dir:
+            generate(data_dir, args.seasons, args.seed)
+        try:
+            results = run_suite(args.database_url, data_dir, args.seasons, args.seed, args.engine, args.requests)
+        finally:
+            if not args.keep_schema:
+                drop_schema(args.database_url, SCHEMA)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print_results(results)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare_results(baseline, results, args.threshold)
+        print(f"\n{len(regressions)} regression(s) against {args.compare} (commit {baseline.get('commit')})")
+        for name, metric, before, after in regressions:
+            print(f"  {name[:72]:<72} {metric:<16} {before:>10.2f} -> {after:>10.2f}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
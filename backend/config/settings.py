@@ -2,3 +2,39 @@ import os
 
 # Use environment variables or fallback to default values
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://user:password@db:5432/lac_fullstack_dev?sslmode=disable')
+
+# Connection pool used by the API (see db/session.py)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # seconds before a connection is replaced, -1 to disable
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# asyncpg pool of the async API (see db/async_pool.py); DB_POOL_TIMEOUT bounds the wait for a connection
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv('ASYNC_DB_POOL_MIN_SIZE', 2))
+ASYNC_DB_POOL_MAX_SIZE = int(os.getenv('ASYNC_DB_POOL_MAX_SIZE', 10))
+
+# How long the API trusts its copy of the data_version table before re-reading it
+DATA_VERSION_POLL_SECONDS = float(os.getenv('DATA_VERSION_POLL_SECONDS', 2))
+
+# Response JSON encoder: 'orjson' or 'flask' (see helpers/json_encoder.py)
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'orjson')
+
+# Per-request profiling served on /metrics (see helpers/profiling.py)
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', 'true').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 500))  # 0 to turn off the slow query log
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() in ('1', 'true', 'yes')  # re-runs slow queries under EXPLAIN ANALYZE
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 50))
+
+# Run the registered queries as server-side prepared statements on Postgres (see db/query_registry.py)
+PREPARED_STATEMENTS = os.getenv('PREPARED_STATEMENTS', 'true').lower() in ('1', 'true', 'yes')
+
+# Result cache of the analytic endpoints (see helpers/result_cache.py): tiers in lookup order, '' turns it off
+RESULT_CACHE_TIERS = [tier.strip() for tier in os.getenv('RESULT_CACHE_TIERS', 'memory,postgres').split(',') if tier.strip()]
+RESULT_CACHE_TTL_SECONDS = float(os.getenv('RESULT_CACHE_TTL_SECONDS', 600))
+RESULT_CACHE_MEMORY_BYTES = int(os.getenv('RESULT_CACHE_MEMORY_BYTES', 32 * 1024 * 1024))  # per worker
+RESULT_CACHE_SHARED_BYTES = int(os.getenv('RESULT_CACHE_SHARED_BYTES', 256 * 1024 * 1024))
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv('RESULT_CACHE_MAX_ENTRY_BYTES', 4 * 1024 * 1024))
+RESULT_CACHE_LOCK_WAIT_SECONDS = float(os.getenv('RESULT_CACHE_LOCK_WAIT_SECONDS', 30))  # longest wait for another request computing the same key
+RESULT_CACHE_POOL_SIZE = int(os.getenv('RESULT_CACHE_POOL_SIZE', 4))  # connections of the postgres tier per worker, apart from DB_POOL_SIZE
+RESULT_CACHE_POOL_TIMEOUT = float(os.getenv('RESULT_CACHE_POOL_TIMEOUT', 1))  # seconds; on a timeout the request computes its result without the tier
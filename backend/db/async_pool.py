@@ -0,0 +1,44 @@
+"""
+asyncpg connection pool for the async API (async_app.py).
+
+Queries are shared with the Flask handlers, which write bind parameters the
+SQLAlchemy text() way (:name). to_asyncpg rewrites them to asyncpg's
+positional $n parameters, so the same SQL runs on both servers. asyncpg
+prepares and caches every statement it runs on a connection, so the SQL of a
+registered query (see db/query_registry.py) is planned the way its prepared
+statement is on the Flask side.
+"""
+import re
+import asyncpg
+from config import settings
+from db.query_registry import positional
+
+
+def to_asyncpg(query, params):
+    """
+    Rewrite a text() style query for asyncpg.
+
+    Returns:
+        tuple: The query with $n parameters and the list of their values.
+    """
+    query, names = positional(query)
+    return query, [params[name] for name in names]
+
+
+def asyncpg_dsn(database_url):
+    """database_url without a SQLAlchemy driver suffix such as +psycopg2."""
+    return re.sub(r"^postgres(?:ql)?\+\w+://", "postgresql://", database_url)
+
+
+async def create_async_pool(database_url=settings.DATABASE_URL, min_size=settings.ASYNC_DB_POOL_MIN_SIZE,
+                            max_size=settings.ASYNC_DB_POOL_MAX_SIZE):
+    """Open an asyncpg pool configured from config.settings."""
+    return await asyncpg.create_pool(asyncpg_dsn(database_url), min_size=min_size, max_size=max_size)
+
+
+async def fetch_dicts(pool, query, params=None):
+    """Run query on a connection of its own from pool and return its rows as dicts."""
+    query, args = to_asyncpg(query, params or {})
+    async with pool.acquire(timeout=settings.DB_POOL_TIMEOUT) as connection:
+        records = await connection.fetch(query, *args)
+    return [dict(record) for record in records]
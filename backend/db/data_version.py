@@ -0,0 +1,54 @@
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import DateTime, bindparam, text
+from config import settings
+
+
+def bump_data_version(session, name):
+    """Increment the version counter for name and set its updated_at to now, in UTC. Does not commit."""
+    session.execute(text("""
+        INSERT INTO data_version (name, version, updated_at)
+        VALUES (:name, 1, :updated_at)
+        ON CONFLICT (name) DO UPDATE
+        SET version = data_version.version + 1, updated_at = EXCLUDED.updated_at
+    """).bindparams(bindparam('updated_at', type_=DateTime)), {'name': name, 'updated_at': datetime.utcnow()})
+
+
+def get_data_versions(session):
+    """Read every version counter as {name: (version, updated_at)}."""
+    result = session.execute(text("SELECT name, version, updated_at FROM data_version").columns(updated_at=DateTime))
+    return {row.name: (row.version, row.updated_at) for row in result}
+
+
+class DataVersionTracker:
+    """
+    Process-local copy of the data_version table.
+
+    The table is re-read at most once every poll_seconds, so most lookups are
+    answered from memory. A load is noticed within poll_seconds of its commit.
+    """
+
+    def __init__(self, db_session, poll_seconds=settings.DATA_VERSION_POLL_SECONDS):
+        self._db_session = db_session
+        self._poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._read_at = None
+
+    def versions(self):
+        with self._lock:
+            if self._read_at is None or time.monotonic() - self._read_at >= self._poll_seconds:
+                self._versions = get_data_versions(self._db_session)
+                self._read_at = time.monotonic()
+            return self._versions
+
+    def version(self, *names):
+        """Version counters for names, 0 for tables that have never been loaded."""
+        versions = self.versions()
+        return tuple(versions[name][0] if name in versions else 0 for name in names)
+
+    def last_modified(self, *names):
+        """The latest updated_at (UTC) of names, or None if none of them has been loaded."""
+        versions = self.versions()
+        return max((versions[name][1] for name in names if name in versions), default=None)
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, BigInteger, String, Integer, Enum, Numeric, ForeignKey, TIMESTAMP, CheckConstraint, Text, UniqueConstraint
+from sqlalchemy import create_engine, Column, BigInteger, String, Integer, Enum, Numeric, ForeignKey, TIMESTAMP, CheckConstraint, Text, UniqueConstraint, JSON, LargeBinary
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import enum
@@ -39,7 +40,7 @@ class Team(Base):
 
 class TeamAffiliate(Base):
     __tablename__ = 'team_affiliates'
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)  # SQLite only autoincrements INTEGER keys
     nba_team_id = Column(BigInteger, nullable=False)
     nba_abrv = Column(String, nullable=False)
     glg_team_id = Column(BigInteger, nullable=True)
@@ -85,9 +86,25 @@ class GameSchedule(Base):
     away_team = relationship("Team", foreign_keys=[away_id], back_populates="away_games")
     lineup_entries = relationship("Lineup", back_populates="game")
 
+class TeamGame(Base):
+    """One row per team per game, derived from game_schedule."""
+    __tablename__ = 'team_game'
+    game_id = Column(BigInteger, ForeignKey('game_schedule.game_id'), primary_key=True)
+    team_id = Column(BigInteger, ForeignKey('teams.team_id'), primary_key=True)
+    opponent_id = Column(BigInteger, ForeignKey('teams.team_id'), nullable=False)
+    location = Column(String, nullable=False)  # 'home' or 'away'
+    game_date = Column(TIMESTAMP, nullable=False)
+    points_for = Column(Integer, nullable=False)
+    points_against = Column(Integer, nullable=False)
+    result = Column(String(1))  # 'W', 'L', or NULL when the scores are level
+
+    __table_args__ = (
+        CheckConstraint("location IN ('home', 'away')", name='check_team_game_location'),
+    )
+
 class Lineup(Base):
     __tablename__ = 'lineup'
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)  # SQLite only autoincrements INTEGER keys
     team_id = Column(BigInteger, ForeignKey('teams.team_id'))
     player_id = Column(BigInteger, ForeignKey('players.player_id'))
     game_id = Column(BigInteger, ForeignKey('game_schedule.game_id'))
@@ -106,3 +123,85 @@ class Lineup(Base):
     team = relationship("Team")
     player = relationship("Player", back_populates="lineup_entries")
     game = relationship("GameSchedule", back_populates="lineup_entries")
+
+class LoadState(Base):
+    __tablename__ = 'load_state'
+    file_name = Column(Text, primary_key=True)
+    content_hash = Column(Text, nullable=False)
+    byte_size = Column(BigInteger, nullable=False)
+    loaded_at = Column(TIMESTAMP, nullable=False)
+
+    def __repr__(self):
+        return f"<LoadState(file_name={self.file_name}, content_hash={self.content_hash}, byte_size={self.byte_size})>"
+
+class PlayerStint(Base):
+    """A continuous run on court by one player within one period, derived from lineup."""
+    __tablename__ = 'player_stint'
+    game_id = Column(BigInteger, ForeignKey('game_schedule.game_id'), primary_key=True)
+    team_id = Column(BigInteger, ForeignKey('teams.team_id'), primary_key=True)
+    player_id = Column(BigInteger, ForeignKey('players.player_id'), primary_key=True)
+    period = Column(Integer, primary_key=True)
+    stint_number = Column(Integer, primary_key=True)  # 1-based within the period
+    stint_start = Column(Numeric(4, 1), nullable=False)  # seconds remaining in the period
+    stint_end = Column(Numeric(4, 1), nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('stint_end <= stint_start', name='check_stint_time'),
+    )
+
+class LineupUnit(Base):
+    """The players on court for one lineup row, derived from lineup."""
+    __tablename__ = 'lineup_unit'
+    game_id = Column(BigInteger, ForeignKey('game_schedule.game_id'), primary_key=True)
+    team_id = Column(BigInteger, ForeignKey('teams.team_id'), primary_key=True)
+    lineup_num = Column(Integer, primary_key=True)
+    period = Column(Integer, primary_key=True)
+    time_in = Column(Numeric(4, 1), primary_key=True)  # seconds remaining in the period
+    time_out = Column(Numeric(4, 1), nullable=False)
+    player_ids = Column(ARRAY(BigInteger).with_variant(JSON, 'sqlite'), nullable=False)  # sorted ascending; SQLite has no arrays
+    unit_hash = Column(BigInteger, nullable=False)  # hashtextextended of the comma separated player_ids
+
+    __table_args__ = (
+        CheckConstraint('time_out <= time_in', name='check_lineup_unit_time'),
+    )
+
+class PlayerCourtTime(Base):
+    """One player's on-court time in one game as a bitset over the game's deciseconds, derived from lineup."""
+    __tablename__ = 'player_court_time'
+    player_id = Column(BigInteger, ForeignKey('players.player_id'), primary_key=True)
+    game_id = Column(BigInteger, ForeignKey('game_schedule.game_id'), primary_key=True)
+    team_id = Column(BigInteger, ForeignKey('teams.team_id'), nullable=False)
+    seconds_on_court = Column(Numeric(6, 1), nullable=False)
+    on_court = Column(LargeBinary, nullable=False)  # little-endian, bit i is the i-th tenth of a second since tip-off
+
+class PlayerStintSummary(Base):
+    """Per-player stint totals, split by game result, derived from player_stint."""
+    __tablename__ = 'player_stint_summary'
+    player_id = Column(BigInteger, ForeignKey('players.player_id'), primary_key=True)
+    player_name = Column(Text, nullable=False)
+    total_games = Column(Integer, nullable=False)
+    total_stints = Column(Integer, nullable=False)
+    total_stint_duration = Column(Numeric, nullable=False)  # seconds
+    total_games_wins = Column(Integer, nullable=False)
+    total_stints_wins = Column(Integer, nullable=False)
+    total_stint_duration_wins = Column(Numeric, nullable=False)
+    total_games_losses = Column(Integer, nullable=False)
+    total_stints_losses = Column(Integer, nullable=False)
+    total_stint_duration_losses = Column(Numeric, nullable=False)
+
+class DataVersion(Base):
+    """Counter bumped by the loader whenever it writes to the named table."""
+    __tablename__ = 'data_version'
+    name = Column(Text, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(TIMESTAMP, nullable=False)
+
+class ResultCacheEntry(Base):
+    """A cached response body in the shared tier of helpers.result_cache; the migration creates the table UNLOGGED."""
+    __tablename__ = 'result_cache'
+    key = Column(Text, primary_key=True)
+    value = Column(LargeBinary, nullable=False)
+    content_type = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)  # bytes of value
+    stored_at = Column(TIMESTAMP, nullable=False)  # UTC
+    expires_at = Column(TIMESTAMP, nullable=False)
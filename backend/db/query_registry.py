@@ -0,0 +1,181 @@
+"""
+Registry of the API's SQL, built once and run as prepared statements.
+
+Handlers register their queries when their module is imported, one entry
+per combination of a query's optional conditions (see variants), instead
+of formatting the SQL and wrapping it in text() on every request.
+
+On Postgres through psycopg2 a registered query is PREPAREd on a
+connection the first time that connection runs it, and EXECUTEd with the
+request's parameters from then on. The statement is parsed and rewritten
+once per connection rather than once per request, and after a few
+executions Postgres may keep a generic plan for it when that plan is no
+costlier than planning for each set of parameters (see plan_cache_mode).
+Pooled connections keep their prepared statements, which are tracked in
+the connection's info. Other databases, and PREPARED_STATEMENTS=false, run
+the same SQL through text().
+
+A prepared statement cannot back a server-side cursor, so the streaming
+exports run a registered query's sql directly.
+
+benchmarks/query_planning.py compares planning and execution time of the
+registered queries run both ways.
+"""
+import hashlib
+import itertools
+import re
+from sqlalchemy import text
+from config import settings
+
+# :name, but not the second colon of a :: cast or a colon inside a word such as 'MI:SS'
+BIND_PARAMETER = re.compile(r"(?<![:\w]):(\w+)")
+# Postgres truncates longer identifiers
+MAX_IDENTIFIER_LENGTH = 63
+
+
+def positional(query):
+    """
+    Number the :name parameters of a text() style query.
+
+    Returns:
+        tuple: The query with $1, $2, ... in order of each name's first use, and the names in that order.
+    """
+    positions = {}
+
+    def replace(match):
+        name = match.group(1)
+        if name not in positions:
+            positions[name] = len(positions) + 1
+        return f"${positions[name]}"
+
+    return BIND_PARAMETER.sub(replace, query), list(positions)
+
+
+def where_clause(conditions):
+    """A WHERE clause joining conditions with AND, or '' when there are none."""
+    conditions = list(conditions)
+    if not conditions:
+        return ""
+    return "WHERE " + " AND ".join(conditions)
+
+
+def can_prepare(connection):
+    """Whether registered queries run as prepared statements on connection."""
+    return connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+
+class RegisteredQuery:
+    """One registered SQL statement and the PREPARE and EXECUTE statements that run it."""
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+        self.text = text(sql)
+        positional_sql, self.parameters = positional(sql)
+
+        # The digest tells apart statements whose SQL changed under the same name
+        digest = hashlib.sha1(sql.encode()).hexdigest()[:12]
+        prefix = re.sub(r'\W+', '_', name)[:MAX_IDENTIFIER_LENGTH - len(digest) - 1]
+        self.statement = f"{prefix}_{digest}"
+        self.prepare_sql = f"PREPARE {self.statement} AS {positional_sql.strip().rstrip(';')}"
+        arguments = ', '.join(f"%({parameter})s" for parameter in self.parameters)
+        self.execute_sql = f"EXECUTE {self.statement}({arguments})" if arguments else f"EXECUTE {self.statement}"
+
+    def prepare(self, connection):
+        """PREPARE the statement on connection unless it already has been."""
+        prepared = connection.connection.info.setdefault('prepared_statements', set())
+        if self.statement not in prepared:
+            connection.exec_driver_sql(self.prepare_sql)
+            prepared.add(self.statement)
+
+    def run_prepared(self, connection, params, statement=None):
+        """
+        Run statement, by default execute_sql, with the query's parameters taken from params.
+
+        statement may wrap execute_sql, as EXPLAIN does.
+        """
+        statement = statement or self.execute_sql
+        if not self.parameters:
+            return connection.exec_driver_sql(statement)
+        return connection.exec_driver_sql(statement, {parameter: params[parameter] for parameter in self.parameters})
+
+    def execute(self, db_session, params=None, prepare=None):
+        """
+        Run the query on db_session's connection and return its result.
+
+        Args:
+            params (dict, optional): Values of the query's parameters; others are ignored.
+            prepare (bool, optional): Run it as a prepared statement where possible.
+                Defaults to the PREPARED_STATEMENTS setting.
+        """
+        params = params or {}
+        if prepare is None:
+            prepare = settings.PREPARED_STATEMENTS
+        connection = db_session.connection()
+        if not prepare or not can_prepare(connection):
+            return db_session.execute(self.text, params)
+
+        self.prepare(connection)
+        return self.run_prepared(connection, params)
+
+
+class QueryVariants:
+    """A query registered once for each combination of its optional conditions."""
+
+    def __init__(self, variants):
+        self._variants = variants
+
+    def get(self, names=()):
+        """The variant using the optional conditions called names, in any order."""
+        return self._variants[frozenset(names)]
+
+    def __iter__(self):
+        return iter(self._variants.values())
+
+
+class QueryRegistry:
+    """Every registered query, by name."""
+
+    def __init__(self):
+        self._queries = {}
+
+    def register(self, name, sql):
+        """Register sql under name and return its RegisteredQuery."""
+        query = self._queries.get(name)
+        if query is not None:
+            if query.sql != sql:
+                raise ValueError(f"Query {name!r} is already registered with different SQL")
+            return query
+        query = self._queries[name] = RegisteredQuery(name, sql)
+        return query
+
+    def variants(self, name, build, optional, required=()):
+        """
+        Register build(where_clause) for every combination of the optional conditions.
+
+        Args:
+            name (str): Name of the query; each variant's name adds the conditions it uses.
+            build (callable): Returns the SQL for a WHERE clause ('' for no conditions).
+            optional (dict): Condition SQL by name, each of which a request may or may not use.
+            required (iterable): Condition SQL every variant uses, ahead of the optional ones.
+
+        Returns:
+            QueryVariants: Look up a variant with .get(names of the conditions used).
+        """
+        required = list(required)
+        variants = {}
+        for count in range(len(optional) + 1):
+            for names in itertools.combinations(optional, count):
+                conditions = required + [optional[condition] for condition in names]
+                variant_name = '+'.join([name, *names])
+                variants[frozenset(names)] = self.register(variant_name, build(where_clause(conditions)))
+        return QueryVariants(variants)
+
+    def get(self, name):
+        return self._queries[name]
+
+    def __iter__(self):
+        return iter(self._queries.values())
+
+
+query_registry = QueryRegistry()
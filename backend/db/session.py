@@ -0,0 +1,98 @@
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from config import settings
+
+
+class PoolMetrics:
+    """Thread-safe counters for how long requests wait to check out a connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'total_wait_seconds': round(self.total_wait_seconds, 6),
+                'avg_wait_seconds': round(self.total_wait_seconds / waits, 6) if waits else 0.0,
+                'max_wait_seconds': round(self.max_wait_seconds, 6),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout wait times in pool_metrics."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def create_db_engine(database_url=settings.DATABASE_URL, pool_size=settings.DB_POOL_SIZE,
+                     max_overflow=settings.DB_MAX_OVERFLOW, pool_timeout=settings.DB_POOL_TIMEOUT,
+                     pool_recycle=settings.DB_POOL_RECYCLE, pool_pre_ping=settings.DB_POOL_PRE_PING):
+    """Create an engine backed by a TimedQueuePool configured from config.settings."""
+    return create_engine(
+        database_url,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+    )
+
+
+def create_scoped_session(engine):
+    """
+    Create a thread-local session registry.
+
+    Each request thread gets its own session, and so its own pooled connection.
+    Call .remove() when the request ends to close the session and return the
+    connection to the pool.
+    """
+    return scoped_session(sessionmaker(bind=engine))
+
+
+def pool_status(engine):
+    """Current pool occupancy plus the checkout wait metrics."""
+    pool = engine.pool
+    status = {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+    }
+    status.update(pool_metrics.snapshot())
+    return status
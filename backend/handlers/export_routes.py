@@ -0,0 +1,110 @@
+from functools import partial
+from flask import Blueprint, jsonify, request
+from db.query_registry import query_registry
+from .validators import validate_columnar_format
+from .lineup_routes import (
+    wide_lineups_query, player_stints_query, WIDE_LINEUPS_CONDITIONS, WIDE_SECONDS_COLUMNS, STINT_SECONDS_COLUMNS,
+    WIDE_LINEUPS_TABLES, PLAYER_STINTS_TABLES,
+)
+from helpers.arrow_stream import pa, stream_columnar
+from helpers.response_cache import ConditionalGet
+
+# Streamed from a server-side cursor, so only their SQL is used (see db/query_registry.py)
+WIDE_LINEUPS_COLUMNAR = query_registry.variants(
+    'wide_lineups_columnar', partial(wide_lineups_query, limit_clause="", time_columns=WIDE_SECONDS_COLUMNS),
+    {name: WIDE_LINEUPS_CONDITIONS[name] for name in ('game_id', 'player_id')}
+)
+PLAYER_STINTS_COLUMNAR = query_registry.variants(
+    'player_stints_columnar', partial(player_stints_query, limit_clause="", time_columns=STINT_SECONDS_COLUMNS),
+    {'game_id': "gs.game_id = :game_id"}
+)
+
+def wide_lineups_schema():
+    player_fields = []
+    for number in range(1, 6):
+        player_fields += [
+            pa.field(f'player{number}_id', pa.int64()),
+            pa.field(f'player{number}_name', pa.string()),
+            pa.field(f'player{number}_position', pa.string()),
+        ]
+    return pa.schema([
+        pa.field('game_id', pa.int64()),
+        pa.field('team_id', pa.int64()),
+        pa.field('lineup_num', pa.int32()),
+        pa.field('period', pa.int32()),
+        pa.field('time_in', pa.float64()),  # seconds remaining in the period
+        pa.field('time_out', pa.float64()),
+    ] + player_fields)
+
+def player_stints_schema():
+    return pa.schema([
+        pa.field('game_date', pa.timestamp('us')),
+        pa.field('game_id', pa.int64()),
+        pa.field('team', pa.string()),
+        pa.field('opponent', pa.string()),
+        pa.field('player_name', pa.string()),
+        pa.field('period', pa.int32()),
+        pa.field('stint_number', pa.int32()),
+        pa.field('stint_start_seconds', pa.float64()),  # seconds remaining in the period
+        pa.field('stint_end_seconds', pa.float64()),
+    ])
+
+def create_export_bp(db_session, data_versions):
+    export_bp = Blueprint('export', __name__, url_prefix='/exports')
+
+    # Responses only change when the loader writes to the tables a route reads
+    conditional = ConditionalGet(data_versions)
+
+    @export_bp.before_request
+    def check_export_request():
+        if pa is None:
+            return jsonify({"error": "Columnar exports need pyarrow installed on the server."}), 501
+
+        is_valid, error = validate_columnar_format(request.args.get('format', 'arrow'))
+        if not is_valid:
+            return jsonify(error), 400
+
+    # url should be /exports/lineups/wide?format=parquet&game_id=1&player_id=1
+    @export_bp.route('/lineups/wide', methods=['GET'])
+    @conditional(*WIDE_LINEUPS_TABLES)
+    def export_wide_lineups():
+        """
+        Export every wide lineup as Arrow or Parquet, with time_in and time_out
+        as numeric seconds. Accepts the game_id and player_id filters of /lineups/wide.
+        """
+        game_id = request.args.get('game_id', type=int)
+        player_id = request.args.get('player_id', type=int)
+
+        params = {}
+        conditions = []
+        if game_id:
+            conditions.append('game_id')
+            params['game_id'] = game_id
+
+        if player_id:
+            conditions.append('player_id')
+            params['player_id'] = player_id
+
+        query = WIDE_LINEUPS_COLUMNAR.get(conditions).sql
+        return stream_columnar(db_session, query, params, wide_lineups_schema(), request.args.get('format', 'arrow'), 'wide_lineups')
+
+    # url should be /exports/lineups/player-stints?format=arrow&game_id=1
+    @export_bp.route('/lineups/player-stints', methods=['GET'])
+    @conditional(*PLAYER_STINTS_TABLES)
+    def export_player_stints():
+        """
+        Export every player stint as Arrow or Parquet, with the stint start and
+        end as numeric seconds instead of MI:SS strings.
+        """
+        game_id = request.args.get('game_id', type=int)
+
+        params = {}
+        conditions = []
+        if game_id:
+            conditions.append('game_id')
+            params['game_id'] = game_id
+
+        query = PLAYER_STINTS_COLUMNAR.get(conditions).sql
+        return stream_columnar(db_session, query, params, player_stints_schema(), request.args.get('format', 'arrow'), 'player_stints')
+
+    return export_bp
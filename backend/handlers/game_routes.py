@@ -0,0 +1,153 @@
+from functools import partial
+from flask import Blueprint, jsonify, request
+from db.query_registry import query_registry
+from helpers.json_encoder import row_dicts
+from helpers.response_cache import ConditionalGet
+from helpers.stint_engine import load_game_lineups, load_games_lineups, compute_stints
+from .lineup_routes import wide_lineups_query, WIDE_LINEUPS_TABLES
+from .validators import validate_id_list, parse_id_list, validate_date_range, day_range
+
+# Most games one batch request may ask for, about a season for one team
+BATCH_GAME_LIMIT = 100
+
+def batch_games_query(where_clause):
+    return f"""
+    SELECT
+        gs.game_id,
+        gs.game_date,
+        gs.home_id,
+        home.team_name AS home_team,
+        gs.away_id,
+        away.team_name AS away_team,
+        gs.home_score,
+        gs.away_score
+    FROM
+        game_schedule gs
+    JOIN
+        teams home ON gs.home_id = home.team_id
+    JOIN
+        teams away ON gs.away_id = away.team_id
+    {where_clause}
+    ORDER BY
+        gs.game_date,
+        gs.game_id
+    LIMIT :game_limit
+"""
+
+GAME_EXISTS = query_registry.register('game_exists', "SELECT 1 FROM game_schedule WHERE game_id = :game_id")
+BATCH_GAMES_BY_ID = query_registry.register('batch_games_by_id', batch_games_query("WHERE gs.game_id = ANY(:game_ids)"))
+BATCH_GAMES_BY_TEAM = query_registry.register('batch_games_by_team', batch_games_query("""WHERE gs.game_id IN (
+        SELECT game_id FROM team_game
+        WHERE team_id = :team_id AND game_date >= :start AND game_date < :end
+    )"""))
+BATCH_LINEUPS = query_registry.variants(
+    'batch_wide_lineups', partial(wide_lineups_query, limit_clause=""), {'team_id': "l.team_id = :team_id"},
+    required=["l.game_id = ANY(:game_ids)"]
+)
+
+def create_game_bp(db_session, data_versions):
+    game_bp = Blueprint('game', __name__, url_prefix='/games')
+
+    # Responses only change when the loader writes to the tables a route reads
+    conditional = ConditionalGet(data_versions)
+
+    # url should be /games/1/stints or /games/1/stints?team_id=1610612746
+    @game_bp.route('/<int:game_id>/stints', methods=['GET'])
+    @conditional('lineup', 'game_schedule', 'players')
+    def get_game_stints(game_id):
+        """
+        Retrieve every player's stints in one game.
+
+        Stints are computed in process from the game's lineup rows rather than
+        read from player_stint, so the cost depends only on the size of the game.
+
+        Args:
+            game_id (int): The game to compute stints for.
+
+        Returns:
+            JSON: The game_id and one entry per player with their stints (period,
+                  stint_number, time_in, time_out, seconds and elapsed game time
+                  at the start and end), stint_count, seconds_played and
+                  minutes_played, or a 404 if the game does not exist.
+        """
+        team_id = request.args.get('team_id', type=int)
+
+        columns = load_game_lineups(db_session, game_id, team_id)
+        if not len(columns):
+            game = GAME_EXISTS.execute(db_session, {'game_id': game_id}).first()
+            if game is None:
+                return jsonify({"error": f"Game {game_id} not found."}), 404
+
+        return jsonify({
+            "game_id": game_id,
+            "players": compute_stints(columns),
+        }), 200
+
+    # url should be /games/batch?game_ids=1,2,3 or /games/batch?team_id=1610612746&start_date=2024-01-01&end_date=2024-01-31
+    @game_bp.route('/batch', methods=['GET'])
+    @conditional(*WIDE_LINEUPS_TABLES, 'game_schedule', 'teams')
+    def get_games_batch():
+        """
+        Retrieve the lineups and stints of many games in one request.
+
+        Games are chosen by game_ids, or by a team_id with a start_date and
+        end_date, and read with one query each for the games, their wide
+        lineups and their lineup rows, all filtered with game_id = ANY(:game_ids).
+        A team_id also limits the lineups and stints to that team. A date range
+        with more than BATCH_GAME_LIMIT games is a 400, as are more game_ids.
+
+        Returns:
+            JSON: game_ids in date order, and games keyed by game_id, each with
+                  the game's teams and score, its wide lineups and every player's
+                  stints as in /games/<game_id>/stints.
+        """
+        game_ids = request.args.get('game_ids')
+        team_id = request.args.get('team_id', type=int)
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+
+        # One game over the limit tells a date range that holds too many from one that fits
+        params = {'game_limit': BATCH_GAME_LIMIT + 1}
+        if game_ids is not None:
+            is_valid, error = validate_id_list(game_ids, 'game_ids', 1, BATCH_GAME_LIMIT)
+            if not is_valid:
+                return jsonify(error), 400
+            games_query = BATCH_GAMES_BY_ID
+            params['game_ids'] = parse_id_list(game_ids)
+        elif team_id is not None and start_date is not None and end_date is not None:
+            is_valid, error = validate_date_range(start_date, end_date)
+            if not is_valid:
+                return jsonify(error), 400
+            games_query = BATCH_GAMES_BY_TEAM
+            params['team_id'] = team_id
+            params['start'], params['end'] = day_range(start_date, end_date)
+        else:
+            return jsonify({"error": "Please give game_ids, or a team_id with a start_date and end_date."}), 400
+
+        games = row_dicts(games_query.execute(db_session, params))
+        if len(games) > BATCH_GAME_LIMIT:
+            return jsonify({"error": f"The date range holds more than {BATCH_GAME_LIMIT} games. Please give a shorter range."}), 400
+        batch_params = {'game_ids': [game['game_id'] for game in games]}
+
+        conditions = []
+        if team_id is not None:
+            conditions.append('team_id')
+            batch_params['team_id'] = team_id
+        lineups = row_dicts(BATCH_LINEUPS.get(conditions).execute(db_session, batch_params))
+        game_lineups = load_games_lineups(db_session, batch_params['game_ids'], team_id)
+
+        games_by_id = {}
+        for game in games:
+            game['lineups'] = []
+            lineup_columns = game_lineups.get(game['game_id'])
+            game['players'] = compute_stints(lineup_columns) if lineup_columns is not None else []
+            games_by_id[game['game_id']] = game
+        for lineup in lineups:
+            games_by_id[lineup['game_id']]['lineups'].append(lineup)
+
+        return jsonify({
+            "game_ids": batch_params['game_ids'],
+            "games": {str(game_id): game for game_id, game in games_by_id.items()},
+        }), 200
+
+    return game_bp
@@ -1,126 +1,526 @@
+from functools import partial
 from flask import Blueprint, jsonify, request
-from sqlalchemy import text
-
-def create_lineup_bp(db_session):
-    lineup_bp = Blueprint('lineup', __name__, url_prefix='/lineups')
-
-    # url should be /lineups/wide?page_size=50&last_game_id=1&last_team_id=1&last_lineup_num=1
-    @lineup_bp.route('/wide', methods=['GET'])
-    def get_wide_lineups():
-        # Get pagination parameters from query string
-        page_size = min(int(request.args.get('page_size', 50)), 100)  # Cap at 100 items per page
-        last_game_id = request.args.get('last_game_id', type=int)
-        last_team_id = request.args.get('last_team_id', type=int)
-        last_lineup_num = request.args.get('last_lineup_num', type=int)
-
-        # Get optional filter parameters
-        game_id = request.args.get('game_id', type=int)
-        player_id = request.args.get('player_id', type=int)
-
-        # Initialize parameters dictionary
-        params = {'page_size': page_size}
+from db.query_registry import query_registry
+from helpers.json_encoder import row_dicts
+from .validators import validate_export_format, validate_analytics_backend, validate_id_list, parse_id_list, validate_date_range, day_range
+from helpers.ndjson_stream import stream_ndjson
+from helpers.response_cache import ConditionalGet
+from helpers.result_cache import CachedResponses
+from helpers.stint_analytics import StintAnalytics, np
+from helpers.lineup_units import unit_hash_sql
+from helpers.court_time import DECISECONDS_PER_SECOND, from_bytes, seconds, shared_bitset
+
+# The queries below are shared by the paged JSON responses and the NDJSON
+# exports; an export drops the LIMIT and streams the whole result.
+PAGE_LIMIT = "LIMIT :page_size"
+
+# Time columns of the wide lineups and player stints, as returned by the JSON
+# endpoints and as plain seconds for the columnar exports
+WIDE_TIME_COLUMNS = """time_in,
+            time_out,"""
+WIDE_SECONDS_COLUMNS = """time_in::float8 AS time_in,
+            time_out::float8 AS time_out,"""
+STINT_CLOCK_COLUMNS = """TO_CHAR(
+            (s.stint_start_time_remaining * INTERVAL '1 second'),
+            'FMMI:SS'
+        ) AS stint_start_time,
+        TO_CHAR(
+            (s.stint_end_time_remaining * INTERVAL '1 second'),
+            'FMMI:SS'
+        ) AS stint_end_time"""
+STINT_SECONDS_COLUMNS = """s.stint_start_time_remaining::float8 AS stint_start_seconds,
+        s.stint_end_time_remaining::float8 AS stint_end_seconds"""
+
+def wide_lineups_query(where_clause, limit_clause=PAGE_LIMIT, time_columns=WIDE_TIME_COLUMNS):
+    """One row per lineup with its five players ordered by position."""
+    return f"""
+        WITH lineup_data AS (
+            SELECT
+                l.game_id,
+                l.team_id,
+                l.lineup_num,
+                l.period,
+                l.time_in,
+                l.time_out,
+                l.player_id,
+                p.first_name,
+                p.last_name,
+                r.position,
+                ROW_NUMBER() OVER (
+                    PARTITION BY l.game_id, l.team_id, l.lineup_num, l.period, l.time_in, l.time_out
+                    ORDER BY
+                        CASE r.position
+                            WHEN 'PG' THEN 1
+                            WHEN 'SG' THEN 2
+                            WHEN 'SF' THEN 3
+                            WHEN 'PF' THEN 4
+                            WHEN 'C'  THEN 5
+                            ELSE 6  -- For any other positions
+                        END,
+                        l.player_id  -- Secondary ordering to ensure uniqueness
+                ) AS player_num
+            FROM
+                lineup l
+            JOIN
+                players p ON l.player_id = p.player_id
+            JOIN
+                roster r ON l.player_id = r.player_id AND l.team_id = r.team_id
+            {where_clause}
+        )
+        SELECT
+            game_id,
+            team_id,
+            lineup_num,
+            period,
+            {time_columns}
+            -- Player 1
+            MAX(CASE WHEN player_num = 1 THEN player_id END) AS player1_id,
+            MAX(CASE WHEN player_num = 1 THEN first_name || ' ' || last_name END) AS player1_name,
+            MAX(CASE WHEN player_num = 1 THEN position END) AS player1_position,
+            -- Player 2
+            MAX(CASE WHEN player_num = 2 THEN player_id END) AS player2_id,
+            MAX(CASE WHEN player_num = 2 THEN first_name || ' ' || last_name END) AS player2_name,
+            MAX(CASE WHEN player_num = 2 THEN position END) AS player2_position,
+            -- Player 3
+            MAX(CASE WHEN player_num = 3 THEN player_id END) AS player3_id,
+            MAX(CASE WHEN player_num = 3 THEN first_name || ' ' || last_name END) AS player3_name,
+            MAX(CASE WHEN player_num = 3 THEN position END) AS player3_position,
+            -- Player 4
+            MAX(CASE WHEN player_num = 4 THEN player_id END) AS player4_id,
+            MAX(CASE WHEN player_num = 4 THEN first_name || ' ' || last_name END) AS player4_name,
+            MAX(CASE WHEN player_num = 4 THEN position END) AS player4_position,
+            -- Player 5
+            MAX(CASE WHEN player_num = 5 THEN player_id END) AS player5_id,
+            MAX(CASE WHEN player_num = 5 THEN first_name || ' ' || last_name END) AS player5_name,
+            MAX(CASE WHEN player_num = 5 THEN position END) AS player5_position
+        FROM
+            lineup_data
+        GROUP BY
+            game_id,
+            team_id,
+            lineup_num,
+            period,
+            time_in,
+            time_out
+        ORDER BY
+            game_id,
+            team_id,
+            lineup_num
+        {limit_clause}
+    """
+
+# The data_version names of the tables behind the wide lineups and player stints
+WIDE_LINEUPS_TABLES = ('lineup', 'players', 'roster')
+PLAYER_STINTS_TABLES = ('lineup', 'game_schedule', 'players', 'teams')
+
+# Keyset pagination and optional filters of /lineups/wide
+WIDE_LINEUPS_CONDITIONS = {
+    'cursor': "(l.game_id, l.team_id, l.lineup_num) > (:last_game_id, :last_team_id, :last_lineup_num)",
+    'game_id': "l.game_id = :game_id",
+    'player_id': "l.player_id = :player_id",
+}
+WIDE_LINEUPS_PAGE = query_registry.variants('wide_lineups', wide_lineups_query, WIDE_LINEUPS_CONDITIONS)
+WIDE_LINEUPS_EXPORT = query_registry.variants(
+    'wide_lineups_export', partial(wide_lineups_query, limit_clause=""), WIDE_LINEUPS_CONDITIONS
+)
+
+def wide_lineups_filters(page_size, last_game_id=None, last_team_id=None, last_lineup_num=None, game_id=None, player_id=None):
+    """
+    The conditions and params of a /lineups/wide page.
+
+    Returns:
+        tuple: The names of the WIDE_LINEUPS_CONDITIONS used, to look up the
+            WIDE_LINEUPS_PAGE or WIDE_LINEUPS_EXPORT variant, and their params.
+    """
+    # Initialize parameters dictionary
+    params = {'page_size': page_size}
+
+    # Pick the keyset pagination and optional filters the request uses
+    conditions = []
+    if all(v is not None for v in [last_game_id, last_team_id, last_lineup_num]):
+        conditions.append('cursor')
+        params.update({
+            'last_game_id': last_game_id,
+            'last_team_id': last_team_id,
+            'last_lineup_num': last_lineup_num
+        })
+
+    if game_id:
+        conditions.append('game_id')
+        params['game_id'] = game_id
+
+    if player_id:
+        conditions.append('player_id')
+        params['player_id'] = player_id
+
+    return conditions, params
+
+def wide_lineups_cursor(lineups):
+    """The next_cursor after a non-empty page of wide lineups."""
+    last_lineup = lineups[-1]
+    return {
+        "last_game_id": last_lineup["game_id"],
+        "last_team_id": last_lineup["team_id"],
+        "last_lineup_num": last_lineup["lineup_num"]
+    }
+
+PLAYER_STINTS_CURSOR_FIELDS = (
+    'last_game_date', 'last_game_id', 'last_team_name', 'last_player_name', 'last_period', 'last_stint_number',
+)
+
+def player_stints_query(where_clause, limit_clause=PAGE_LIMIT, time_columns=STINT_CLOCK_COLUMNS):
+    """
+    One row per player per period played, with the stint's start and end clock times.
+
+    player_stint holds the stints within each period; this numbers one stint per
+    period a player appears in, spanning all of their time in it. Games are read
+    in (game_date, game_id) order and each game's stints are aggregated in a
+    LATERAL subquery, so a page only aggregates the games it returns and a
+    (game_date, game_id) bound in where_clause limits the scan of game_schedule.
+    """
+    return f"""
+    SELECT
+        gs.game_date,
+        gs.game_id,
+        t.team_name AS team,
+        opp.team_name AS opponent,
+        p.first_name || ' ' || p.last_name AS player_name,
+        s.period,
+        s.stint_number,
+        {time_columns}
+    FROM
+        game_schedule gs
+    CROSS JOIN LATERAL (
+        SELECT
+            ps.team_id,
+            ps.player_id,
+            ps.period,
+            DENSE_RANK() OVER (
+                PARTITION BY ps.team_id, ps.player_id
+                ORDER BY ps.period
+            ) AS stint_number,
+            MAX(ps.stint_start) AS stint_start_time_remaining,
+            MIN(ps.stint_end) AS stint_end_time_remaining
+        FROM
+            player_stint ps
+        WHERE
+            ps.game_id = gs.game_id
+        GROUP BY
+            ps.team_id,
+            ps.player_id,
+            ps.period
+    ) s
+    JOIN
+        teams t ON s.team_id = t.team_id
+    JOIN
+        players p ON s.player_id = p.player_id
+    JOIN
+        teams opp ON opp.team_id = CASE
+            WHEN s.team_id = gs.home_id THEN gs.away_id
+            ELSE gs.home_id
+        END
+    {where_clause}
+    ORDER BY
+        gs.game_date,
+        gs.game_id,
+        t.team_name,
+        player_name,
+        s.period,
+        s.stint_number
+    {limit_clause}
+    """
+
+# A player-stints cursor as two game_schedule ranges: the rest of the cursor's
+# game, and the games after it
+PLAYER_STINTS_CURSOR_GAME = """WHERE gs.game_id = :last_game_id
+    AND (t.team_name, p.first_name || ' ' || p.last_name, s.period, s.stint_number) >
+    (:last_team_name, :last_player_name, :last_period, :last_stint_number)"""
+PLAYER_STINTS_LATER_GAMES = "WHERE (gs.game_date, gs.game_id) > (:last_game_date, :last_game_id)"
+
+def player_stints_cursor_query(limit_clause=PAGE_LIMIT, time_columns=STINT_CLOCK_COLUMNS):
+    """
+    player_stints_query for the rows after a cursor.
+
+    Comparing the whole (game_date, game_id, team, player, period, stint_number)
+    key in one filter hides how many rows remain from the planner, which then
+    aggregates and sorts every later game. Read separately, each part walks
+    games in order from an index range and stops after a page, so a deep page
+    costs about the same as the first.
+    """
+    return f"""
+    SELECT
+        *
+    FROM (
+        ({player_stints_query(PLAYER_STINTS_CURSOR_GAME, limit_clause, time_columns)})
+        UNION ALL
+        ({player_stints_query(PLAYER_STINTS_LATER_GAMES, limit_clause, time_columns)})
+    ) page
+    ORDER BY
+        game_date,
+        game_id,
+        team,
+        player_name,
+        period,
+        stint_number
+    {limit_clause}
+    """
+
+PLAYER_STINTS_PAGE = query_registry.register('player_stints', player_stints_query(""))
+PLAYER_STINTS_EXPORT = query_registry.register('player_stints_export', player_stints_query("", limit_clause=""))
+PLAYER_STINTS_CURSOR_PAGE = query_registry.register('player_stints_cursor', player_stints_cursor_query())
+PLAYER_STINTS_CURSOR_EXPORT = query_registry.register('player_stints_cursor_export', player_stints_cursor_query(limit_clause=""))
+
+def stint_averages_query(where_clause, limit_clause=PAGE_LIMIT):
+    """
+    Average stints per game and stint length per player.
+
+    player_stint_summary is maintained by the loader, so a page is an index scan on player_name.
+    """
+    return f"""
+        SELECT
+            player_name,
+            ROUND((total_stints::numeric / total_games), 2) AS avg_stints_per_game,
+            TO_CHAR(
+                MAKE_INTERVAL(secs => (total_stint_duration::numeric / total_stints)),
+                'MI:SS'
+            ) AS avg_stint_length
+        FROM
+            player_stint_summary
+        {where_clause}
+        ORDER BY
+            player_name
+        {limit_clause}
+    """
 
-        # Build the WHERE clause for keyset pagination and optional filters
-        where_clauses = []
-        if all(v is not None for v in [last_game_id, last_team_id, last_lineup_num]):
-            where_clauses.append("(l.game_id, l.team_id, l.lineup_num) > (:last_game_id, :last_team_id, :last_lineup_num)")
-            params.update({
-                'last_game_id': last_game_id,
-                'last_team_id': last_team_id,
-                'last_lineup_num': last_lineup_num
-            })
+def win_loss_stints_query(where_clause, limit_clause=PAGE_LIMIT):
+    """
+    Stint averages per player split by wins and losses.
 
-        if game_id:
-            where_clauses.append("l.game_id = :game_id")
-            params['game_id'] = game_id
-
-        if player_id:
-            where_clauses.append("l.player_id = :player_id")
-            params['player_id'] = player_id
-
-        where_clause = " AND ".join(where_clauses)
-        if where_clause:
-            where_clause = "WHERE " + where_clause
-
-        query = f"""
-            WITH lineup_data AS (
-                SELECT
-                    l.game_id,
-                    l.team_id,
-                    l.lineup_num,
-                    l.period,
-                    l.time_in,
-                    l.time_out,
-                    l.player_id,
-                    p.first_name,
-                    p.last_name,
-                    r.position,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY l.game_id, l.team_id, l.lineup_num, l.period, l.time_in, l.time_out
-                        ORDER BY
-                            CASE r.position
-                                WHEN 'PG' THEN 1
-                                WHEN 'SG' THEN 2
-                                WHEN 'SF' THEN 3
-                                WHEN 'PF' THEN 4
-                                WHEN 'C'  THEN 5
-                                ELSE 6  -- For any other positions
-                            END,
-                            l.player_id  -- Secondary ordering to ensure uniqueness
-                    ) AS player_num
-                FROM
-                    lineup l
-                JOIN
-                    players p ON l.player_id = p.player_id
-                JOIN
-                    roster r ON l.player_id = r.player_id AND l.team_id = r.team_id
-                {where_clause}
-            )
+    player_stint_summary is maintained by the loader, so a page is an index scan on player_name.
+    """
+    return f"""
+        SELECT
+            player_name,
+            -- All games
+            total_games,
+            ROUND(total_stints::numeric / NULLIF(total_games, 0), 2) AS avg_stints_per_game,
+            TO_CHAR(
+                MAKE_INTERVAL(secs => total_stint_duration::numeric / NULLIF(total_stints, 0)),
+                'MI:SS'
+            ) AS avg_stint_length,
+            -- Wins
+            total_games_wins,
+            ROUND(total_stints_wins::numeric / NULLIF(total_games_wins, 0), 2) AS avg_stints_per_game_wins,
+            TO_CHAR(
+                MAKE_INTERVAL(secs => total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0)),
+                'MI:SS'
+            ) AS avg_stint_length_wins,
+            -- Losses
+            total_games_losses,
+            ROUND(total_stints_losses::numeric / NULLIF(total_games_losses, 0), 2) AS avg_stints_per_game_losses,
+            TO_CHAR(
+                MAKE_INTERVAL(secs => total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0)),
+                'MI:SS'
+            ) AS avg_stint_length_losses,
+            -- Differences (Wins - Losses)
+            ROUND(
+                (total_stints_wins::numeric / NULLIF(total_games_wins, 0))
+                - (total_stints_losses::numeric / NULLIF(total_games_losses, 0)),
+                2
+            ) AS avg_stints_per_game_diff,
+            CASE
+                WHEN (total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0)) > (total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0))
+                THEN TO_CHAR(
+                    MAKE_INTERVAL(secs =>
+                        (total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0))
+                        - (total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0))
+                    ),
+                    'MI:SS'
+                )
+                ELSE '-' || TO_CHAR(
+                    MAKE_INTERVAL(secs =>
+                        (total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0))
+                        - (total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0))
+                    ),
+                    'MI:SS'
+                )
+            END AS avg_stint_length_diff
+        FROM
+            player_stint_summary
+        {where_clause}
+        ORDER BY
+            player_name
+        {limit_clause}
+    """
+
+# Keyset pagination of the stint average endpoints
+PLAYER_NAME_CURSOR = {'cursor': "player_name > :last_player_name"}
+STINT_AVERAGES_PAGE = query_registry.variants('stint_averages', stint_averages_query, PLAYER_NAME_CURSOR)
+STINT_AVERAGES_EXPORT = query_registry.variants(
+    'stint_averages_export', partial(stint_averages_query, limit_clause=""), PLAYER_NAME_CURSOR
+)
+WIN_LOSS_STINTS_PAGE = query_registry.variants('win_loss_stints', win_loss_stints_query, PLAYER_NAME_CURSOR)
+WIN_LOSS_STINTS_EXPORT = query_registry.variants(
+    'win_loss_stints_export', partial(win_loss_stints_query, limit_clause=""), PLAYER_NAME_CURSOR
+)
+
+# Names of a lineup_unit's players, in player_ids order
+UNIT_PLAYER_NAMES = """ARRAY(
+            SELECT p.first_name || ' ' || p.last_name
+            FROM unnest(u.player_ids) WITH ORDINALITY AS unit_player (player_id, position)
+            JOIN players p ON p.player_id = unit_player.player_id
+            ORDER BY unit_player.position
+        )"""
+
+UNIT_SIZE = 5
+
+def unit_minutes_query(where_clause):
+    """A unit's stints and seconds per game, from lineup_unit."""
+    return f"""
+        SELECT
+            u.game_id,
+            gs.game_date,
+            u.team_id,
+            COUNT(*) AS stints,
+            SUM(u.time_in - u.time_out)::float8 AS seconds,
+            ROUND(SUM(u.time_in - u.time_out) / 60, 2)::float8 AS minutes
+        FROM
+            lineup_unit u
+        JOIN
+            game_schedule gs ON u.game_id = gs.game_id
+        {where_clause}
+        GROUP BY
+            u.game_id,
+            gs.game_date,
+            u.team_id
+        ORDER BY
+            gs.game_date,
+            u.game_id,
+            u.team_id
+    """
+
+def unit_search_query(where_clause):
+    """The units with the most seconds among those matching where_clause, with their players' names."""
+    return f"""
+        WITH units AS (
             SELECT
-                game_id,
                 team_id,
-                lineup_num,
-                period,
-                time_in,
-                time_out,
-                -- Player 1
-                MAX(CASE WHEN player_num = 1 THEN player_id END) AS player1_id,
-                MAX(CASE WHEN player_num = 1 THEN first_name || ' ' || last_name END) AS player1_name,
-                MAX(CASE WHEN player_num = 1 THEN position END) AS player1_position,
-                -- Player 2
-                MAX(CASE WHEN player_num = 2 THEN player_id END) AS player2_id,
-                MAX(CASE WHEN player_num = 2 THEN first_name || ' ' || last_name END) AS player2_name,
-                MAX(CASE WHEN player_num = 2 THEN position END) AS player2_position,
-                -- Player 3
-                MAX(CASE WHEN player_num = 3 THEN player_id END) AS player3_id,
-                MAX(CASE WHEN player_num = 3 THEN first_name || ' ' || last_name END) AS player3_name,
-                MAX(CASE WHEN player_num = 3 THEN position END) AS player3_position,
-                -- Player 4
-                MAX(CASE WHEN player_num = 4 THEN player_id END) AS player4_id,
-                MAX(CASE WHEN player_num = 4 THEN first_name || ' ' || last_name END) AS player4_name,
-                MAX(CASE WHEN player_num = 4 THEN position END) AS player4_position,
-                -- Player 5
-                MAX(CASE WHEN player_num = 5 THEN player_id END) AS player5_id,
-                MAX(CASE WHEN player_num = 5 THEN first_name || ' ' || last_name END) AS player5_name,
-                MAX(CASE WHEN player_num = 5 THEN position END) AS player5_position
+                player_ids,
+                COUNT(DISTINCT game_id) AS games,
+                COUNT(*) AS stints,
+                SUM(time_in - time_out) AS seconds
             FROM
-                lineup_data
+                lineup_unit
+            {where_clause}
             GROUP BY
-                game_id,
                 team_id,
-                lineup_num,
-                period,
-                time_in,
-                time_out
+                player_ids
             ORDER BY
-                game_id,
+                seconds DESC,
                 team_id,
-                lineup_num
+                player_ids
             LIMIT :page_size
-        """
+        )
+        SELECT
+            u.team_id,
+            u.player_ids,
+            {UNIT_PLAYER_NAMES} AS player_names,
+            u.games,
+            u.stints,
+            u.seconds::float8 AS seconds,
+            ROUND(u.seconds / 60, 2)::float8 AS minutes
+        FROM
+            units u
+        ORDER BY
+            u.seconds DESC,
+            u.team_id,
+            u.player_ids
+    """
+
+def court_time_query(where_clause):
+    """The on-court bitsets of the players and games matching where_clause, in game order."""
+    return f"""
+        SELECT
+            c.game_id,
+            gs.game_date,
+            c.on_court
+        FROM
+            player_court_time c
+        JOIN
+            game_schedule gs ON c.game_id = gs.game_id
+        {where_clause}
+        ORDER BY
+            gs.game_date,
+            c.game_id
+    """
+
+# The unit is found by its hash, then matched on the sorted player_ids
+UNIT_MINUTES = query_registry.variants('unit_minutes', unit_minutes_query, {'team_id': "u.team_id = :team_id"}, required=[
+    f"u.unit_hash = {unit_hash_sql('CAST(:player_ids AS BIGINT[])')}",
+    "u.player_ids = CAST(:player_ids AS BIGINT[])",
+])
+UNIT_SEARCH = query_registry.variants('unit_search', unit_search_query, {'team_id': "team_id = :team_id"}, required=[
+    "player_ids @> CAST(:player_ids AS BIGINT[])",
+])
+COURT_TIME = query_registry.variants('court_time', court_time_query, {
+    'dates': "gs.game_date >= :start AND gs.game_date < :end",
+}, required=["c.player_id = ANY(:player_ids)"])
+PLAYER_NAMES = query_registry.register('player_names', """
+    SELECT player_id, first_name || ' ' || last_name AS player_name
+    FROM players
+    WHERE player_id = ANY(:player_ids)
+""")
+
+def create_lineup_bp(db_session, data_versions, result_cache=None):
+    lineup_bp = Blueprint('lineup', __name__, url_prefix='/lineups')
 
-        result = db_session.execute(text(query), params)
-        lineups = [dict(row) for row in result]
+    # Responses only change when the loader writes to the tables a route reads
+    conditional = ConditionalGet(data_versions)
+    # The stint aggregates are shared between workers through the result cache
+    cached = CachedResponses(result_cache, data_versions)
+
+    # In-memory alternative to the SQL behind stint-averages and win-loss-stints, chosen with ?backend=numpy
+    stint_analytics = StintAnalytics(db_session, data_versions)
+
+    def analytics_backend():
+        """The backend requested for the stint average endpoints, or an error response."""
+        backend = request.args.get('backend')
+        is_valid, error = validate_analytics_backend(backend)
+        if not is_valid:
+            return None, (jsonify(error), 400)
+        if backend == 'numpy' and request.args.get('format') == 'ndjson':
+            # Exports always stream from SQL; say so rather than ignore the backend
+            return None, (jsonify({"error": "The ndjson export is only served by the sql backend."}), 400)
+        if backend == 'numpy' and np is None:
+            return None, (jsonify({"error": "The numpy backend needs numpy installed on the server."}), 501)
+        return backend or 'sql', None
+
+    # url should be /lineups/wide?page_size=50&last_game_id=1&last_team_id=1&last_lineup_num=1
+    # or /lineups/wide?format=ndjson&stream=1 to export every lineup
+    @lineup_bp.route('/wide', methods=['GET'])
+    @conditional(*WIDE_LINEUPS_TABLES)
+    def get_wide_lineups():
+        is_valid, error = validate_export_format(request.args.get('format'), request.args.get('stream'))
+        if not is_valid:
+            return jsonify(error), 400
+
+        # Get pagination parameters from query string
+        page_size = min(int(request.args.get('page_size', 50)), 100)  # Cap at 100 items per page
+        conditions, params = wide_lineups_filters(
+            page_size,
+            last_game_id=request.args.get('last_game_id', type=int),
+            last_team_id=request.args.get('last_team_id', type=int),
+            last_lineup_num=request.args.get('last_lineup_num', type=int),
+            game_id=request.args.get('game_id', type=int),
+            player_id=request.args.get('player_id', type=int),
+        )
+
+        if request.args.get('format') == 'ndjson':
+            # Export every row after the cursor instead of one page
+            return stream_ndjson(db_session, WIDE_LINEUPS_EXPORT.get(conditions).sql, params)
+
+        result = WIDE_LINEUPS_PAGE.get(conditions).execute(db_session, params)
+        lineups = row_dicts(result)
 
         # Prepare the response
         response = {
@@ -132,21 +532,22 @@ def create_lineup_bp(db_session):
 
         # Add next page cursor if there are more results
         if lineups:
-            last_lineup = lineups[-1]
-            response["pagination"]["next_cursor"] = {
-                "last_game_id": last_lineup["game_id"],
-                "last_team_id": last_lineup["team_id"],
-                "last_lineup_num": last_lineup["lineup_num"]
-            }
+            response["pagination"]["next_cursor"] = wide_lineups_cursor(lineups)
 
         return jsonify(response), 200
 
-    # url should be /lineups/player-stints?page_size=50&last_game_date=2024-06-01&last_team_name=
+    # url should be /lineups/player-stints?page_size=50&last_game_date=2024-06-01&last_game_id=1&last_team_name=
     @lineup_bp.route('/player-stints', methods=['GET'])
+    @conditional(*PLAYER_STINTS_TABLES)
     def get_player_stints():
+        is_valid, error = validate_export_format(request.args.get('format'), request.args.get('stream'))
+        if not is_valid:
+            return jsonify(error), 400
+
         # Get pagination parameters from query string
         page_size = min(int(request.args.get('page_size', 50)), 100)  # Cap at 100 items per page
         last_game_date = request.args.get('last_game_date')
+        last_game_id = request.args.get('last_game_id', type=int)
         last_team_name = request.args.get('last_team_name')
         last_player_name = request.args.get('last_player_name')
         last_period = request.args.get('last_period', type=int)
@@ -155,130 +556,29 @@ def create_lineup_bp(db_session):
         # Initialize parameters dictionary
         params = {'page_size': page_size}
 
-        # Build the WHERE clause for keyset pagination
-        where_clause = ""
-        if all(v is not None for v in [last_game_date, last_team_name, last_player_name, last_period, last_stint_number]):
-            where_clause = """
-            WHERE (gs.game_date, t.team_name, p.first_name || ' ' || p.last_name, s.period, s.stint_number) > 
-            (:last_game_date, :last_team_name, :last_player_name, :last_period, :last_stint_number)
-            """
+        # Pages after a cursor read the games from the cursor on, see player_stints_cursor_query
+        page_query, export_query = PLAYER_STINTS_PAGE, PLAYER_STINTS_EXPORT
+        cursor = [last_game_date, last_game_id, last_team_name, last_player_name, last_period, last_stint_number]
+        if any(v is None for v in cursor) and any(field in request.args for field in PLAYER_STINTS_CURSOR_FIELDS):
+            # e.g. a cursor from before last_game_id was added, which would otherwise restart at page 1
+            return jsonify({"error": f"Incomplete cursor. Please pass every field of next_cursor: {', '.join(PLAYER_STINTS_CURSOR_FIELDS)}."}), 400
+        if all(v is not None for v in cursor):
+            page_query, export_query = PLAYER_STINTS_CURSOR_PAGE, PLAYER_STINTS_CURSOR_EXPORT
             params.update({
                 'last_game_date': last_game_date,
+                'last_game_id': last_game_id,
                 'last_team_name': last_team_name,
                 'last_player_name': last_player_name,
                 'last_period': last_period,
                 'last_stint_number': last_stint_number
             })
 
-        query = f"""
-        WITH player_lineups AS (
-            SELECT
-                l.game_id,
-                l.team_id,
-                l.period,
-                l.player_id,
-                l.time_in,
-                l.time_out
-            FROM
-                lineup l
-        ),
-        player_stints AS (
-            SELECT
-                pl.*,
-                LAG(pl.time_out) OVER (
-                    PARTITION BY pl.game_id, pl.team_id, pl.player_id
-                    ORDER BY pl.period, pl.time_in
-                ) AS prev_time_out,
-                LAG(pl.period) OVER (
-                    PARTITION BY pl.game_id, pl.team_id, pl.player_id
-                    ORDER BY pl.period, pl.time_in
-                ) AS prev_period,
-                CASE
-                    WHEN LAG(pl.time_out) OVER (
-                        PARTITION BY pl.game_id, pl.team_id, pl.player_id
-                        ORDER BY pl.period, pl.time_in
-                    ) IS NULL
-                    OR pl.time_in < LAG(pl.time_out) OVER (
-                        PARTITION BY pl.game_id, pl.team_id, pl.player_id
-                        ORDER BY pl.period, pl.time_in
-                    )
-                    OR pl.period > LAG(pl.period) OVER (
-                        PARTITION BY pl.game_id, pl.team_id, pl.player_id
-                        ORDER BY pl.period, pl.time_in
-                    ) THEN 1
-                    ELSE 0
-                END AS new_stint_flag
-            FROM
-                player_lineups pl
-        ),
-        player_stints_with_group AS (
-            SELECT
-                ps.*,
-                SUM(ps.new_stint_flag) OVER (
-                    PARTITION BY ps.game_id, ps.team_id, ps.player_id
-                    ORDER BY ps.period, ps.time_in
-                ) AS stint_number
-            FROM
-                player_stints ps
-        ),
-        stints AS (
-            SELECT
-                pswg.game_id,
-                pswg.team_id,
-                pswg.player_id,
-                pswg.period,
-                pswg.stint_number,
-                MAX(pswg.time_in) AS stint_start_time_remaining,
-                MIN(pswg.time_out) AS stint_end_time_remaining
-            FROM
-                player_stints_with_group pswg
-            GROUP BY
-                pswg.game_id,
-                pswg.team_id,
-                pswg.player_id,
-                pswg.period,
-                pswg.stint_number
-        )
-        SELECT
-            gs.game_date,
-            t.team_name AS team,
-            opp.team_name AS opponent,
-            p.first_name || ' ' || p.last_name AS player_name,
-            s.period,
-            s.stint_number,
-            TO_CHAR(
-                (s.stint_start_time_remaining * INTERVAL '1 second'),
-                'FMMI:SS'
-            ) AS stint_start_time,
-            TO_CHAR(
-                (s.stint_end_time_remaining * INTERVAL '1 second'),
-                'FMMI:SS'
-            ) AS stint_end_time
-        FROM
-            stints s
-        JOIN
-            game_schedule gs ON s.game_id = gs.game_id
-        JOIN
-            teams t ON s.team_id = t.team_id
-        JOIN
-            players p ON s.player_id = p.player_id
-        JOIN
-            teams opp ON opp.team_id = CASE
-                WHEN s.team_id = gs.home_id THEN gs.away_id
-                ELSE gs.home_id
-            END
-        {where_clause}
-        ORDER BY
-            gs.game_date,
-            t.team_name,
-            player_name,
-            s.period,
-            s.stint_number
-        LIMIT :page_size
-        """
+        if request.args.get('format') == 'ndjson':
+            # Export every row after the cursor instead of one page
+            return stream_ndjson(db_session, export_query.sql, params)
 
-        result = db_session.execute(text(query), params)
-        stints = [dict(row) for row in result]
+        result = page_query.execute(db_session, params)
+        stints = row_dicts(result)
 
         # Prepare the response
         response = {
@@ -293,6 +593,7 @@ def create_lineup_bp(db_session):
             last_stint = stints[-1]
             response["pagination"]["next_cursor"] = {
                 "last_game_date": last_stint["game_date"].isoformat(),
+                "last_game_id": last_stint["game_id"],
                 "last_team_name": last_stint["team"],
                 "last_player_name": last_stint["player_name"],
                 "last_period": last_stint["period"],
@@ -301,9 +602,18 @@ def create_lineup_bp(db_session):
 
         return jsonify(response), 200
 
-    # url should be /lineups/stint-averages?page_size=50&last_player_name=
+    # url should be /lineups/stint-averages?page_size=50&last_player_name=&backend=sql|numpy
     @lineup_bp.route('/stint-averages', methods=['GET'])
+    @conditional('lineup', 'game_schedule', 'players')
+    @cached('lineup', 'game_schedule', 'players')
     def stint_averages():
+        is_valid, error = validate_export_format(request.args.get('format'), request.args.get('stream'))
+        if not is_valid:
+            return jsonify(error), 400
+        backend, error_response = analytics_backend()
+        if error_response:
+            return error_response
+
         # Get pagination parameters from query string
         page_size = min(int(request.args.get('page_size', 50)), 100)  # Cap at 100 items per page
         last_player_name = request.args.get('last_player_name')
@@ -311,109 +621,21 @@ def create_lineup_bp(db_session):
         # Initialize parameters dictionary
         params = {'page_size': page_size}
 
-        # Build the WHERE clause for keyset pagination
-        where_clause = ""
+        # Keyset pagination
+        conditions = []
         if last_player_name is not None:
-            where_clause = "WHERE player_name > :last_player_name"
+            conditions.append('cursor')
             params['last_player_name'] = last_player_name
 
-        query = f"""
-            WITH player_lineups AS (
-                SELECT
-                    l.game_id,
-                    l.team_id,
-                    l.period,
-                    l.player_id,
-                    l.time_in,
-                    l.time_out
-                FROM
-                    lineup l
-            ),
-            player_stints AS (
-                SELECT
-                    pl.*,
-                    LAG(pl.time_out) OVER (
-                        PARTITION BY pl.game_id, pl.player_id, pl.period
-                        ORDER BY pl.time_in DESC
-                    ) AS prev_time_out,
-                    CASE
-                        WHEN LAG(pl.time_out) OVER (
-                            PARTITION BY pl.game_id, pl.player_id, pl.period
-                            ORDER BY pl.time_in DESC
-                        ) IS NULL
-                        OR pl.time_in < LAG(pl.time_out) OVER (
-                            PARTITION BY pl.game_id, pl.player_id, pl.period
-                            ORDER BY pl.time_in DESC
-                        ) THEN 1
-                        ELSE 0
-                    END AS new_stint_flag
-                FROM
-                    player_lineups pl
-            ),
-            player_stints_with_group AS (
-                SELECT
-                    ps.*,
-                    SUM(ps.new_stint_flag) OVER (
-                        PARTITION BY ps.game_id, ps.player_id, ps.period
-                        ORDER BY ps.time_in DESC
-                    ) AS stint_number
-                FROM
-                    player_stints ps
-            ),
-            stints AS (
-                SELECT
-                    pswg.game_id,
-                    pswg.player_id,
-                    pswg.stint_number,
-                    MAX(pswg.time_in) AS stint_start_time_remaining,
-                    MIN(pswg.time_out) AS stint_end_time_remaining
-                FROM
-                    player_stints_with_group pswg
-                GROUP BY
-                    pswg.game_id,
-                    pswg.player_id,
-                    pswg.stint_number
-            ),
-            stint_durations AS (
-                SELECT
-                    s.*,
-                    (s.stint_start_time_remaining - s.stint_end_time_remaining) AS stint_duration
-                FROM
-                    stints s
-            ),
-            player_stats AS (
-                SELECT
-                    p.player_id,
-                    p.first_name || ' ' || p.last_name AS player_name,
-                    COUNT(DISTINCT sd.game_id) AS total_games,
-                    COUNT(*) AS total_stints,
-                    SUM(sd.stint_duration) AS total_stint_duration
-                FROM
-                    stint_durations sd
-                JOIN
-                    players p ON sd.player_id = p.player_id
-                GROUP BY
-                    p.player_id,
-                    p.first_name,
-                    p.last_name
-            )
-            SELECT
-                player_name,
-                ROUND((total_stints::numeric / total_games), 2) AS avg_stints_per_game,
-                TO_CHAR(
-                    MAKE_INTERVAL(secs => (total_stint_duration::numeric / total_stints)),
-                    'MI:SS'
-                ) AS avg_stint_length
-            FROM
-                player_stats
-            {where_clause}
-            ORDER BY
-                player_name
-            LIMIT :page_size
-        """
+        if request.args.get('format') == 'ndjson':
+            # Export every row after the cursor instead of one page
+            return stream_ndjson(db_session, STINT_AVERAGES_EXPORT.get(conditions).sql, params)
 
-        result = db_session.execute(text(query), params)
-        data = [dict(row) for row in result]
+        if backend == 'numpy':
+            data = stint_analytics.stint_averages(last_player_name, page_size)
+        else:
+            result = STINT_AVERAGES_PAGE.get(conditions).execute(db_session, params)
+            data = row_dicts(result)
 
         # Prepare the response
         response = {
@@ -432,9 +654,18 @@ def create_lineup_bp(db_session):
 
         return jsonify(response), 200
 
-    # url should be /lineups/win-loss-stints?page_size=50&last_player_name=
+    # url should be /lineups/win-loss-stints?page_size=50&last_player_name=&backend=sql|numpy
     @lineup_bp.route('/win-loss-stints', methods=['GET'])
+    @conditional('lineup', 'game_schedule', 'players')
+    @cached('lineup', 'game_schedule', 'players')
     def win_loss_stints():
+        is_valid, error = validate_export_format(request.args.get('format'), request.args.get('stream'))
+        if not is_valid:
+            return jsonify(error), 400
+        backend, error_response = analytics_backend()
+        if error_response:
+            return error_response
+
         # Get pagination parameters from query string
         page_size = min(int(request.args.get('page_size', 50)), 100)  # Cap at 100 items per page
         last_player_name = request.args.get('last_player_name')
@@ -442,170 +673,21 @@ def create_lineup_bp(db_session):
         # Initialize parameters dictionary
         params = {'page_size': page_size}
 
-        # Build the WHERE clause for keyset pagination
-        where_clause = ""
+        # Keyset pagination
+        conditions = []
         if last_player_name is not None:
-            where_clause = "WHERE player_name > :last_player_name"
+            conditions.append('cursor')
             params['last_player_name'] = last_player_name
 
-        query = f"""
-            WITH player_lineups AS (
-                SELECT
-                    l.game_id,
-                    l.team_id,
-                    l.period,
-                    l.player_id,
-                    l.time_in,
-                    l.time_out
-                FROM
-                    lineup l
-            ),
-            player_stints AS (
-                SELECT
-                    pl.*,
-                    LAG(pl.time_out) OVER (
-                        PARTITION BY pl.game_id, pl.player_id, pl.period
-                        ORDER BY pl.time_in DESC
-                    ) AS prev_time_out,
-                    CASE
-                        WHEN LAG(pl.time_out) OVER (
-                            PARTITION BY pl.game_id, pl.player_id, pl.period
-                            ORDER BY pl.time_in DESC
-                        ) IS NULL
-                        OR pl.time_in < LAG(pl.time_out) OVER (
-                            PARTITION BY pl.game_id, pl.player_id, pl.period
-                            ORDER BY pl.time_in DESC
-                        ) THEN 1
-                        ELSE 0
-                    END AS new_stint_flag
-                FROM
-                    player_lineups pl
-            ),
-            player_stints_with_group AS (
-                SELECT
-                    ps.*,
-                    SUM(ps.new_stint_flag) OVER (
-                        PARTITION BY ps.game_id, ps.player_id, ps.period
-                        ORDER BY ps.time_in DESC
-                    ) AS stint_number
-                FROM
-                    player_stints ps
-            ),
-            stints AS (
-                SELECT
-                    pswg.game_id,
-                    pswg.team_id,
-                    pswg.player_id,
-                    pswg.stint_number,
-                    MAX(pswg.time_in) AS stint_start_time_remaining,
-                    MIN(pswg.time_out) AS stint_end_time_remaining
-                FROM
-                    player_stints_with_group pswg
-                GROUP BY
-                    pswg.game_id,
-                    pswg.team_id,
-                    pswg.player_id,
-                    pswg.stint_number
-            ),
-            stint_durations AS (
-                SELECT
-                    s.*,
-                    (s.stint_start_time_remaining - s.stint_end_time_remaining) AS stint_duration,
-                    gs.home_id,
-                    gs.away_id,
-                    gs.home_score,
-                    gs.away_score,
-                    CASE
-                        WHEN (s.team_id = gs.home_id AND gs.home_score > gs.away_score)
-                        OR (s.team_id = gs.away_id AND gs.away_score > gs.home_score) THEN 'Win'
-                        ELSE 'Loss'
-                    END AS result
-                FROM
-                    stints s
-                JOIN
-                    game_schedule gs ON s.game_id = gs.game_id
-            ),
-            player_stats AS (
-                SELECT
-                    p.player_id,
-                    p.first_name || ' ' || p.last_name AS player_name,
-                    -- Total stats
-                    COUNT(DISTINCT sd.game_id) AS total_games,
-                    COUNT(*) AS total_stints,
-                    SUM(sd.stint_duration) AS total_stint_duration,
-                    -- Wins stats
-                    COUNT(DISTINCT CASE WHEN sd.result = 'Win' THEN sd.game_id END) AS total_games_wins,
-                    COUNT(CASE WHEN sd.result = 'Win' THEN 1 END) AS total_stints_wins,
-                    SUM(CASE WHEN sd.result = 'Win' THEN sd.stint_duration ELSE 0 END) AS total_stint_duration_wins,
-                    -- Losses stats
-                    COUNT(DISTINCT CASE WHEN sd.result = 'Loss' THEN sd.game_id END) AS total_games_losses,
-                    COUNT(CASE WHEN sd.result = 'Loss' THEN 1 END) AS total_stints_losses,
-                    SUM(CASE WHEN sd.result = 'Loss' THEN sd.stint_duration ELSE 0 END) AS total_stint_duration_losses
-                FROM
-                    stint_durations sd
-                JOIN
-                    players p ON sd.player_id = p.player_id
-                GROUP BY
-                    p.player_id,
-                    p.first_name,
-                    p.last_name
-            )
-            SELECT
-                player_name,
-                -- All games
-                total_games,
-                ROUND(total_stints::numeric / NULLIF(total_games, 0), 2) AS avg_stints_per_game,
-                TO_CHAR(
-                    MAKE_INTERVAL(secs => total_stint_duration::numeric / NULLIF(total_stints, 0)),
-                    'MI:SS'
-                ) AS avg_stint_length,
-                -- Wins
-                total_games_wins,
-                ROUND(total_stints_wins::numeric / NULLIF(total_games_wins, 0), 2) AS avg_stints_per_game_wins,
-                TO_CHAR(
-                    MAKE_INTERVAL(secs => total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0)),
-                    'MI:SS'
-                ) AS avg_stint_length_wins,
-                -- Losses
-                total_games_losses,
-                ROUND(total_stints_losses::numeric / NULLIF(total_games_losses, 0), 2) AS avg_stints_per_game_losses,
-                TO_CHAR(
-                    MAKE_INTERVAL(secs => total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0)),
-                    'MI:SS'
-                ) AS avg_stint_length_losses,
-                -- Differences (Wins - Losses)
-                ROUND(
-                    (total_stints_wins::numeric / NULLIF(total_games_wins, 0))
-                    - (total_stints_losses::numeric / NULLIF(total_games_losses, 0)),
-                    2
-                ) AS avg_stints_per_game_diff,
-                CASE
-                    WHEN (total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0)) > (total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0))
-                    THEN TO_CHAR(
-                        MAKE_INTERVAL(secs =>
-                            (total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0))
-                            - (total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0))
-                        ),
-                        'MI:SS'
-                    )
-                    ELSE '-' || TO_CHAR(
-                        MAKE_INTERVAL(secs =>
-                            (total_stint_duration_losses::numeric / NULLIF(total_stints_losses, 0))
-                            - (total_stint_duration_wins::numeric / NULLIF(total_stints_wins, 0))
-                        ),
-                        'MI:SS'
-                    )
-                END AS avg_stint_length_diff
-            FROM
-                player_stats
-            {where_clause}
-            ORDER BY
-                player_name
-            LIMIT :page_size
-        """
+        if request.args.get('format') == 'ndjson':
+            # Export every row after the cursor instead of one page
+            return stream_ndjson(db_session, WIN_LOSS_STINTS_EXPORT.get(conditions).sql, params)
 
-        result = db_session.execute(text(query), params)
-        data = [dict(row) for row in result]
+        if backend == 'numpy':
+            data = stint_analytics.win_loss_stints(last_player_name, page_size)
+        else:
+            result = WIN_LOSS_STINTS_PAGE.get(conditions).execute(db_session, params)
+            data = row_dicts(result)
 
         # Prepare the response
         response = {
@@ -624,4 +706,141 @@ def create_lineup_bp(db_session):
 
         return jsonify(response), 200
 
+    # url should be /lineups/units/minutes?player_ids=1,2,3,4,5 or /lineups/units/minutes?player_ids=1,2,3,4,5&team_id=1610612746
+    @lineup_bp.route('/units/minutes', methods=['GET'])
+    @conditional('lineup', 'game_schedule', 'players')
+    def get_unit_minutes():
+        """
+        Retrieve the minutes a five-man unit played together, per game.
+
+        The unit is looked up in lineup_unit by its hash, then matched on the
+        sorted player_ids, so no lineup rows are pivoted.
+
+        Returns:
+            JSON: The unit's player_ids and player_names, its total games, stints,
+                  seconds and minutes, and one entry per game with the game_id,
+                  game_date, team_id, stints, seconds and minutes.
+        """
+        player_ids = request.args.get('player_ids')
+        is_valid, error = validate_id_list(player_ids, 'player_ids', UNIT_SIZE, UNIT_SIZE)
+        if not is_valid:
+            return jsonify(error), 400
+
+        params = {'player_ids': parse_id_list(player_ids)}
+        conditions = []
+        team_id = request.args.get('team_id', type=int)
+        if team_id is not None:
+            conditions.append('team_id')
+            params['team_id'] = team_id
+
+        games = row_dicts(UNIT_MINUTES.get(conditions).execute(db_session, params))
+        player_names = dict(PLAYER_NAMES.execute(db_session, params).fetchall())
+
+        seconds = sum(game['seconds'] for game in games)
+        return jsonify({
+            "player_ids": params['player_ids'],
+            "player_names": [player_names.get(player_id) for player_id in params['player_ids']],
+            "total_games": len({game['game_id'] for game in games}),
+            "total_stints": sum(game['stints'] for game in games),
+            "total_seconds": seconds,
+            "total_minutes": round(seconds / 60, 2),
+            "games": games,
+        }), 200
+
+    # url should be /lineups/units/search?player_ids=1,2&page_size=25 or /lineups/units/search?player_ids=1&team_id=1610612746
+    @lineup_bp.route('/units/search', methods=['GET'])
+    @conditional('lineup', 'players')
+    def search_units():
+        """
+        Find the five-man units that include every given player.
+
+        Units are matched on lineup_unit.player_ids with the array containment
+        operator, which the GIN index on player_ids answers.
+
+        Returns:
+            JSON: Up to page_size units (capped at 100), most minutes first, each
+                  with its team_id, player_ids, player_names, games, stints,
+                  seconds and minutes.
+        """
+        player_ids = request.args.get('player_ids')
+        is_valid, error = validate_id_list(player_ids, 'player_ids', 1, UNIT_SIZE)
+        if not is_valid:
+            return jsonify(error), 400
+
+        page_size = min(int(request.args.get('page_size', 25)), 100)  # Cap at 100 items per page
+        params = {'player_ids': parse_id_list(player_ids), 'page_size': page_size}
+        conditions = []
+        team_id = request.args.get('team_id', type=int)
+        if team_id is not None:
+            conditions.append('team_id')
+            params['team_id'] = team_id
+
+        result = UNIT_SEARCH.get(conditions).execute(db_session, params)
+
+        return jsonify({
+            "player_ids": params['player_ids'],
+            "units": row_dicts(result),
+        }), 200
+
+    # url should be /lineups/shared-minutes?player_ids=1,2 or /lineups/shared-minutes?player_ids=1,2,3&start_date=2024-01-01&end_date=2024-01-31
+    @lineup_bp.route('/shared-minutes', methods=['GET'])
+    @conditional('lineup', 'game_schedule', 'players')
+    def get_shared_minutes():
+        """
+        Retrieve the minutes two to five players were on court together.
+
+        Each player's on-court time per game is read from player_court_time as
+        a bitset and the game's shared time is the popcount of their AND.
+
+        Returns:
+            JSON: The player_ids and player_names, the games they all played in,
+                  their total shared seconds and minutes, and one entry per game
+                  with the game_id, game_date, seconds and minutes.
+        """
+        player_ids = request.args.get('player_ids')
+        is_valid, error = validate_id_list(player_ids, 'player_ids', 2, UNIT_SIZE)
+        if not is_valid:
+            return jsonify(error), 400
+
+        params = {'player_ids': parse_id_list(player_ids)}
+        conditions = []
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        if start_date is not None or end_date is not None:
+            is_valid, error = validate_date_range(start_date or '', end_date or '')
+            if not is_valid:
+                return jsonify(error), 400
+            params['start'], params['end'] = day_range(start_date, end_date)
+            conditions.append('dates')
+
+        result = COURT_TIME.get(conditions).execute(db_session, params)
+
+        # Games every player appeared in, in date order
+        games = {}
+        for game_id, game_date, on_court in result:
+            game = games.setdefault(game_id, {'game_id': game_id, 'game_date': game_date, 'bitsets': []})
+            game['bitsets'].append(from_bytes(on_court))
+        shared_games = []
+        total_deciseconds = 0
+        for game in games.values():
+            if len(game['bitsets']) < len(params['player_ids']):
+                continue
+            shared = shared_bitset(game.pop('bitsets'))
+            total_deciseconds += shared.bit_count()
+            game['seconds'] = seconds(shared)
+            game['minutes'] = round(game['seconds'] / 60, 2)
+            shared_games.append(game)
+
+        player_names = dict(PLAYER_NAMES.execute(db_session, params).fetchall())
+
+        total_seconds = total_deciseconds / DECISECONDS_PER_SECOND
+        return jsonify({
+            "player_ids": params['player_ids'],
+            "player_names": [player_names.get(player_id) for player_id in params['player_ids']],
+            "total_games": len(shared_games),
+            "total_seconds": total_seconds,
+            "total_minutes": round(total_seconds / 60, 2),
+            "games": shared_games,
+        }), 200
+
     return lineup_bp
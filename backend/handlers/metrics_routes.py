@@ -0,0 +1,62 @@
+from flask import Blueprint, jsonify, request
+from db.session import pool_status
+from helpers.profiling import request_metrics, slow_queries, prometheus_text
+
+def create_metrics_bp(engine, result_cache=None):
+    metrics_bp = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+    # url should be /metrics or /metrics?format=prometheus
+    @metrics_bp.route('', methods=['GET'])
+    def get_request_metrics():
+        """
+        Return per-route histograms of request latency, SQL time, serialization
+        time and rows, recorded by helpers/profiling.py since the server started.
+
+        Returns:
+            JSON: Requests, 5xx errors and queries per route, and a histogram of
+                  each measure with cumulative bucket counts by upper bound (le).
+                  With format=prometheus, the same in the Prometheus text format.
+        """
+        snapshot = request_metrics.snapshot()
+        if request.args.get('format') == 'prometheus':
+            return prometheus_text(snapshot), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+        return jsonify({"routes": snapshot}), 200
+
+    @metrics_bp.route('/slow-queries', methods=['GET'])
+    def get_slow_queries():
+        """
+        Return the most recent queries slower than SLOW_QUERY_MS, newest first.
+
+        Returns:
+            JSON: Each query's route, time, duration, rows and statement, and its
+                  EXPLAIN (ANALYZE, BUFFERS) plan when SLOW_QUERY_EXPLAIN is on.
+        """
+        return jsonify({"slow_queries": slow_queries.snapshot()}), 200
+
+    @metrics_bp.route('/pool', methods=['GET'])
+    def get_pool_metrics():
+        """
+        Return connection pool occupancy and checkout wait metrics.
+
+        Returns:
+            JSON: Pool size, checked in/out and overflow connections, and the
+                  number of checkouts, timeouts and their wait times in seconds.
+        """
+        return jsonify(pool_status(engine)), 200
+
+    @metrics_bp.route('/result-cache', methods=['GET'])
+    def get_result_cache_metrics():
+        """
+        Return hit and miss counts of the result cache since the server started.
+
+        Returns:
+            JSON: Hits per tier, misses, requests coalesced onto another's result,
+                  stores, results too large to store, tier errors and the hit
+                  ratio, with each tier's entries, bytes and evictions; enabled
+                  is false when RESULT_CACHE_TIERS is empty.
+        """
+        if result_cache is None:
+            return jsonify({"enabled": False}), 200
+        return jsonify({"enabled": True, **result_cache.snapshot()}), 200
+
+    return metrics_bp
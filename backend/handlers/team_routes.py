@@ -1,65 +1,83 @@
 from flask import Blueprint, jsonify
-from sqlalchemy import text
+from db.query_registry import query_registry
+from helpers.json_encoder import row_dicts
 from .validators import validate_month_format  # Import the new validator function
-
-def create_team_bp(db_session):
+from helpers.response_cache import VersionedResponseCache, ConditionalGet
+
+STANDINGS_QUERY = """
+    SELECT
+        t.team_name,
+        COUNT(*) AS games_played,
+        COUNT(*) FILTER (WHERE tg.result = 'W') AS wins,
+        COUNT(*) FILTER (WHERE tg.result = 'L') AS losses,
+        ROUND(COUNT(*) FILTER (WHERE tg.result = 'W')::NUMERIC / NULLIF(COUNT(*), 0), 3) AS win_percentage
+    FROM team_game tg
+    JOIN teams t ON t.team_id = tg.team_id
+    GROUP BY t.team_id, t.team_name
+    ORDER BY win_percentage DESC, t.team_name;
+"""
+
+STANDINGS_BY_MONTH_QUERY = """
+    WITH month_range AS (
+        SELECT
+            TO_DATE(:month, 'YYYY-MM') AS month_start,
+            TO_DATE(:month, 'YYYY-MM') + INTERVAL '1 month' AS month_end
+    )
+
+    SELECT
+        t.team_name,
+        COUNT(*) AS games_played,
+        COUNT(*) FILTER (WHERE tg.result = 'W') AS wins,
+        COUNT(*) FILTER (WHERE tg.result = 'L') AS losses,
+        ROUND(COUNT(*) FILTER (WHERE tg.result = 'W')::NUMERIC / NULLIF(COUNT(*), 0), 3) AS win_percentage,
+        -- Monthly statistics using date range
+        COUNT(*) FILTER (WHERE tg.game_date >= m.month_start AND tg.game_date < m.month_end) AS games_played_in_month,
+        COUNT(*) FILTER (WHERE tg.game_date >= m.month_start AND tg.game_date < m.month_end AND tg.location = 'home') AS home_games_in_month,
+        COUNT(*) FILTER (WHERE tg.game_date >= m.month_start AND tg.game_date < m.month_end AND tg.location = 'away') AS away_games_in_month
+    FROM team_game tg
+    JOIN teams t ON t.team_id = tg.team_id
+    CROSS JOIN month_range m
+    GROUP BY t.team_id, t.team_name
+    ORDER BY games_played_in_month DESC, t.team_name;
+"""
+
+STANDINGS = query_registry.register('standings', STANDINGS_QUERY)
+STANDINGS_BY_MONTH = query_registry.register('standings_by_month', STANDINGS_BY_MONTH_QUERY)
+
+def create_team_bp(db_session, data_versions):
     team_bp = Blueprint('team', __name__, url_prefix='/teams')
 
+    # Responses only change when the loader writes to the tables a route reads
+    conditional = ConditionalGet(data_versions)
+
+    # Standings only change when the loader writes games or teams
+    standings_cache = VersionedResponseCache(data_versions, 'game_schedule', 'teams')
+
     # TODO: refactor of GLG data is added to game_schedule
     @team_bp.route('/', methods=['GET'])
+    @conditional('game_schedule', 'teams')
     def get_standings():
         """
         Retrieve and return the current team standings.
 
         This function executes a SQL query to calculate team standings based on
-        game results from the game_schedule table. It computes games played,
+        game results from the team_game table. It computes games played,
         wins, losses, and win percentage for each team.
 
         Returns:
             JSON: A list of dictionaries containing team standings information,
-                  sorted by win percentage in descending order.
+                  sorted by win percentage in descending order. Served from
+                  standings_cache until the next load.
         """
-        result = db_session.execute(text("""
-        WITH team_games AS (
-            -- Get home games
-            SELECT
-                g.game_id,
-                t.team_id,
-                t.team_name,
-                1 AS games_played,
-                CASE WHEN g.home_score > g.away_score THEN 1 ELSE 0 END AS wins,
-                CASE WHEN g.home_score < g.away_score THEN 1 ELSE 0 END AS losses
-            FROM game_schedule g
-            JOIN teams t ON t.team_id = g.home_id
-
-            UNION ALL
-
-            -- Get away games
-            SELECT
-                g.game_id,
-                t.team_id,
-                t.team_name,
-                1 AS games_played,
-                CASE WHEN g.away_score > g.home_score THEN 1 ELSE 0 END AS wins,
-                CASE WHEN g.away_score < g.home_score THEN 1 ELSE 0 END AS losses
-            FROM game_schedule g
-            JOIN teams t ON t.team_id = g.away_id
-        )
+        return standings_cache.respond(('standings',), query_standings)
 
-        SELECT
-            tg.team_name,
-            SUM(tg.games_played) AS games_played,
-            SUM(tg.wins) AS wins,
-            SUM(tg.losses) AS losses,
-            ROUND(SUM(tg.wins)::NUMERIC / NULLIF(SUM(tg.games_played), 0), 3) AS win_percentage
-        FROM team_games tg
-        GROUP BY tg.team_id, tg.team_name
-        ORDER BY win_percentage DESC, tg.team_name;
-        """))
-        rankings = [dict(row) for row in result]
+    def query_standings():
+        result = STANDINGS.execute(db_session)
+        rankings = row_dicts(result)
         return jsonify(rankings)
 
     @team_bp.route('/<string:month>', methods=['GET'])
+    @conditional('game_schedule', 'teams')
     def get_standings_by_month(month):
         """
         Retrieve team standings for a specific month.
@@ -76,60 +94,11 @@ def create_team_bp(db_session):
         if not is_valid:
             return jsonify(error), 400
 
-        result = db_session.execute(text("""
-        WITH team_games AS (
-            -- Home games
-            SELECT
-                g.game_id,
-                t.team_id,
-                t.team_name,
-                1 AS games_played,
-                CASE WHEN g.home_score > g.away_score THEN 1 ELSE 0 END AS wins,
-                CASE WHEN g.home_score < g.away_score THEN 1 ELSE 0 END AS losses,
-                -- Monthly statistics using date range
-                CASE WHEN g.game_date >= TO_DATE(:month, 'YYYY-MM') 
-                    AND g.game_date < (TO_DATE(:month, 'YYYY-MM') + INTERVAL '1 month') THEN 1 ELSE 0 END AS games_played_in_month,
-                CASE WHEN g.game_date >= TO_DATE(:month, 'YYYY-MM') 
-                    AND g.game_date < (TO_DATE(:month, 'YYYY-MM') + INTERVAL '1 month') THEN 1 ELSE 0 END AS home_games_in_month,
-                0 AS away_games_in_month
-            FROM game_schedule g
-            JOIN teams t ON t.team_id = g.home_id
-
-            UNION ALL
-
-            -- Away games
-            SELECT
-                g.game_id,
-                t.team_id,
-                t.team_name,
-                1 AS games_played,
-                CASE WHEN g.away_score > g.home_score THEN 1 ELSE 0 END AS wins,
-                CASE WHEN g.away_score < g.home_score THEN 1 ELSE 0 END AS losses,
-                -- Monthly statistics using date range
-                CASE WHEN g.game_date >= TO_DATE(:month, 'YYYY-MM') 
-                    AND g.game_date < (TO_DATE(:month, 'YYYY-MM') + INTERVAL '1 month') THEN 1 ELSE 0 END AS games_played_in_month,
-                0 AS home_games_in_month,
-                CASE WHEN g.game_date >= TO_DATE(:month, 'YYYY-MM') 
-                    AND g.game_date < (TO_DATE(:month, 'YYYY-MM') + INTERVAL '1 month') THEN 1 ELSE 0 END AS away_games_in_month
-            FROM game_schedule g
-            JOIN teams t ON t.team_id = g.away_id
-        )
+        return standings_cache.respond(('standings_by_month', month), lambda: query_standings_by_month(month))
 
-        SELECT
-            tg.team_name,
-            SUM(tg.games_played) AS games_played,
-            SUM(tg.wins) AS wins,
-            SUM(tg.losses) AS losses,
-            ROUND(SUM(tg.wins)::NUMERIC / NULLIF(SUM(tg.games_played), 0), 3) AS win_percentage,
-            SUM(tg.games_played_in_month) AS games_played_in_month,
-            SUM(tg.home_games_in_month) AS home_games_in_month,
-            SUM(tg.away_games_in_month) AS away_games_in_month
-        FROM team_games tg
-        GROUP BY tg.team_id, tg.team_name
-        ORDER BY games_played_in_month DESC, tg.team_name;
-
-        """), {"month": month})
-
-        return jsonify([dict(row) for row in result]), 200
+    def query_standings_by_month(month):
+        result = STANDINGS_BY_MONTH.execute(db_session, {"month": month})
+
+        return jsonify(row_dicts(result))
 
     return team_bp
\ No newline at end of file
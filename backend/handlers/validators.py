@@ -1,5 +1,5 @@
 import re
-from datetime import datetime
+from datetime import MAXYEAR, MINYEAR, date, datetime, timedelta
 from flask import jsonify
 
 def validate_date_range(start_date, end_date):
@@ -47,4 +47,112 @@ def validate_month_format(month):
     """
     if not re.match(r'^\d{4}-(?:0[1-9]|1[0-2])$', month):
         return False, {"error": "Invalid month format. Please use 'YYYY-MM'."}
-    return True, None
\ No newline at end of file
+    return True, None
+
+def validate_export_format(output_format, stream):
+    """
+    Validate the format and stream query parameters of the lineup endpoints.
+
+    Args:
+        output_format (str or None): 'json' (the default) for a page, or 'ndjson' for an export.
+        stream (str or None): Must be '1' for an ndjson export.
+
+    Returns:
+        tuple: (bool, dict or None)
+            - bool: True if validation passes, False otherwise.
+            - dict: Error message if validation fails, None if it passes.
+    """
+    if output_format in (None, 'json'):
+        return True, None
+    if output_format != 'ndjson':
+        return False, {"error": "Invalid format. Please use 'json' or 'ndjson'."}
+    if stream != '1':
+        return False, {"error": "The ndjson format streams the full result. Please add 'stream=1'."}
+    return True, None
+
+
+def validate_columnar_format(output_format):
+    """
+    Validate the format of a columnar export.
+
+    Args:
+        output_format (str): 'arrow' for an Arrow IPC stream or 'parquet' for a Parquet file.
+
+    Returns:
+        tuple: (bool, dict or None)
+            - bool: True if validation passes, False otherwise.
+            - dict: Error message if validation fails, None if it passes.
+    """
+    if output_format not in ('arrow', 'parquet'):
+        return False, {"error": "Invalid format. Please use 'arrow' or 'parquet'."}
+    return True, None
+
+
+def validate_analytics_backend(backend):
+    """
+    Validate the backend query parameter of the stint average endpoints.
+
+    Args:
+        backend (str or None): 'sql' (the default) or 'numpy'.
+
+    Returns:
+        tuple: (bool, dict or None)
+            - bool: True if validation passes, False otherwise.
+            - dict: Error message if validation fails, None if it passes.
+    """
+    if backend not in (None, 'sql', 'numpy'):
+        return False, {"error": "Invalid backend. Please use 'sql' or 'numpy'."}
+    return True, None
+
+
+def validate_id_list(ids, name, min_count, max_count):
+    """
+    Validate a comma separated list of ids.
+
+    Args:
+        ids (str or None): The ids, e.g. '1,2,3,4,5'.
+        name (str): The query parameter, for the error message.
+        min_count (int): The fewest distinct ids allowed.
+        max_count (int): The most distinct ids allowed.
+
+    Returns:
+        tuple: (bool, dict or None)
+            - bool: True if validation passes, False otherwise.
+            - dict: Error message if validation fails, None if it passes.
+    """
+    if not ids or not re.match(r'^\d+(?:,\d+)*$', ids):
+        return False, {"error": f"Invalid {name}. Please use comma separated ids, e.g. '1,2,3'."}
+    count = len(set(ids.split(',')))
+    if not min_count <= count <= max_count:
+        if min_count == max_count:
+            return False, {"error": f"Please give exactly {min_count} distinct {name}."}
+        return False, {"error": f"Please give between {min_count} and {max_count} distinct {name}."}
+    return True, None
+
+
+def parse_id_list(ids):
+    """Sorted distinct ints of a comma separated list that passed validate_id_list."""
+    return sorted({int(value) for value in ids.split(',')})
+
+
+def year_start(year):
+    """Midnight on January 1st of year, clamped to the years a datetime can hold."""
+    if year < MINYEAR:
+        return datetime.min
+    if year > MAXYEAR:
+        return datetime.max
+    return datetime(year, 1, 1)
+
+
+def year_range(year):
+    """Half-open [start, end) timestamps covering a calendar year, empty for years a datetime cannot hold."""
+    return year_start(year), year_start(year + 1)
+
+
+def day_range(start_date, end_date):
+    """Half-open [start, end) timestamps covering the days start_date to end_date inclusive."""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    # The day after 9999-12-31 does not exist; datetime.max ends the range instead
+    end = end + timedelta(days=1) if end.date() < date.max else datetime.max
+    return start, end
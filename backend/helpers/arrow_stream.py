@@ -0,0 +1,75 @@
+import io
+from flask import current_app, stream_with_context
+from sqlalchemy import text
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow is only needed for the columnar exports
+    pa = None
+
+COLUMNAR_MIMETYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def record_batches(result, schema, batch_size):
+    """Build Arrow record batches from a result, batch_size rows at a time."""
+    for rows in result.partitions(batch_size):
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+def _batch_writer(output_format, sink, schema):
+    if output_format == 'parquet':
+        # Each record batch becomes its own row group, so nothing is held back until close
+        writer = pa.parquet.ParquetWriter(sink, schema)
+        return writer, writer.write_batch
+    writer = pa.ipc.new_stream(sink, schema)
+    return writer, writer.write_batch
+
+
+def stream_columnar(db_session, query, params, schema, output_format, filename, batch_size=10000):
+    """
+    Stream the rows of query as an Arrow IPC stream or a Parquet file.
+
+    The query runs on a server-side cursor. Each batch of rows is converted to an
+    Arrow record batch with the given schema (column order must match the query),
+    written, and the bytes sent before the next batch is fetched.
+
+    Args:
+        output_format (str): 'arrow' or 'parquet'.
+        filename (str): Download name, without extension.
+    """
+    result = db_session.execute(
+        text(query).execution_options(stream_results=True, max_row_buffer=batch_size),
+        params
+    )
+
+    def generate():
+        sink = io.BytesIO()
+
+        def drain():
+            data = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return data
+
+        try:
+            writer, write_batch = _batch_writer(output_format, sink, schema)
+            for batch in record_batches(result, schema, batch_size):
+                write_batch(batch)
+                yield drain()
+            writer.close()
+            yield drain()
+        finally:
+            result.close()
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype=COLUMNAR_MIMETYPES[output_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{output_format}"'
+    return response
@@ -0,0 +1,67 @@
+"""
+On-court time as bitsets over a game's deciseconds.
+
+Bit i of a player's bitset is set when they were on court during the i-th
+tenth of a second since tip-off (the resolution of lineup.time_in and
+time_out). The time players shared on court in a game is the popcount of the
+AND of their bitsets, so pairs, trios or full units across a season cost one
+integer AND per game instead of a walk over lineup rows.
+
+Bitsets are Python ints while in memory and little-endian bytes in
+player_court_time.on_court.
+"""
+from helpers.stint_engine import elapsed_seconds
+
+DECISECONDS_PER_SECOND = 10
+
+
+def elapsed_deciseconds(period, time_remaining):
+    """Tenths of a second since tip-off, given the seconds remaining in period."""
+    return round(elapsed_seconds(period, time_remaining) * DECISECONDS_PER_SECOND)
+
+
+def interval_bits(period, time_in, time_out):
+    """Bitset of the deciseconds from time_in down to time_out in period."""
+    start = elapsed_deciseconds(period, time_in)
+    end = elapsed_deciseconds(period, time_out)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def on_court_bitsets(rows):
+    """
+    Build every player's bitset from lineup rows.
+
+    Args:
+        rows (iterable): (game_id, team_id, player_id, period, time_in, time_out) tuples.
+
+    Returns:
+        dict: {(game_id, team_id, player_id): bitset}. Overlapping rows are merged.
+    """
+    bitsets = {}
+    for game_id, team_id, player_id, period, time_in, time_out in rows:
+        key = (game_id, team_id, player_id)
+        bitsets[key] = bitsets.get(key, 0) | interval_bits(period, time_in, time_out)
+    return bitsets
+
+
+def to_bytes(bitset):
+    return bitset.to_bytes((bitset.bit_length() + 7) // 8, 'little')
+
+
+def from_bytes(data):
+    return int.from_bytes(data, 'little')
+
+
+def seconds(bitset):
+    """Seconds covered by bitset."""
+    return bitset.bit_count() / DECISECONDS_PER_SECOND
+
+
+def shared_bitset(bitsets):
+    """The deciseconds set in every one of bitsets."""
+    shared = -1
+    for bitset in bitsets:
+        shared &= bitset
+    return max(shared, 0)
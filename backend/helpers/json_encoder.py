@@ -0,0 +1,86 @@
+"""
+Response JSON encoders, selected with the JSON_ENCODER setting.
+
+'flask' keeps Flask's DefaultJSONProvider. 'orjson' encodes with orjson and
+produces the same values: sorted keys, dates as HTTP dates and Decimal as a
+string. Its output is always compact outside of debug mode, and non-ASCII text
+is written as UTF-8 rather than \\u escapes.
+"""
+import functools
+import logging
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; without it the flask encoder is used
+    orjson = None
+
+
+def row_dicts(result):
+    """
+    Rows of a result as dicts, keyed by the result's column names.
+
+    Zipping each row tuple with the keys once is several times cheaper than
+    dict(row), which goes through the row's mapping view column by column.
+    """
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+# Game dates repeat across thousands of rows, and formatting them dominates encoding
+_http_date = functools.lru_cache(maxsize=4096)(http_date)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, with the output of DefaultJSONProvider."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return _http_date(o)
+        return DefaultJSONProvider.default(o)
+
+    def _options(self, indent=False):
+        # Datetimes are passed to default so they are written as HTTP dates, like jsonify
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Options orjson has no equivalent for, such as a custom separator
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent)) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    'flask': DefaultJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def init_json_provider(app, name):
+    """Install the named JSON provider on app, falling back to flask's if orjson is missing."""
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON encoder {name!r}, expected one of {', '.join(JSON_PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        logging.warning("orjson is not installed, using the flask JSON encoder")
+        name = 'flask'
+    app.json = JSON_PROVIDERS[name](app)
+    return app.json
@@ -0,0 +1,12 @@
+"""
+The unit_hash of lineup_unit rows.
+
+scripts.derived_tables stores the hash of each row's sorted player_ids, and
+/lineups/units looks units up by hashing the requested ids the same way, so
+both build it from unit_hash_sql.
+"""
+
+
+def unit_hash_sql(player_ids):
+    """SQL for the unit_hash of a sorted BIGINT[] expression."""
+    return f"hashtextextended(array_to_string({player_ids}, ','), 0)"
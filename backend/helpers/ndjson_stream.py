@@ -0,0 +1,32 @@
+from flask import current_app, stream_with_context
+from sqlalchemy import text
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def stream_ndjson(db_session, query, params, batch_size=1000):
+    """
+    Stream the rows of query as newline delimited JSON.
+
+    The query runs on a server-side cursor, and rows are fetched and written
+    batch_size at a time, so memory use does not grow with the result. Values
+    are encoded like jsonify would encode them.
+
+    The query is executed before the response is returned, so SQL errors
+    still surface as a normal error response rather than a truncated stream.
+    """
+    result = db_session.execute(
+        text(query).execution_options(stream_results=True, max_row_buffer=batch_size),
+        params
+    )
+
+    def generate():
+        keys = list(result.keys())
+        try:
+            for rows in result.partitions(batch_size):
+                yield ''.join(current_app.json.dumps(dict(zip(keys, row))) + '\n' for row in rows)
+        finally:
+            result.close()
+
+    # stream_with_context keeps the request, and its scoped session, open until the last row is sent
+    return current_app.response_class(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
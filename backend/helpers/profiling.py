@@ -0,0 +1,310 @@
+"""
+Per-request profiling of the API.
+
+init_profiling hooks the engine's cursor events and the app's request hooks,
+and records for every request the time spent in SQL, the number of queries
+and the rows they returned, the time spent serializing JSON, and the total
+latency. Each is added to a histogram for the request's route in
+request_metrics, which /metrics serves, and the request's own numbers are
+sent back in a Server-Timing header.
+
+Queries slower than SLOW_QUERY_MS are logged and kept in slow_queries. With
+SLOW_QUERY_EXPLAIN on, such a query is run again under
+EXPLAIN (ANALYZE, BUFFERS) and its plan is kept with it; this repeats the
+query's work, so it is meant for diagnosing, not for normal operation.
+
+Rows are the counts the driver reports once a query has executed, so queries
+on server-side cursors (the NDJSON and Arrow exports) count as 0 rows, and
+the latency of a streamed response ends when its first byte is ready.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from config import settings
+
+# Upper bounds of the histogram buckets, in milliseconds and rows
+MILLISECOND_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+
+class Histogram:
+    """Counts of observed values by bucket upper bound, with their count, sum and max."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is everything above the last bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        """The histogram with cumulative bucket counts by upper bound (le), as Prometheus has them."""
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(list(self.bounds) + ['+Inf'], self.counts):
+            cumulative += count
+            buckets.append({'le': bound, 'count': cumulative})
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'mean': round(self.sum / self.count, 3) if self.count else 0.0,
+            'max': round(self.max, 3),
+            'buckets': buckets,
+        }
+
+
+class RouteMetrics:
+    """The histograms of one route."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.queries = 0
+        self.total_ms = Histogram(MILLISECOND_BUCKETS)
+        self.sql_ms = Histogram(MILLISECOND_BUCKETS)
+        self.serialize_ms = Histogram(MILLISECOND_BUCKETS)
+        self.rows = Histogram(ROW_BUCKETS)
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'queries': self.queries,
+            'total_ms': self.total_ms.snapshot(),
+            'sql_ms': self.sql_ms.snapshot(),
+            'serialize_ms': self.serialize_ms.snapshot(),
+            'rows': self.rows.snapshot(),
+        }
+
+
+class RequestMetrics:
+    """Thread-safe per-route histograms of request latency, SQL time, serialization time and rows."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def record(self, route, status_code, profile, total_seconds):
+        with self._lock:
+            metrics = self._routes.get(route)
+            if metrics is None:
+                metrics = self._routes[route] = RouteMetrics()
+            metrics.requests += 1
+            if status_code >= 500:
+                metrics.errors += 1
+            metrics.queries += profile.queries
+            metrics.total_ms.observe(total_seconds * 1000)
+            metrics.sql_ms.observe(profile.sql_seconds * 1000)
+            metrics.serialize_ms.observe(profile.serialize_seconds * 1000)
+            metrics.rows.observe(profile.rows)
+
+    def snapshot(self):
+        with self._lock:
+            return {route: metrics.snapshot() for route, metrics in sorted(self._routes.items())}
+
+
+class SlowQueryLog:
+    """The most recent slow queries, with their plans when they were explained."""
+
+    def __init__(self, size=settings.SLOW_QUERY_LOG_SIZE):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def snapshot(self):
+        """The entries, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+
+request_metrics = RequestMetrics()
+slow_queries = SlowQueryLog()
+
+# Prometheus metric for each histogram of a route, and its unit suffix
+PROMETHEUS_HISTOGRAMS = {
+    'total_ms': 'api_request_duration_milliseconds',
+    'sql_ms': 'api_request_sql_milliseconds',
+    'serialize_ms': 'api_request_serialize_milliseconds',
+    'rows': 'api_request_rows',
+}
+
+
+def prometheus_text(snapshot):
+    """A request_metrics snapshot in the Prometheus text exposition format."""
+    lines = []
+    for counter in ('requests', 'errors', 'queries'):
+        name = f"api_{counter}_total"
+        lines.append(f"# TYPE {name} counter")
+        lines += [f'{name}{{route="{route}"}} {metrics[counter]}' for route, metrics in snapshot.items()]
+    for key, name in PROMETHEUS_HISTOGRAMS.items():
+        lines.append(f"# TYPE {name} histogram")
+        for route, metrics in snapshot.items():
+            histogram = metrics[key]
+            lines += [f'{name}_bucket{{route="{route}",le="{bucket["le"]}"}} {bucket["count"]}' for bucket in histogram['buckets']]
+            lines.append(f'{name}_sum{{route="{route}"}} {histogram["sum"]}')
+            lines.append(f'{name}_count{{route="{route}"}} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestProfile:
+    """What one request has spent so far, kept on flask.g."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.rows = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.serializing = False
+
+
+def current_profile():
+    """The profile of the request being handled, or None outside of a profiled request."""
+    if not has_request_context():
+        return None
+    return g.get('profile')
+
+
+def route_name():
+    return f"{request.method} {request.url_rule.rule}"
+
+
+def is_select(statement):
+    """
+    Whether statement is a query EXPLAIN ANALYZE can safely run again.
+
+    EXECUTE runs a registered query's prepared statement (see db/query_registry.py),
+    all of which are SELECTs.
+    """
+    words = statement.split(None, 1)
+    return bool(words) and words[0].upper() in ('SELECT', 'WITH', 'EXECUTE')
+
+
+def explain(cursor, statement, parameters):
+    """
+    The EXPLAIN (ANALYZE, BUFFERS) plan of statement, run on cursor's connection.
+
+    Runs inside a savepoint so a failing EXPLAIN does not abort the request's transaction.
+    """
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(EXPLAIN_PREFIX + statement, parameters)
+            return explain_cursor.fetchone()[0]
+        except Exception as error:
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return {'error': str(error)}
+        finally:
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        explain_cursor.close()
+
+
+def init_profiling(app, engine, slow_query_ms=settings.SLOW_QUERY_MS, explain_slow_queries=settings.SLOW_QUERY_EXPLAIN):
+    """
+    Profile every request app handles and every query it runs on engine.
+
+    Call after init_json_provider, as serialization is timed by wrapping the
+    installed JSON provider.
+
+    Args:
+        slow_query_ms (float): Queries slower than this are logged and kept in slow_queries; 0 turns this off.
+        explain_slow_queries (bool): Also capture EXPLAIN (ANALYZE, BUFFERS) of slow queries on Postgres.
+    """
+    can_explain = explain_slow_queries and engine.dialect.name == 'postgresql'
+
+    # The start is kept on the statement's execution context, which goes away with it when the statement fails
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._query_start
+        profile = current_profile()
+        if profile is None:
+            return
+        rows = max(cursor.rowcount, 0)
+        profile.queries += 1
+        profile.rows += rows
+        profile.sql_seconds += seconds
+
+        if slow_query_ms and seconds * 1000 > slow_query_ms:
+            route = route_name() if request.url_rule else request.path
+            logging.warning(f"Slow query on {route}: {seconds * 1000:.1f} ms, {rows} rows")
+            entry = {
+                'route': route,
+                'at': datetime.utcnow().isoformat(timespec='seconds'),
+                'duration_ms': round(seconds * 1000, 3),
+                'rows': rows,
+                'statement': statement,
+            }
+            if can_explain and not executemany and is_select(statement):
+                entry['plan'] = explain(cursor, statement, parameters)
+            slow_queries.add(entry)
+
+    def timed(serialize):
+        def wrapper(*args, **kwargs):
+            profile = current_profile()
+            # Flask's own provider builds response with dumps, which is then already being timed
+            if profile is None or profile.serializing:
+                return serialize(*args, **kwargs)
+            profile.serializing = True
+            start = time.perf_counter()
+            try:
+                return serialize(*args, **kwargs)
+            finally:
+                profile.serialize_seconds += time.perf_counter() - start
+                profile.serializing = False
+        return wrapper
+
+    # jsonify goes through response, and the NDJSON exports through dumps
+    app.json.response = timed(app.json.response)
+    app.json.dumps = timed(app.json.dumps)
+
+    @app.before_request
+    def start_profile():
+        g.profile = RequestProfile()
+
+    @app.after_request
+    def record_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        total_seconds = time.perf_counter() - profile.start
+        response.headers['Server-Timing'] = ', '.join([
+            f"sql;dur={profile.sql_seconds * 1000:.1f}",
+            f"serialize;dur={profile.serialize_seconds * 1000:.1f}",
+            f"total;dur={total_seconds * 1000:.1f}",
+        ])
+        # Requests that matched no route are left out rather than tracked by path
+        if request.url_rule is not None:
+            request_metrics.record(route_name(), response.status_code, profile, total_seconds)
+        return response
+
+    return request_metrics
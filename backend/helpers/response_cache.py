@@ -0,0 +1,110 @@
+import functools
+import hashlib
+import threading
+from datetime import timezone
+from flask import current_app, request
+
+
+class VersionedResponseCache:
+    """
+    In-memory cache of serialized responses that stay valid until the data
+    they were built from changes.
+
+    Entries are keyed by the caller's key and tagged with the data_version
+    counters of tables; when a counter moves, every entry is dropped. Bodies
+    are stored as bytes. Validators (ETag, Last-Modified) and 304s are left to
+    ConditionalGet on the route.
+    """
+
+    def __init__(self, data_versions, *tables):
+        self._data_versions = data_versions
+        self._tables = tables
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+
+    def respond(self, key, render):
+        """
+        Serve key from the cache, calling render() to build it on a miss.
+
+        render must return a Flask response; only 200 responses are cached.
+        """
+        version = self._data_versions.version(*self._tables)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+
+        if entry is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+            entry = (response.get_data(), response.mimetype)
+            with self._lock:
+                if version == self._version:
+                    self._entries[key] = entry
+
+        body, mimetype = entry
+        return current_app.response_class(body, mimetype=mimetype)
+
+
+class ConditionalGet:
+    """
+    Conditional GETs for routes whose responses only change when the loader
+    writes to the tables they read.
+
+    Decorating a view with conditional(*tables) gives its 200 responses a weak
+    ETag built from the data_version counters of tables and the request's path
+    and query arguments, and a Last-Modified of the tables' latest updated_at.
+    Both are known before the view runs, so a request whose If-None-Match
+    still matches gets a 304 Not Modified straight from the in-memory
+    DataVersionTracker, without running any SQL; only 200s carry the ETag, so
+    a matching one is for a URL the view accepted. If-Modified-Since is not
+    tied to a URL, so without an If-None-Match the view runs first (and can
+    still answer 400 or 404), and only its 200 is turned into a 304; a
+    streamed 200 is sent in full, as its rows are already being read.
+
+    Responses are marked Cache-Control: no-cache, so clients keep them but
+    revalidate on every use; a load is seen within the tracker's poll interval.
+    """
+
+    def __init__(self, data_versions):
+        self._data_versions = data_versions
+
+    def etag(self, tables):
+        """The ETag of the current request's response at the tables' current versions."""
+        versions = self._data_versions.version(*tables)
+        arguments = sorted(request.args.items(multi=True))
+        key = repr((request.path, arguments, tables, versions))
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def last_modified(self, tables):
+        last_modified = self._data_versions.last_modified(*tables)
+        if last_modified is None:
+            return None
+        # HTTP dates have whole seconds, so compare and send them without microseconds
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+    def __call__(self, *tables):
+        def decorator(view):
+            @functools.wraps(view)
+            def conditional_view(*args, **kwargs):
+                etag = self.etag(tables)
+                last_modified = self.last_modified(tables)
+                if request.if_none_match and request.if_none_match.contains_weak(etag):
+                    response = current_app.response_class(status=304)
+                else:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    since = request.if_modified_since
+                    # A streamed body is left to run, as its generator only cleans up once it is iterated
+                    if not request.if_none_match and not response.is_streamed and since is not None and last_modified is not None and last_modified <= since:
+                        response = current_app.response_class(status=304)
+                response.set_etag(etag, weak=True)
+                response.last_modified = last_modified
+                response.cache_control.no_cache = True
+                return response
+            return conditional_view
+        return decorator
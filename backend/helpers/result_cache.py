@@ -0,0 +1,513 @@
+"""
+Result cache of the analytic endpoints, shared by the API's workers.
+
+A cached route's response body is stored under a key of its endpoint, path,
+sorted query arguments and the data_version counters of the tables it reads,
+so a load makes every older entry unreachable without any invalidation; old
+entries then expire after RESULT_CACHE_TTL_SECONDS or are evicted for space.
+
+Lookups go through the tiers in order (RESULT_CACHE_TIERS):
+
+    memory    an LRU in each worker, bounded by RESULT_CACHE_MEMORY_BYTES
+    postgres  the unlogged result_cache table, shared by every worker and
+              bounded by RESULT_CACHE_SHARED_BYTES, oldest entries evicted first
+
+A hit in a later tier is copied into the earlier ones. A miss is computed
+once: requests in the same worker wait for the one computing the key
+(single-flight), and on Postgres that request also holds an advisory lock on
+the key, so the other workers wait for its result in the shared tier rather
+than run the same query. No request waits longer than
+RESULT_CACHE_LOCK_WAIT_SECONDS before computing the result itself.
+
+Responses other than 200, streamed responses and bodies over
+RESULT_CACHE_MAX_ENTRY_BYTES are not cached. The shared tier has a small
+pool of its own (RESULT_CACHE_POOL_SIZE), apart from the request pool. Its
+errors, including a timeout of that pool, are logged and counted, and the
+request carries on at once as if it had missed.
+"""
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from flask import current_app, request
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+
+# How often a request waiting on another worker looks for its result
+LOCK_POLL_SECONDS = 0.05
+
+# The shared tier is trimmed to this share of its budget, so it is not trimmed again on the next store
+TRIM_TO_FRACTION = 0.9
+# Oldest entries read per statement while trimming the shared tier
+TRIM_BATCH_SIZE = 100
+
+
+def entry_size(entry):
+    """Bytes an entry, a (body, mimetype) pair, counts against the size limits."""
+    body, mimetype = entry
+    return len(body) + len(mimetype)
+
+
+def advisory_lock_id(key):
+    """A bigint for pg_advisory_lock derived from key."""
+    return int.from_bytes(hashlib.sha1(key.encode()).digest()[:8], 'big', signed=True)
+
+
+class MemoryTier:
+    """Thread-safe LRU of entries in this worker, bounded by their total bytes."""
+    name = 'memory'
+
+    def __init__(self, max_bytes=settings.RESULT_CACHE_MEMORY_BYTES, ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+                 clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key: (entry, size, expires_at), least recently used first
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, _, expires_at = item
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        size = entry_size(entry)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (entry, size, self._clock() + self.ttl_seconds)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class PostgresTier:
+    """
+    Entries in the result_cache table, shared by every worker using the database.
+
+    Each operation runs on a connection of its own from engine and commits at
+    once, apart from the request's session. Expired entries are deleted
+    whenever an entry is stored. The table's size is only summed when this
+    worker's running estimate of it passes max_bytes; the oldest entries are
+    then deleted, in stored_at order, down to TRIM_TO_FRACTION of max_bytes.
+    Stores by other workers are only seen at that sum, so the table can go
+    over max_bytes by what they stored since. The SQL runs on SQLite as well,
+    without the advisory locks.
+    """
+    name = 'postgres'
+
+    def __init__(self, engine, max_bytes=settings.RESULT_CACHE_SHARED_BYTES, ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS):
+        self._engine = engine
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.can_lock = engine.dialect.name == 'postgresql'
+        self._lock = threading.Lock()
+        self._estimated_bytes = None  # unknown until the first store sums the table
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._engine.connect() as connection:
+            row = connection.execute(text("""
+                SELECT value, content_type FROM result_cache
+                WHERE key = :key AND expires_at > :now
+            """), {'key': key, 'now': datetime.utcnow()}).first()
+        return None if row is None else (bytes(row.value), row.content_type)
+
+    def set(self, key, entry):
+        body, mimetype = entry
+        size = entry_size(entry)
+        now = datetime.utcnow()
+        with self._engine.begin() as connection:
+            connection.execute(text("""
+                INSERT INTO result_cache (key, value, content_type, size, stored_at, expires_at)
+                VALUES (:key, :value, :content_type, :size, :stored_at, :expires_at)
+                ON CONFLICT (key) DO UPDATE
+                SET value = EXCLUDED.value, content_type = EXCLUDED.content_type, size = EXCLUDED.size,
+                    stored_at = EXCLUDED.stored_at, expires_at = EXCLUDED.expires_at
+            """), {
+                'key': key, 'value': body, 'content_type': mimetype, 'size': size,
+                'stored_at': now, 'expires_at': now + timedelta(seconds=self.ttl_seconds),
+            })
+            expired = connection.execute(text("DELETE FROM result_cache WHERE expires_at <= :now"), {'now': now}).rowcount
+            with self._lock:
+                estimate = self._estimated_bytes
+                if estimate is not None:
+                    estimate = self._estimated_bytes = estimate + size
+            evicted = 0
+            if estimate is None or estimate > self.max_bytes:
+                evicted, total_size = self._trim(connection)
+                with self._lock:
+                    self._estimated_bytes = total_size
+        with self._lock:
+            self.expirations += expired
+            self.evictions += evicted
+
+    def _trim(self, connection):
+        """
+        Delete the oldest entries until the table fits in TRIM_TO_FRACTION of max_bytes.
+
+        Returns:
+            tuple: The number of entries deleted and the bytes left in the table.
+        """
+        total_size = connection.execute(text("SELECT COALESCE(SUM(size), 0) FROM result_cache")).scalar()
+        if total_size <= self.max_bytes:
+            return 0, total_size
+
+        target_size = self.max_bytes * TRIM_TO_FRACTION
+        evicted = 0
+        delete = text("DELETE FROM result_cache WHERE key IN :keys").bindparams(bindparam('keys', expanding=True))
+        while total_size > target_size:
+            oldest = connection.execute(text("""
+                SELECT key, size FROM result_cache
+                ORDER BY stored_at, key
+                LIMIT :limit
+            """), {'limit': TRIM_BATCH_SIZE}).fetchall()
+            if not oldest:
+                break
+            keys = []
+            for row in oldest:
+                if total_size <= target_size:
+                    break
+                keys.append(row.key)
+                total_size -= row.size
+            evicted += connection.execute(delete, {'keys': keys}).rowcount
+        return evicted, total_size
+
+    def try_lock(self, key):
+        """
+        Take the advisory lock on key without waiting.
+
+        Returns:
+            Connection: The connection holding the lock, to pass to unlock, or None if another session holds it.
+        """
+        connection = self._engine.connect()
+        try:
+            # A session lock, held until unlock whatever happens to the transaction
+            locked = connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {'id': advisory_lock_id(key)}).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if not locked:
+            connection.close()
+            return None
+        return connection
+
+    def unlock(self, key, connection):
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': advisory_lock_id(key)})
+        finally:
+            connection.close()
+
+    def stats(self):
+        with self._engine.connect() as connection:
+            entries, size = connection.execute(text("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache")).one()
+        with self._lock:
+            return {
+                'entries': entries,
+                'bytes': int(size),
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class Flight:
+    """One computation of a key, which other requests for the key in this worker wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+
+
+class ResultCache:
+    """Entries looked up through tiers in order, computed once per key on a miss, with hit and miss counters."""
+
+    def __init__(self, tiers, max_entry_bytes=settings.RESULT_CACHE_MAX_ENTRY_BYTES,
+                 lock_wait_seconds=settings.RESULT_CACHE_LOCK_WAIT_SECONDS):
+        self.tiers = list(tiers)
+        self.max_entry_bytes = max_entry_bytes
+        self.lock_wait_seconds = lock_wait_seconds
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {
+                'hits': {tier.name: 0 for tier in self.tiers},
+                'misses': 0,
+                'coalesced': 0,
+                'stores': 0,
+                'too_large': 0,
+                'errors': 0,
+            }
+
+    def _count(self, counter, tier=None):
+        with self._lock:
+            if tier is None:
+                self._counters[counter] += 1
+            else:
+                self._counters[counter][tier] += 1
+
+    def _tier_failed(self, tier, error):
+        logging.warning(f"Result cache {tier.name} tier failed: {error}")
+        self._count('errors')
+
+    def _safely(self, tier, operation, *args):
+        """Run a tier operation, logging and counting its errors instead of raising them."""
+        try:
+            return operation(*args)
+        except SQLAlchemyError as error:
+            self._tier_failed(tier, error)
+            return None
+
+    def _backfill(self, key, entry, found_in):
+        """Copy an entry found in the tier found_in into the tiers before it."""
+        for tier in self.tiers[:self.tiers.index(found_in)]:
+            self._safely(tier, tier.set, key, entry)
+
+    def _lookup(self, key):
+        """The entry for key and the name of the tier it was found in, copying it into the earlier tiers."""
+        for tier in self.tiers:
+            entry = self._safely(tier, tier.get, key)
+            if entry is not None:
+                self._backfill(key, entry, tier)
+                return entry, tier.name
+        return None, None
+
+    def _store(self, key, entry):
+        if entry_size(entry) > self.max_entry_bytes:
+            self._count('too_large')
+            return
+        stored = False
+        for tier in self.tiers:
+            try:
+                tier.set(key, entry)
+                stored = True
+            except SQLAlchemyError as error:
+                self._tier_failed(tier, error)
+        if stored:
+            self._count('stores')
+
+    def _compute(self, key, compute):
+        self._count('misses')
+        entry = compute()
+        if entry is not None:
+            self._store(key, entry)
+        return entry
+
+    def _wait_for_workers(self, key):
+        """
+        Take the shared tier's lock on key, or wait for the worker holding it to store the entry.
+
+        Only a lock held by another session is waited on. An error of the shared
+        tier, including a timeout of its pool, ends the wait at once, so the
+        request computes the result itself as on any other miss.
+
+        Returns:
+            tuple: The entry if another worker stored it meanwhile, else None, and the
+                (tier, connection) lock to release, None if there is none.
+        """
+        shared = next((tier for tier in self.tiers if getattr(tier, 'can_lock', False)), None)
+        if shared is None:
+            return None, None
+        deadline = time.monotonic() + self.lock_wait_seconds
+        while True:
+            try:
+                connection = shared.try_lock(key)
+                if connection is not None:
+                    return None, (shared, connection)
+                if time.monotonic() >= deadline:
+                    return None, None
+                time.sleep(LOCK_POLL_SECONDS)
+                entry = shared.get(key)
+            except SQLAlchemyError as error:
+                self._tier_failed(shared, error)
+                return None, None
+            if entry is not None:
+                self._backfill(key, entry, shared)
+                return entry, None
+
+    def _lead(self, key, compute):
+        entry, lock = self._wait_for_workers(key)
+        if entry is not None:
+            self._count('coalesced')
+            return entry, 'coalesced'
+        try:
+            if lock is not None:
+                # Stored by a worker that released the lock between our lookups
+                entry, _ = self._lookup(key)
+                if entry is not None:
+                    self._count('coalesced')
+                    return entry, 'coalesced'
+            return self._compute(key, compute), 'miss'
+        finally:
+            if lock is not None:
+                tier, connection = lock
+                self._safely(tier, tier.unlock, key, connection)
+
+    def fetch(self, key, compute):
+        """
+        The entry cached under key, computed with compute() on a miss.
+
+        compute returns the (body, mimetype) entry to cache, or None for a result
+        that must not be cached. When fetch returns no entry, compute was called
+        by this caller.
+
+        Returns:
+            tuple: The entry or None, and where it came from: a tier name, 'coalesced'
+                for another request's result, or 'miss'.
+        """
+        entry, tier = self._lookup(key)
+        if entry is not None:
+            self._count('hits', tier)
+            return entry, tier
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        if not leader:
+            if flight.done.wait(self.lock_wait_seconds) and flight.entry is not None:
+                self._count('coalesced')
+                return flight.entry, 'coalesced'
+            return self._compute(key, compute), 'miss'
+
+        try:
+            flight.entry, outcome = self._lead(key, compute)
+            return flight.entry, outcome
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def snapshot(self):
+        with self._lock:
+            counters = {name: dict(value) if isinstance(value, dict) else value for name, value in self._counters.items()}
+        lookups = sum(counters['hits'].values()) + counters['misses'] + counters['coalesced']
+        counters['hit_ratio'] = round((lookups - counters['misses']) / lookups, 4) if lookups else 0.0
+        counters['tiers'] = {}
+        for tier in self.tiers:
+            counters['tiers'][tier.name] = self._safely(tier, tier.stats)
+        return counters
+
+
+def create_cache_engine(database_url, pool_size=settings.RESULT_CACHE_POOL_SIZE,
+                        pool_timeout=settings.RESULT_CACHE_POOL_TIMEOUT):
+    """
+    A small engine of the shared tier's own, apart from the request pool.
+
+    A request computing a key holds one of its connections for the advisory
+    lock while its session holds another from the request pool. When all are
+    in use, a checkout times out after pool_timeout and the request computes
+    its result without the shared tier.
+    """
+    return create_engine(
+        database_url,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=pool_timeout,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+def create_result_cache(database_url, tiers=settings.RESULT_CACHE_TIERS):
+    """
+    The ResultCache with the tiers named in tiers, in order, or None if there are none.
+
+    'postgres' stores entries in the result_cache table of database_url.
+    """
+    if not tiers:
+        return None
+    built = []
+    for name in tiers:
+        if name == MemoryTier.name:
+            built.append(MemoryTier())
+        elif name == PostgresTier.name:
+            built.append(PostgresTier(create_cache_engine(database_url)))
+        else:
+            raise ValueError(f"Unknown result cache tier {name!r}; use 'memory' or 'postgres'")
+    return ResultCache(built)
+
+
+class CachedResponses:
+    """
+    Serve routes from a ResultCache, keyed on their arguments and the data versions of the tables they read.
+
+    Decorate a view with cached(*tables) below its route (and below a
+    ConditionalGet, which answers before the cache is consulted). With no
+    result_cache the views are left as they are. Responses say where they came
+    from in an X-Cache header.
+    """
+
+    def __init__(self, result_cache, data_versions):
+        self._result_cache = result_cache
+        self._data_versions = data_versions
+
+    def key(self, tables):
+        arguments = urlencode(sorted(request.args.items(multi=True)))
+        versions = ','.join(str(version) for version in self._data_versions.version(*tables))
+        return f"{request.endpoint}:{request.path}?{arguments}@{versions}"
+
+    def __call__(self, *tables):
+        def decorator(view):
+            if self._result_cache is None:
+                return view
+
+            @functools.wraps(view)
+            def cached_view(*args, **kwargs):
+                rendered = []
+
+                def compute():
+                    response = current_app.make_response(view(*args, **kwargs))
+                    rendered.append(response)
+                    if response.status_code != 200 or response.is_streamed:
+                        return None
+                    return response.get_data(), response.mimetype
+
+                entry, outcome = self._result_cache.fetch(self.key(tables), compute)
+                if entry is None:
+                    return rendered[0]
+                body, mimetype = entry
+                response = current_app.response_class(body, mimetype=mimetype)
+                response.headers['X-Cache'] = outcome
+                return response
+            return cached_view
+        return decorator
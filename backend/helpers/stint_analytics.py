@@ -0,0 +1,286 @@
+"""
+NumPy backend for /lineups/stint-averages and /lineups/win-loss-stints.
+
+The lineup, game_schedule and players columns are loaded once into arrays and
+the per-player stint summary is computed with vectorized operations: stint
+boundaries with diff/cumsum over the sorted lineup rows, per-stint bounds with
+ufunc.reduceat, and per-player totals with bincount. The result is kept in
+memory until the lineup, game_schedule or players data version changes.
+
+Stints follow scripts.derived_tables: split within a period by
+refresh_player_stints, then merged across periods by stint number and split by
+result as in refresh_player_stint_summaries. Values are formatted the way the
+SQL endpoints format them, so both backends return the same responses.
+"""
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import text
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the numpy analytics backend
+    np = None
+
+DATA_TABLES = ('lineup', 'game_schedule', 'players')
+
+HUNDREDTHS = Decimal('0.01')
+
+
+def fetch_columns(connection, query, dtypes):
+    """Run query and return its columns as arrays of the given dtypes."""
+    rows = connection.execute(text(query)).fetchall()
+    if not rows:
+        return [np.empty(0, dtype=dtype) for dtype in dtypes]
+    return [np.array(column, dtype=dtype) for column, dtype in zip(zip(*rows), dtypes)]
+
+
+def group_starts(*keys):
+    """Boolean mask of the rows where any of the (sorted) key columns changes."""
+    starts = np.zeros(len(keys[0]), dtype=bool)
+    if len(starts):
+        starts[0] = True
+    for key in keys:
+        starts[1:] |= key[1:] != key[:-1]
+    return starts
+
+
+def compute_stints(game_id, team_id, player_id, period, time_in, time_out):
+    """
+    Split lineup rows into stints within each period.
+
+    Times are integer deciseconds remaining in the period. A stint starts at a
+    player's first row in a period, or at a row that starts before the previous
+    row ended.
+
+    Returns:
+        tuple: game_id, team_id, player_id, stint_number, stint_start and stint_end, one per stint.
+    """
+    order = np.lexsort((-time_in, period, player_id, team_id, game_id))
+    game_id, team_id, player_id, period = game_id[order], team_id[order], player_id[order], period[order]
+    time_in, time_out = time_in[order], time_out[order]
+
+    period_starts = group_starts(game_id, team_id, player_id, period)
+    new_stint = period_starts.copy()
+    new_stint[1:] |= time_in[1:] < time_out[:-1]
+
+    # Stint index of every row, and its number within the player's period
+    stint_index = np.cumsum(new_stint) - 1
+    first_stint_in_period = np.maximum.accumulate(np.where(period_starts, stint_index, 0))
+    stint_number = stint_index - first_stint_in_period + 1
+
+    starts = np.flatnonzero(new_stint)
+    return (
+        game_id[starts],
+        team_id[starts],
+        player_id[starts],
+        stint_number[starts],
+        np.maximum.reduceat(time_in, starts) if len(starts) else time_in[:0],
+        np.minimum.reduceat(time_out, starts) if len(starts) else time_out[:0],
+    )
+
+
+def interval_text(seconds):
+    """TO_CHAR(MAKE_INTERVAL(secs => seconds), 'MI:SS'), or None for None."""
+    if seconds is None:
+        return None
+    # MAKE_INTERVAL takes float seconds at microsecond precision; MI:SS truncates
+    whole_seconds = round(float(seconds) * 1000000) // 1000000
+    return f"{whole_seconds // 60 % 60:02d}:{whole_seconds % 60:02d}"
+
+
+def ratio(numerator, denominator):
+    """numerator::numeric / NULLIF(denominator, 0)."""
+    if not denominator:
+        return None
+    return Decimal(int(numerator)) / Decimal(int(denominator))
+
+
+def round_hundredths(value):
+    return None if value is None else value.quantize(HUNDREDTHS, rounding=ROUND_HALF_UP)
+
+
+def seconds_ratio(deciseconds, stints):
+    value = ratio(deciseconds, stints)
+    return None if value is None else value / 10
+
+
+def stint_average_row(name, summary):
+    return {
+        'player_name': name,
+        'avg_stints_per_game': round_hundredths(ratio(summary['total_stints'], summary['total_games'])),
+        'avg_stint_length': interval_text(seconds_ratio(summary['total_duration'], summary['total_stints'])),
+    }
+
+
+def win_loss_row(name, summary):
+    stints_per_game_wins = ratio(summary['total_stints_wins'], summary['total_games_wins'])
+    stints_per_game_losses = ratio(summary['total_stints_losses'], summary['total_games_losses'])
+    stint_length_wins = seconds_ratio(summary['total_duration_wins'], summary['total_stints_wins'])
+    stint_length_losses = seconds_ratio(summary['total_duration_losses'], summary['total_stints_losses'])
+
+    stints_per_game_diff = None
+    if stints_per_game_wins is not None and stints_per_game_losses is not None:
+        stints_per_game_diff = round_hundredths(stints_per_game_wins - stints_per_game_losses)
+
+    stint_length_diff = None
+    if stint_length_wins is not None and stint_length_losses is not None:
+        if stint_length_wins > stint_length_losses:
+            stint_length_diff = interval_text(stint_length_wins - stint_length_losses)
+        else:
+            stint_length_diff = '-' + interval_text(stint_length_losses - stint_length_wins)
+
+    return {
+        'player_name': name,
+        'total_games': summary['total_games'],
+        'avg_stints_per_game': round_hundredths(ratio(summary['total_stints'], summary['total_games'])),
+        'avg_stint_length': interval_text(seconds_ratio(summary['total_duration'], summary['total_stints'])),
+        'total_games_wins': summary['total_games_wins'],
+        'avg_stints_per_game_wins': round_hundredths(stints_per_game_wins),
+        'avg_stint_length_wins': interval_text(stint_length_wins),
+        'total_games_losses': summary['total_games_losses'],
+        'avg_stints_per_game_losses': round_hundredths(stints_per_game_losses),
+        'avg_stint_length_losses': interval_text(stint_length_losses),
+        'avg_stints_per_game_diff': stints_per_game_diff,
+        'avg_stint_length_diff': stint_length_diff,
+    }
+
+
+class StintAnalytics:
+    """
+    In-memory stint averages, rebuilt from the database when the lineup,
+    game_schedule or players data versions change.
+    """
+
+    def __init__(self, db_session, data_versions):
+        self._db_session = db_session
+        self._data_versions = data_versions
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = None
+
+    def _load(self):
+        # Reads on a connection of its own, so building the snapshot never ends the request's transaction
+        with self._db_session.get_bind().connect() as connection:
+            return self._load_from(connection)
+
+    def _load_from(self, connection):
+        game_id, team_id, player_id, period, time_in, time_out = fetch_columns(connection, """
+            SELECT game_id, team_id, player_id, period, ROUND(time_in * 10), ROUND(time_out * 10)
+            FROM lineup
+            WHERE player_id IS NOT NULL
+        """, (np.int64, np.int64, np.int64, np.int64, np.int64, np.int64))
+        schedule_game_id, home_id, away_id, home_score, away_score = fetch_columns(connection, """
+            SELECT game_id, home_id, away_id, home_score, away_score
+            FROM game_schedule
+            ORDER BY game_id
+        """, (np.int64, np.int64, np.int64, np.int64, np.int64))
+        # Postgres orders the names, so pages follow the same collation as the SQL backend
+        players = connection.execute(text("""
+            SELECT player_id, first_name || ' ' || last_name AS player_name
+            FROM players
+            ORDER BY player_name
+        """)).fetchall()
+
+        stint_game, stint_team, stint_player, stint_number, stint_start, stint_end = compute_stints(
+            game_id, team_id, player_id, period, time_in, time_out
+        )
+
+        # A player's nth stint of every period in a game counts as one stint of the game
+        order = np.lexsort((stint_number, stint_player, stint_team, stint_game))
+        stint_game, stint_team, stint_player, stint_number = stint_game[order], stint_team[order], stint_player[order], stint_number[order]
+        stint_start, stint_end = stint_start[order], stint_end[order]
+        starts = np.flatnonzero(group_starts(stint_game, stint_team, stint_player, stint_number))
+        game, team, player = stint_game[starts], stint_team[starts], stint_player[starts]
+        duration = (
+            np.maximum.reduceat(stint_start, starts) - np.minimum.reduceat(stint_end, starts)
+            if len(starts) else stint_start[:0]
+        )
+
+        # Game results; stints of games missing from game_schedule are dropped
+        schedule_index = np.searchsorted(schedule_game_id, game)
+        in_schedule = schedule_index < len(schedule_game_id)
+        in_schedule[in_schedule] = schedule_game_id[schedule_index[in_schedule]] == game[in_schedule]
+        game, team, player, duration, schedule_index = (
+            game[in_schedule], team[in_schedule], player[in_schedule], duration[in_schedule], schedule_index[in_schedule]
+        )
+        win = (
+            ((team == home_id[schedule_index]) & (home_score[schedule_index] > away_score[schedule_index]))
+            | ((team == away_id[schedule_index]) & (away_score[schedule_index] > home_score[schedule_index]))
+        )
+
+        # Per-player totals over dense player indexes
+        player_ids, player_index = np.unique(player, return_inverse=True)
+        count = len(player_ids)
+        _, game_index = np.unique(game, return_inverse=True)
+        game_count = int(game_index.max()) + 1 if len(game_index) else 1
+
+        def distinct_games(mask):
+            keys = np.unique(player_index[mask] * game_count + game_index[mask])
+            return np.bincount(keys // game_count, minlength=count)
+
+        loss = ~win
+        totals = {
+            'total_games': distinct_games(np.ones(len(win), dtype=bool)),
+            'total_stints': np.bincount(player_index, minlength=count),
+            'total_duration': np.bincount(player_index, weights=duration, minlength=count),
+            'total_games_wins': distinct_games(win),
+            'total_stints_wins': np.bincount(player_index[win], minlength=count),
+            'total_duration_wins': np.bincount(player_index[win], weights=duration[win], minlength=count),
+            'total_games_losses': distinct_games(loss),
+            'total_stints_losses': np.bincount(player_index[loss], minlength=count),
+            'total_duration_losses': np.bincount(player_index[loss], weights=duration[loss], minlength=count),
+        }
+
+        position_of_player = {int(player_id): position for position, player_id in enumerate(player_ids)}
+        names = []
+        stint_averages = []
+        win_loss_stints = []
+        for player_id, name in players:
+            position = position_of_player.get(player_id)
+            if position is None:
+                continue
+            summary = {key: int(round(values[position])) for key, values in totals.items()}
+            names.append(name)
+            stint_averages.append(stint_average_row(name, summary))
+            win_loss_stints.append(win_loss_row(name, summary))
+        return names, stint_averages, win_loss_stints
+
+    def _current(self):
+        """The computed rows for the current data versions, rebuilding them if they changed."""
+        version = self._data_versions.version(*DATA_TABLES)
+        with self._lock:
+            if version != self._version:
+                names, stint_averages, win_loss_stints = self._load()
+                last_positions = {name: position for position, name in enumerate(names)}
+                self._snapshot = {
+                    'names': names,
+                    'last_positions': last_positions,
+                    'stint_averages': stint_averages,
+                    'win_loss_stints': win_loss_stints,
+                }
+                self._version = version
+            return self._snapshot
+
+    def _page(self, key, last_player_name, page_size):
+        snapshot = self._current()
+        start = 0
+        if last_player_name is not None:
+            # Names are unique keys of last_positions, mapped to their last position
+            position = snapshot['last_positions'].get(last_player_name)
+            if position is not None:
+                start = position + 1
+            else:
+                # Not a name we hold; let Postgres compare it in the names' collation
+                start = self._db_session.execute(
+                    text("SELECT COUNT(*) FROM unnest(CAST(:names AS TEXT[])) AS name WHERE name <= :last_player_name"),
+                    {'names': snapshot['names'], 'last_player_name': last_player_name}
+                ).scalar()
+        return snapshot[key][start:start + page_size]
+
+    def stint_averages(self, last_player_name, page_size):
+        """A page of /lineups/stint-averages rows after last_player_name."""
+        return self._page('stint_averages', last_player_name, page_size)
+
+    def win_loss_stints(self, last_player_name, page_size):
+        """A page of /lineups/win-loss-stints rows after last_player_name."""
+        return self._page('win_loss_stints', last_player_name, page_size)
@@ -0,0 +1,173 @@
+"""
+In-process stint computation for a single game.
+
+A game's lineup rows are loaded into array-backed columns, sorted by
+(team, player, period, time_in desc), and walked once, so the work per game is
+linear in the game's lineup rows. A player's stint is a run of rows within one
+period where each row starts no earlier than the previous row ended, the same
+rule scripts.derived_tables uses for player_stint.
+
+Times are seconds remaining in the period, as in lineup. Elapsed game time is
+also reported so on-court intervals can be placed on one game clock.
+"""
+from array import array
+from db.query_registry import query_registry
+
+PERIOD_SECONDS = 720
+OVERTIME_SECONDS = 300
+
+def game_lineups_query(where_clause):
+    return f"""
+    SELECT
+        l.game_id,
+        l.team_id,
+        l.player_id,
+        p.first_name || ' ' || p.last_name AS player_name,
+        l.period,
+        CAST(l.time_in AS DOUBLE PRECISION) AS time_in,
+        CAST(l.time_out AS DOUBLE PRECISION) AS time_out
+    FROM
+        lineup l
+    JOIN
+        players p ON l.player_id = p.player_id
+    {where_clause}
+    ORDER BY
+        l.game_id,
+        l.team_id,
+        l.player_id,
+        l.period,
+        l.time_in DESC
+"""
+
+TEAM_CONDITION = {'team_id': "l.team_id = :team_id"}
+GAME_LINEUPS = query_registry.variants('game_lineups', game_lineups_query, TEAM_CONDITION, required=["l.game_id = :game_id"])
+GAMES_LINEUPS = query_registry.variants('games_lineups', game_lineups_query, TEAM_CONDITION, required=["l.game_id = ANY(:game_ids)"])
+
+
+class LineupColumns:
+    """One game's lineup rows as parallel typed arrays."""
+
+    def __init__(self):
+        self.team_id = array('q')
+        self.player_id = array('q')
+        self.period = array('i')
+        self.time_in = array('d')
+        self.time_out = array('d')
+        self.player_names = {}
+
+    def __len__(self):
+        return len(self.player_id)
+
+    def append(self, team_id, player_id, player_name, period, time_in, time_out):
+        self.team_id.append(team_id)
+        self.player_id.append(player_id)
+        self.period.append(period)
+        self.time_in.append(time_in)
+        self.time_out.append(time_out)
+        self.player_names[player_id] = player_name
+
+
+def _load_lineups(db_session, variants, params, team_id):
+    """Run a GAME_LINEUPS or GAMES_LINEUPS variant and split its rows into {game_id: LineupColumns}."""
+    params = dict(params)
+    conditions = []
+    if team_id is not None:
+        conditions.append('team_id')
+        params['team_id'] = team_id
+
+    games = {}
+    for game_id, *row in variants.get(conditions).execute(db_session, params):
+        columns = games.get(game_id)
+        if columns is None:
+            columns = games[game_id] = LineupColumns()
+        columns.append(*row)
+    return games
+
+
+def load_game_lineups(db_session, game_id, team_id=None):
+    """Fetch a game's lineup rows, optionally for one team, in stint order."""
+    games = _load_lineups(db_session, GAME_LINEUPS, {'game_id': game_id}, team_id)
+    return games.get(game_id, LineupColumns())
+
+
+def load_games_lineups(db_session, game_ids, team_id=None):
+    """
+    Fetch the lineup rows of many games in one query, optionally for one team.
+
+    Returns:
+        dict: {game_id: LineupColumns} in stint order, for the games with lineup rows.
+    """
+    return _load_lineups(db_session, GAMES_LINEUPS, {'game_ids': list(game_ids)}, team_id)
+
+
+def elapsed_seconds(period, time_remaining):
+    """Seconds since tip-off at a point in a period, given the seconds remaining in it."""
+    if period <= 4:
+        period_start = (period - 1) * PERIOD_SECONDS
+        period_length = PERIOD_SECONDS
+    else:
+        period_start = 4 * PERIOD_SECONDS + (period - 5) * OVERTIME_SECONDS
+        period_length = OVERTIME_SECONDS
+    return period_start + period_length - time_remaining
+
+
+def compute_stints(columns):
+    """
+    Compute every player's stints in one pass over columns.
+
+    columns must be sorted by team_id, player_id, period and time_in descending.
+
+    Returns:
+        list: One dict per player, in team and player order, with their stints
+              numbered within each period and their total seconds and minutes.
+    """
+    players = []
+    player = None
+    stint = None
+    previous_time_out = None
+
+    for index in range(len(columns)):
+        team_id = columns.team_id[index]
+        player_id = columns.player_id[index]
+        period = columns.period[index]
+        time_in = columns.time_in[index]
+        time_out = columns.time_out[index]
+
+        if player is None or player['player_id'] != player_id or player['team_id'] != team_id:
+            player = {
+                'team_id': team_id,
+                'player_id': player_id,
+                'player_name': columns.player_names[player_id],
+                'stints': [],
+            }
+            players.append(player)
+            stint = None
+
+        continues = stint is not None and stint['period'] == period and time_in >= previous_time_out
+        previous_time_out = time_out
+        if continues:
+            # Picks up where the previous row left off (or overlaps it); extend the stint
+            stint['time_out'] = min(stint['time_out'], time_out)
+            continue
+
+        stint_number = stint['stint_number'] + 1 if stint is not None and stint['period'] == period else 1
+        stint = {
+            'period': period,
+            'stint_number': stint_number,
+            'time_in': time_in,
+            'time_out': time_out,
+        }
+        player['stints'].append(stint)
+
+    for player in players:
+        seconds_played = 0.0
+        for stint in player['stints']:
+            stint['seconds'] = stint['time_in'] - stint['time_out']
+            stint['start_elapsed'] = elapsed_seconds(stint['period'], stint['time_in'])
+            stint['end_elapsed'] = elapsed_seconds(stint['period'], stint['time_out'])
+            seconds_played += stint['seconds']
+        player['stint_count'] = len(player['stints'])
+        player['seconds_played'] = seconds_played
+        player['minutes_played'] = round(seconds_played / 60, 2)
+
+    return players
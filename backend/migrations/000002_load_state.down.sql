@@ -0,0 +1 @@
+DROP TABLE IF EXISTS load_state;
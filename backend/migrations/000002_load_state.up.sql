@@ -0,0 +1,8 @@
+-- one row per ingested data file, written by scripts/ingest.py after the file loads
+-- byte_size is the size of the file at the last load (a changed file is reloaded whole), content_hash is its sha256
+CREATE TABLE IF NOT EXISTS load_state (
+    file_name TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    byte_size BIGINT NOT NULL,
+    loaded_at TIMESTAMP NOT NULL
+);
@@ -0,0 +1,16 @@
+-- continuous runs on court per player and period, maintained by the loader for the games it touches
+-- a new stint starts when a player's next lineup row in the period does not pick up where the last one ended
+-- run `python -m scripts.derived_tables` once after migrating to backfill existing lineup data
+CREATE TABLE IF NOT EXISTS player_stint (
+    game_id BIGINT NOT NULL REFERENCES game_schedule(game_id),
+    team_id BIGINT NOT NULL REFERENCES teams(team_id),
+    player_id BIGINT NOT NULL REFERENCES players(player_id),
+    period INTEGER NOT NULL,
+    stint_number INTEGER NOT NULL,
+    stint_start NUMERIC(4, 1) NOT NULL,
+    stint_end NUMERIC(4, 1) NOT NULL,
+    CHECK (stint_end <= stint_start),
+    PRIMARY KEY (game_id, team_id, player_id, period, stint_number)
+);
+
+CREATE INDEX idx_player_stint_player_id ON player_stint (player_id);
@@ -0,0 +1,19 @@
+-- per-player stint totals split by win and loss, refreshed by the loader for the players in loaded games
+-- stints here span periods: a player's nth stint of each period counts as one stint of the game
+-- run `python -m scripts.derived_tables` once after migrating to backfill existing data
+CREATE TABLE IF NOT EXISTS player_stint_summary (
+    player_id BIGINT PRIMARY KEY REFERENCES players(player_id),
+    player_name TEXT NOT NULL,
+    total_games INTEGER NOT NULL,
+    total_stints INTEGER NOT NULL,
+    total_stint_duration NUMERIC NOT NULL,
+    total_games_wins INTEGER NOT NULL,
+    total_stints_wins INTEGER NOT NULL,
+    total_stint_duration_wins NUMERIC NOT NULL,
+    total_games_losses INTEGER NOT NULL,
+    total_stints_losses INTEGER NOT NULL,
+    total_stint_duration_losses NUMERIC NOT NULL
+);
+
+-- keyset pagination for /lineups/stint-averages and /lineups/win-loss-stints
+CREATE INDEX idx_player_stint_summary_player_name ON player_stint_summary (player_name);
@@ -0,0 +1,7 @@
+-- one counter per loaded table, bumped by the loader after it writes to that table
+-- the API caches responses per version and re-reads this table to notice new loads
+CREATE TABLE IF NOT EXISTS data_version (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL
+);
@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS idx_game_schedule_away_id_game_date;
+DROP INDEX IF EXISTS idx_game_schedule_home_id_game_date;
+DROP INDEX IF EXISTS idx_game_schedule_game_date;
@@ -0,0 +1,4 @@
+-- schedule endpoints filter on half-open game_date ranges, optionally for one team as home or away
+CREATE INDEX IF NOT EXISTS idx_game_schedule_game_date ON game_schedule (game_date);
+CREATE INDEX IF NOT EXISTS idx_game_schedule_home_id_game_date ON game_schedule (home_id, game_date);
+CREATE INDEX IF NOT EXISTS idx_game_schedule_away_id_game_date ON game_schedule (away_id, game_date);
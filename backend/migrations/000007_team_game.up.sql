@@ -0,0 +1,17 @@
+-- one row per team per game, so schedule and standings queries filter on team_id instead of home_id OR away_id
+-- refreshed by the loader for the games it touches
+-- run `python -m scripts.derived_tables` once after migrating to backfill existing games
+CREATE TABLE IF NOT EXISTS team_game (
+    game_id BIGINT NOT NULL REFERENCES game_schedule(game_id),
+    team_id BIGINT NOT NULL REFERENCES teams(team_id),
+    opponent_id BIGINT NOT NULL REFERENCES teams(team_id),
+    location TEXT NOT NULL CHECK (location IN ('home', 'away')),
+    game_date TIMESTAMP NOT NULL,
+    points_for INTEGER NOT NULL,
+    points_against INTEGER NOT NULL,
+    result CHAR(1) CHECK (result IN ('W', 'L')),
+    PRIMARY KEY (game_id, team_id)
+);
+
+CREATE INDEX idx_team_game_team_id_game_date ON team_game (team_id, game_date);
+CREATE INDEX idx_team_game_game_date ON team_game (game_date);
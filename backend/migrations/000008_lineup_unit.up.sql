@@ -0,0 +1,19 @@
+-- the five players on court for each lineup row, as a sorted player_id array and a hash of it
+-- refreshed by the loader for the games it touches, so unit queries never re-pivot lineup
+-- run `python -m scripts.derived_tables` once after migrating to backfill existing lineup data
+CREATE TABLE IF NOT EXISTS lineup_unit (
+    game_id BIGINT NOT NULL REFERENCES game_schedule(game_id),
+    team_id BIGINT NOT NULL REFERENCES teams(team_id),
+    lineup_num INTEGER NOT NULL,
+    period INTEGER NOT NULL,
+    time_in NUMERIC(4, 1) NOT NULL,
+    time_out NUMERIC(4, 1) NOT NULL,
+    player_ids BIGINT[] NOT NULL,
+    unit_hash BIGINT NOT NULL,
+    CHECK (time_out <= time_in),
+    PRIMARY KEY (game_id, team_id, lineup_num, period, time_in)
+);
+
+-- exact unit lookups by hash, and searches for units containing a set of players
+CREATE INDEX idx_lineup_unit_unit_hash ON lineup_unit (unit_hash);
+CREATE INDEX idx_lineup_unit_player_ids ON lineup_unit USING GIN (player_ids);
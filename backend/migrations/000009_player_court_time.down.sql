@@ -0,0 +1 @@
+DROP TABLE IF EXISTS player_court_time;
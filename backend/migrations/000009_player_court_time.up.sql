@@ -0,0 +1,13 @@
+-- each player's on-court time in a game as a bitset over the game's deciseconds (see helpers/court_time.py)
+-- refreshed by the loader for the games it touches; shared minutes are the popcount of ANDed bitsets
+-- run `python -m scripts.derived_tables` once after migrating to backfill existing lineup data
+CREATE TABLE IF NOT EXISTS player_court_time (
+    player_id BIGINT NOT NULL REFERENCES players(player_id),
+    game_id BIGINT NOT NULL REFERENCES game_schedule(game_id),
+    team_id BIGINT NOT NULL REFERENCES teams(team_id),
+    seconds_on_court NUMERIC(6, 1) NOT NULL,
+    on_court BYTEA NOT NULL,
+    PRIMARY KEY (player_id, game_id)
+);
+
+CREATE INDEX idx_player_court_time_game_id ON player_court_time (game_id);
@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS idx_game_schedule_game_date ON game_schedule (game_date);
+DROP INDEX IF EXISTS idx_game_schedule_game_date_game_id;
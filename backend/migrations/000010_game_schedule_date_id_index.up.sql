@@ -0,0 +1,4 @@
+-- /lineups/player-stints walks games in (game_date, game_id) order from its cursor
+-- this covers the game_date ranges of idx_game_schedule_game_date as well, so that index is replaced
+CREATE INDEX IF NOT EXISTS idx_game_schedule_game_date_game_id ON game_schedule (game_date, game_id);
+DROP INDEX IF EXISTS idx_game_schedule_game_date;
@@ -0,0 +1,12 @@
+-- shared tier of the API's result cache (see helpers/result_cache.py), read and written by every worker
+-- unlogged: writes skip the WAL and the table is emptied after a crash, which a cache can afford
+CREATE UNLOGGED TABLE IF NOT EXISTS result_cache (
+    key TEXT PRIMARY KEY,
+    value BYTEA NOT NULL,
+    content_type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_result_cache_expires_at ON result_cache (expires_at);
@@ -0,0 +1 @@
+DROP INDEX IF EXISTS idx_result_cache_stored_at_key;
@@ -0,0 +1,2 @@
+-- the shared result cache evicts its oldest entries first (see PostgresTier in helpers/result_cache.py)
+CREATE INDEX IF NOT EXISTS idx_result_cache_stored_at_key ON result_cache (stored_at, key);
@@ -0,0 +1,209 @@
+"""
+COPY based bulk loading for the large data files (lineup.json and roster.json).
+
+Records are streamed out of the JSON file with ijson, rendered as CSV and fed to
+Postgres with COPY FROM STDIN into a temporary staging table. The staging table is
+then merged into the real table with a single set-based INSERT ... ON CONFLICT, and
+the whole load is committed once.
+"""
+import csv
+import ijson
+import logging
+import time
+from sqlalchemy import text
+from helpers.json_to_db_helpers import convert_json_keys_to_snake_case, check_contract_type
+from scripts.load_data import LINEUP_CONFLICT_FIELDS
+from db.data_version import bump_data_version
+from scripts.derived_tables import refresh_lineup_tables
+
+LINEUP_COLUMNS = ['team_id', 'player_id', 'game_id', 'lineup_num', 'period', 'time_in', 'time_out']
+ROSTER_COLUMNS = ['player_id', 'team_id', 'first_name', 'last_name', 'position', 'contract_type']
+# Marks NULL in the CSV given to COPY (its NULL option), leaving empty fields as ''
+COPY_NULL = '\\N'
+
+
+class CsvRecordStream:
+    """
+    Read-only file object that renders dict records as CSV lines on demand,
+    so COPY FROM STDIN can consume a record generator without buffering the file.
+    None values are written as COPY_NULL and empty strings as empty fields, so
+    COPY keeps '' as the batch and upsert loaders do rather than reading NULL.
+    """
+
+    def __init__(self, records, columns):
+        self._records = iter(records)
+        self._columns = columns
+        self._chunks = []
+        self._buffered = 0
+        self._writer = csv.writer(self, lineterminator='\n')
+        self.rows = 0
+
+    def write(self, line):
+        # Called by csv.writer for each rendered row
+        self._chunks.append(line)
+        self._buffered += len(line)
+
+    def _fill(self, size):
+        while size < 0 or self._buffered < size:
+            record = next(self._records, None)
+            if record is None:
+                break
+            self._writer.writerow([
+                COPY_NULL if value is None else value
+                for value in (record.get(column) for column in self._columns)
+            ])
+            self.rows += 1
+
+    def read(self, size=-1):
+        self._fill(size)
+        data = ''.join(self._chunks)
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+            self._chunks = [rest]
+            self._buffered = len(rest)
+        else:
+            self._chunks = []
+            self._buffered = 0
+        return data
+
+    def readline(self, size=-1):
+        # COPY only ever calls read(); readline is here to satisfy the file protocol
+        return self.read(size)
+
+
+def copy_to_staging(session, records, table_name, columns):
+    """
+    COPY records into a temporary staging table shaped like table_name.
+
+    The staging table is dropped on commit. A load_seq column records file order
+    so the merge can keep the last occurrence of a duplicated key.
+
+    Returns:
+        tuple: (staging table name, number of rows copied)
+    """
+    staging_table = f"{table_name}_staging"
+    column_list = ', '.join(columns)
+    connection = session.connection()
+    connection.execute(text(f"""
+        CREATE TEMP TABLE {staging_table} ON COMMIT DROP AS
+        SELECT {column_list} FROM {table_name} WITH NO DATA
+    """))
+    connection.execute(text(f"ALTER TABLE {staging_table} ADD COLUMN load_seq BIGSERIAL"))
+
+    stream = CsvRecordStream(records, columns)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging_table} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", stream)
+    finally:
+        cursor.close()
+
+    return staging_table, stream.rows
+
+
+def stream_json_records(file_path, transform=None):
+    """Yield snake_case records from a JSON array file, optionally transformed."""
+    # Binary mode: ijson parses bytes directly and warns on text files
+    with open(file_path, 'rb') as file:
+        for record in ijson.items(file, 'item'):
+            snake_case_record = convert_json_keys_to_snake_case(record)
+            if transform is not None:
+                snake_case_record = transform(snake_case_record)
+            yield snake_case_record
+
+
+def log_throughput(file_path, rows, merged, seconds):
+    rows_per_second = rows / seconds if seconds else float(rows)
+    logging.info(f"COPY loaded {rows} records from {file_path} in {seconds:.2f}s ({rows_per_second:.0f} rows/sec), merged {merged}")
+    return {
+        'rows': rows,
+        'merged': merged,
+        'seconds': seconds,
+        'rows_per_second': rows_per_second,
+    }
+
+
+def copy_lineups(session, file_path):
+    """
+    Bulk load lineup.json with COPY and a single upsert into lineup.
+
+    The derived tables are refreshed for the loaded games in the same transaction.
+
+    Returns:
+        dict: rows copied, rows merged, elapsed seconds, rows_per_second and the game_ids loaded.
+    """
+    start = time.perf_counter()
+    staging_table, rows = copy_to_staging(session, stream_json_records(file_path), 'lineup', LINEUP_COLUMNS)
+
+    column_list = ', '.join(LINEUP_COLUMNS)
+    conflict_list = ', '.join(LINEUP_CONFLICT_FIELDS)
+    update_list = ', '.join(
+        f"{column} = EXCLUDED.{column}" for column in LINEUP_COLUMNS if column not in LINEUP_CONFLICT_FIELDS
+    )
+    # DISTINCT ON keeps the last duplicate in file order; ON CONFLICT cannot touch a row twice
+    result = session.execute(text(f"""
+        INSERT INTO lineup ({column_list})
+        SELECT DISTINCT ON ({conflict_list}) {column_list}
+        FROM {staging_table}
+        ORDER BY {conflict_list}, load_seq DESC
+        ON CONFLICT ({conflict_list}) DO UPDATE SET {update_list}
+    """))
+    merged = result.rowcount
+    game_ids = {row.game_id for row in session.execute(text(f"SELECT DISTINCT game_id FROM {staging_table}"))}
+    refresh_lineup_tables(session, game_ids)
+
+    stats = log_throughput(file_path, rows, merged, time.perf_counter() - start)
+    stats['game_ids'] = game_ids
+    return stats
+
+
+def copy_roster(session, file_path):
+    """
+    Bulk load roster.json with COPY.
+
+    Like load_roster, missing players are created from the roster names and only
+    roster entries that do not exist yet are inserted. Bumps the roster and
+    players data versions.
+
+    Returns:
+        dict: rows copied, roster rows inserted, elapsed seconds and rows_per_second.
+    """
+    def fix_contract_type(record):
+        record['contract_type'] = check_contract_type(record['contract_type'])
+        return record
+
+    start = time.perf_counter()
+    staging_table, rows = copy_to_staging(
+        session, stream_json_records(file_path, fix_contract_type), 'roster', ROSTER_COLUMNS
+    )
+
+    players = session.execute(text(f"""
+        INSERT INTO players (player_id, first_name, last_name)
+        SELECT DISTINCT ON (player_id) player_id, first_name, last_name
+        FROM {staging_table}
+        ORDER BY player_id, load_seq
+        ON CONFLICT (player_id) DO NOTHING
+    """))
+    logging.info(f"Inserted {players.rowcount} new players")
+
+    column_list = ', '.join(ROSTER_COLUMNS)
+    result = session.execute(text(f"""
+        INSERT INTO roster ({column_list})
+        SELECT DISTINCT ON (player_id, team_id) {column_list}
+        FROM {staging_table}
+        ORDER BY player_id, team_id, load_seq
+        ON CONFLICT (player_id, team_id) DO NOTHING
+    """))
+    merged = result.rowcount
+    bump_data_version(session, 'roster')
+    bump_data_version(session, 'players')
+    session.commit()
+
+    return log_throughput(file_path, rows, merged, time.perf_counter() - start)
+
+
+# Loaders used in place of the batch loaders in scripts.load_data.DATA_FILES when
+# ingesting with --engine copy
+COPY_LOADERS = {
+    'roster.json': copy_roster,
+    'lineup.json': copy_lineups,
+}
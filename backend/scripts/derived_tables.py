@@ -0,0 +1,377 @@
+"""
+Tables derived from the loaded data, kept up to date by the loaders.
+
+Each refresh function takes the game_ids a load touched and rebuilds only the
+rows for those games, so the cost of a load does not grow with season size.
+Passing game_ids=None rebuilds the whole table.
+
+Usage (from the backend directory), to rebuild everything:
+    python -m scripts.derived_tables
+"""
+import argparse
+import logging
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from config.settings import DATABASE_URL
+from db.data_version import bump_data_version
+from helpers.court_time import on_court_bitsets, seconds, to_bytes
+from helpers.lineup_units import unit_hash_sql
+
+
+def id_filter(column, ids, param='ids'):
+    """SQL condition and params limiting column to ids (no limit for None)."""
+    if ids is None:
+        return "TRUE", {}
+    return f"{column} = ANY(:{param})", {param: sorted(ids)}
+
+
+def game_filter(column, game_ids):
+    return id_filter(column, game_ids, 'game_ids')
+
+
+def stint_players(session, game_ids):
+    """player_ids with stints in the given games."""
+    condition, params = game_filter('game_id', game_ids)
+    return {row.player_id for row in session.execute(text(f"SELECT DISTINCT player_id FROM player_stint WHERE {condition}"), params)}
+
+
+def refresh_team_games(session, game_ids=None):
+    """
+    Rebuild team_game for the given games: one row for the home team and one
+    for the away team of every game. Does not commit.
+    """
+    if game_ids is not None and not game_ids:
+        return
+    condition, params = game_filter('game_id', game_ids)
+
+    session.execute(text(f"DELETE FROM team_game WHERE {condition}"), params)
+    result = session.execute(text(f"""
+        INSERT INTO team_game (game_id, team_id, opponent_id, location, game_date, points_for, points_against, result)
+        SELECT
+            game_id,
+            home_id,
+            away_id,
+            'home',
+            game_date,
+            home_score,
+            away_score,
+            CASE
+                WHEN home_score > away_score THEN 'W'
+                WHEN home_score < away_score THEN 'L'
+            END
+        FROM
+            game_schedule
+        WHERE
+            {condition}
+
+        UNION ALL
+
+        SELECT
+            game_id,
+            away_id,
+            home_id,
+            'away',
+            game_date,
+            away_score,
+            home_score,
+            CASE
+                WHEN away_score > home_score THEN 'W'
+                WHEN away_score < home_score THEN 'L'
+            END
+        FROM
+            game_schedule
+        WHERE
+            {condition}
+    """), params)
+    logging.info(f"Refreshed {result.rowcount} team games for {len(game_ids) if game_ids is not None else 'all'} games")
+
+
+def refresh_player_stints(session, game_ids=None):
+    """
+    Rebuild player_stint for the given games.
+
+    A stint is a player's run of lineup rows within one period where each row
+    starts where the previous one ended. Does not commit.
+    """
+    if game_ids is not None and not game_ids:
+        return
+    condition, params = game_filter('game_id', game_ids)
+    lineup_condition, _ = game_filter('l.game_id', game_ids)
+
+    session.execute(text(f"DELETE FROM player_stint WHERE {condition}"), params)
+    result = session.execute(text(f"""
+        WITH player_lineups AS (
+            SELECT
+                l.game_id,
+                l.team_id,
+                l.player_id,
+                l.period,
+                l.time_in,
+                l.time_out,
+                CASE
+                    WHEN LAG(l.time_out) OVER w IS NULL
+                    OR l.time_in < LAG(l.time_out) OVER w THEN 1
+                    ELSE 0
+                END AS new_stint_flag
+            FROM
+                lineup l
+            WHERE
+                {lineup_condition}
+                -- player_stint.player_id is NOT NULL; the loader keeps lineup rows without a player
+                AND l.player_id IS NOT NULL
+            WINDOW w AS (
+                PARTITION BY l.game_id, l.team_id, l.player_id, l.period
+                ORDER BY l.time_in DESC
+            )
+        ),
+        player_lineups_with_group AS (
+            SELECT
+                pl.*,
+                SUM(pl.new_stint_flag) OVER (
+                    PARTITION BY pl.game_id, pl.team_id, pl.player_id, pl.period
+                    ORDER BY pl.time_in DESC
+                ) AS stint_number
+            FROM
+                player_lineups pl
+        )
+        INSERT INTO player_stint (game_id, team_id, player_id, period, stint_number, stint_start, stint_end)
+        SELECT
+            game_id,
+            team_id,
+            player_id,
+            period,
+            stint_number,
+            MAX(time_in),
+            MIN(time_out)
+        FROM
+            player_lineups_with_group
+        GROUP BY
+            game_id,
+            team_id,
+            player_id,
+            period,
+            stint_number
+    """), params)
+    logging.info(f"Refreshed {result.rowcount} player stints for {len(game_ids) if game_ids is not None else 'all'} games")
+
+
+def refresh_lineup_units(session, game_ids=None):
+    """
+    Rebuild lineup_unit for the given games: the sorted player_ids of every
+    lineup row and their hash. Does not commit.
+    """
+    if game_ids is not None and not game_ids:
+        return
+    condition, params = game_filter('game_id', game_ids)
+
+    session.execute(text(f"DELETE FROM lineup_unit WHERE {condition}"), params)
+    result = session.execute(text(f"""
+        WITH units AS (
+            SELECT
+                game_id,
+                team_id,
+                lineup_num,
+                period,
+                time_in,
+                MIN(time_out) AS time_out,
+                ARRAY_AGG(player_id ORDER BY player_id) AS player_ids
+            FROM
+                lineup
+            WHERE
+                {condition}
+                AND player_id IS NOT NULL
+            GROUP BY
+                game_id,
+                team_id,
+                lineup_num,
+                period,
+                time_in
+        )
+        INSERT INTO lineup_unit (game_id, team_id, lineup_num, period, time_in, time_out, player_ids, unit_hash)
+        SELECT
+            game_id,
+            team_id,
+            lineup_num,
+            period,
+            time_in,
+            time_out,
+            player_ids,
+            {unit_hash_sql('player_ids')}
+        FROM
+            units
+    """), params)
+    logging.info(f"Refreshed {result.rowcount} lineup units for {len(game_ids) if game_ids is not None else 'all'} games")
+
+
+def refresh_player_court_time(session, game_ids=None, batch_size=1000):
+    """
+    Rebuild player_court_time for the given games from their lineup rows.
+    The bitsets are built in Python; see helpers.court_time. Does not commit.
+    """
+    if game_ids is not None and not game_ids:
+        return
+    condition, params = game_filter('game_id', game_ids)
+
+    rows = session.execute(text(f"""
+        SELECT game_id, team_id, player_id, period, time_in, time_out
+        FROM lineup
+        WHERE {condition} AND player_id IS NOT NULL
+    """), params)
+    records = [
+        {
+            'player_id': player_id,
+            'game_id': game_id,
+            'team_id': team_id,
+            'seconds_on_court': seconds(bitset),
+            'on_court': to_bytes(bitset),
+        }
+        for (game_id, team_id, player_id), bitset in on_court_bitsets(rows).items()
+    ]
+
+    session.execute(text(f"DELETE FROM player_court_time WHERE {condition}"), params)
+    insert = text("""
+        INSERT INTO player_court_time (player_id, game_id, team_id, seconds_on_court, on_court)
+        VALUES (:player_id, :game_id, :team_id, :seconds_on_court, :on_court)
+    """)
+    for start in range(0, len(records), batch_size):
+        session.execute(insert, records[start:start + batch_size])
+    logging.info(f"Refreshed {len(records)} player court times for {len(game_ids) if game_ids is not None else 'all'} games")
+
+
+def refresh_player_stint_summaries(session, player_ids=None):
+    """
+    Rebuild player_stint_summary for the given players from player_stint.
+
+    Stints are numbered within each period, so a player's nth stint of every
+    period in a game is summarised as a single stint of that game. Does not commit.
+    """
+    if player_ids is not None and not player_ids:
+        return
+    condition, params = id_filter('player_id', player_ids, 'player_ids')
+    stint_condition, _ = id_filter('ps.player_id', player_ids, 'player_ids')
+
+    session.execute(text(f"DELETE FROM player_stint_summary WHERE {condition}"), params)
+    result = session.execute(text(f"""
+        WITH stints AS (
+            SELECT
+                ps.game_id,
+                ps.team_id,
+                ps.player_id,
+                ps.stint_number,
+                MAX(ps.stint_start) - MIN(ps.stint_end) AS stint_duration
+            FROM
+                player_stint ps
+            WHERE
+                {stint_condition}
+            GROUP BY
+                ps.game_id,
+                ps.team_id,
+                ps.player_id,
+                ps.stint_number
+        ),
+        stint_results AS (
+            SELECT
+                s.*,
+                CASE
+                    WHEN (s.team_id = gs.home_id AND gs.home_score > gs.away_score)
+                    OR (s.team_id = gs.away_id AND gs.away_score > gs.home_score) THEN 'Win'
+                    ELSE 'Loss'
+                END AS result
+            FROM
+                stints s
+            JOIN
+                game_schedule gs ON s.game_id = gs.game_id
+        )
+        INSERT INTO player_stint_summary (
+            player_id,
+            player_name,
+            total_games,
+            total_stints,
+            total_stint_duration,
+            total_games_wins,
+            total_stints_wins,
+            total_stint_duration_wins,
+            total_games_losses,
+            total_stints_losses,
+            total_stint_duration_losses
+        )
+        SELECT
+            p.player_id,
+            p.first_name || ' ' || p.last_name,
+            -- Total stats
+            COUNT(DISTINCT sr.game_id),
+            COUNT(*),
+            SUM(sr.stint_duration),
+            -- Wins stats
+            COUNT(DISTINCT CASE WHEN sr.result = 'Win' THEN sr.game_id END),
+            COUNT(CASE WHEN sr.result = 'Win' THEN 1 END),
+            SUM(CASE WHEN sr.result = 'Win' THEN sr.stint_duration ELSE 0 END),
+            -- Losses stats
+            COUNT(DISTINCT CASE WHEN sr.result = 'Loss' THEN sr.game_id END),
+            COUNT(CASE WHEN sr.result = 'Loss' THEN 1 END),
+            SUM(CASE WHEN sr.result = 'Loss' THEN sr.stint_duration ELSE 0 END)
+        FROM
+            stint_results sr
+        JOIN
+            players p ON sr.player_id = p.player_id
+        GROUP BY
+            p.player_id,
+            p.first_name,
+            p.last_name
+    """), params)
+    logging.info(f"Refreshed {result.rowcount} player stint summaries")
+
+
+def refresh_lineup_tables(session, game_ids=None):
+    """Refresh every table derived from lineup for the given games, bump the lineup data version and commit."""
+    # Players in the games before and after the refresh, in case a reload drops one
+    player_ids = None if game_ids is None else stint_players(session, game_ids)
+    refresh_player_stints(session, game_ids)
+    refresh_lineup_units(session, game_ids)
+    refresh_player_court_time(session, game_ids)
+    if player_ids is not None:
+        player_ids |= stint_players(session, game_ids)
+    refresh_player_stint_summaries(session, player_ids)
+    bump_data_version(session, 'lineup')
+    session.commit()
+
+
+def refresh_schedule_tables(session, game_ids=None):
+    """Refresh the tables that depend on game_schedule for the given games and commit."""
+    refresh_team_games(session, game_ids)
+    # Game results feed the win/loss split of the stint summaries
+    player_ids = None if game_ids is None else stint_players(session, game_ids)
+    refresh_player_stint_summaries(session, player_ids)
+    session.commit()
+
+
+def refresh_player_tables(session, player_ids=None):
+    """Refresh the tables that depend on players for the given players and commit."""
+    # Player names are denormalised into the stint summaries
+    refresh_player_stint_summaries(session, player_ids)
+    session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the tables derived from the loaded data.")
+    parser.add_argument('--database-url', default=DATABASE_URL, help="Database to rebuild")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    engine = create_engine(args.database_url)
+    session = sessionmaker(bind=engine)()
+    try:
+        refresh_team_games(session)
+        # team_game is served as game_schedule data
+        bump_data_version(session, 'game_schedule')
+        refresh_lineup_tables(session)
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,13 @@
 class PlayerNotFoundError(Exception):
     """Custom exception when player is not found in the Player table."""
-    pass
\ No newline at end of file
+    pass
+
+class PartitionLoadError(Exception):
+    """Raised when one or more partitions of a parallel load fail."""
+
+    def __init__(self, failed_partitions):
+        self.failed_partitions = failed_partitions
+        details = "; ".join(
+            f"partition {result['partition']}: {result['error']}" for result in failed_partitions
+        )
+        super().__init__(f"{len(failed_partitions)} partition(s) failed: {details}")
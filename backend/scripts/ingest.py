@@ -0,0 +1,123 @@
+"""
+Incremental, checkpointed ingestion of the JSON data files.
+
+Each file in scripts.load_data.DATA_FILES is fingerprinted with a sha256 of its
+contents. The fingerprint is stored in the load_state table once the file has
+loaded, so later runs only load files that are new or have changed.
+
+With --engine copy, roster.json and lineup.json are loaded through the COPY
+based loaders in scripts.bulk_load instead of the batched upserts. With
+--engine parallel, lineup.json is split by game_id range and loaded on a
+process pool by scripts.parallel_load.
+
+Usage (from the backend directory):
+    python -m scripts.ingest [--data-dir dev_test_data] [--force] [--engine batch|copy|parallel] [file_name ...]
+"""
+import argparse
+import hashlib
+import logging
+import os
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from config.settings import DATABASE_URL
+from db.models import LoadState
+from scripts.load_data import DATA_DIR, DATA_FILES
+from scripts.bulk_load import COPY_LOADERS
+from scripts.parallel_load import PARALLEL_LOADERS
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(file_path):
+    """
+    Hash a file in fixed size chunks.
+
+    Returns:
+        tuple: (sha256 hex digest, size of the file in bytes)
+    """
+    digest = hashlib.sha256()
+    byte_size = 0
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            byte_size += len(chunk)
+    return digest.hexdigest(), byte_size
+
+
+def run_ingest(session, data_dir=DATA_DIR, file_names=None, force=False, engine='batch'):
+    """
+    Load every new or changed data file and checkpoint it in load_state.
+
+    Args:
+        session: SQLAlchemy session to load with.
+        data_dir (str): Directory holding the files listed in DATA_FILES.
+        file_names (iterable, optional): Only consider these files. Defaults to all of them.
+        force (bool): Reload files even if their fingerprint has not changed.
+        engine (str): 'batch' for the batched upserts, 'copy' for COPY based bulk loading,
+            'parallel' for partitioned lineup loading on a process pool.
+
+    Returns:
+        list: Names of the files that were loaded, in load order.
+    """
+    loaded = []
+    for file_name, loader in DATA_FILES:
+        if file_names is not None and file_name not in file_names:
+            continue
+        if engine == 'copy':
+            loader = COPY_LOADERS.get(file_name, loader)
+        elif engine == 'parallel':
+            loader = PARALLEL_LOADERS.get(file_name, loader)
+
+        file_path = os.path.join(data_dir, file_name)
+        if not os.path.exists(file_path):
+            logging.warning(f"Skipping {file_name}: {file_path} does not exist")
+            continue
+
+        content_hash, byte_size = file_fingerprint(file_path)
+        state = session.get(LoadState, file_name)
+        if state is not None and state.content_hash == content_hash and not force:
+            logging.info(f"Skipping {file_name}: unchanged since {state.loaded_at}")
+            continue
+
+        logging.info(f"Loading {file_name} ({byte_size} bytes)")
+        loader(session, file_path)
+
+        # Only checkpoint once the loader has committed all of its batches
+        session.merge(LoadState(
+            file_name=file_name,
+            content_hash=content_hash,
+            byte_size=byte_size,
+            loaded_at=datetime.utcnow()
+        ))
+        session.commit()
+        loaded.append(file_name)
+
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load new or changed data files into the database.")
+    parser.add_argument('file_names', nargs='*', help="Only consider these files (default: all data files)")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Directory holding the data files")
+    parser.add_argument('--database-url', default=DATABASE_URL, help="Database to load into")
+    parser.add_argument('--force', action='store_true', help="Reload files even if they have not changed")
+    parser.add_argument('--engine', choices=['batch', 'copy', 'parallel'], default='batch', help="Loader for roster.json and lineup.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    engine = create_engine(args.database_url)
+    session = sessionmaker(bind=engine)()
+    try:
+        loaded = run_ingest(session, args.data_dir, args.file_names or None, args.force, args.engine)
+    finally:
+        session.close()
+    logging.info(f"Loaded {len(loaded)} file(s): {', '.join(loaded) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,86 @@
-import json
 import ijson
 from helpers.json_to_db_helpers import camel_to_snake, convert_json_keys_to_snake_case, check_contract_type
+from sqlalchemy import UniqueConstraint
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import os
 import re
+import time
 import logging
 from db.models import Team, TeamAffiliate, Roster, Player, GameSchedule, Lineup
+from db.data_version import bump_data_version
+from scripts.derived_tables import refresh_lineup_tables, refresh_schedule_tables, refresh_player_tables
 
 # Load JSON data into the database
-def load_json_data(session, file_path, model_class):
+def load_json_data(session, file_path, model_class, batch_size=1000):
+    """
+    Stream a JSON array file into model_class's table with chunked upserts.
+
+    Rows are matched on the model's primary key, or on its first unique constraint
+    when the records do not carry the primary key. Models with neither are inserted.
+
+    Returns:
+        set: The key values of the loaded records (tuples for composite keys),
+             empty when the model has no key to match on.
+    """
+    records_batch = []
+    conflict_fields = None
+    count_inserts = 0
+    keys = set()
 
-    with open(file_path, 'r') as file:
-        data = json.load(file)
-        for record in data:
+    with open(file_path, 'rb') as file:
+        for record in ijson.items(file, 'item', use_float=True):
             snake_case_record = convert_json_keys_to_snake_case(record)  # Convert keys
-            session.merge(model_class(**snake_case_record))  # Use merge to handle inserts/updates
-        session.commit()
+            if not records_batch:
+                conflict_fields = get_conflict_fields(model_class, snake_case_record)
+            if conflict_fields:
+                key = tuple(snake_case_record[name] for name in conflict_fields)
+                keys.add(key[0] if len(key) == 1 else key)
+            records_batch.append(snake_case_record)
+
+            if len(records_batch) >= batch_size:
+                upsert_records(session, model_class, records_batch, conflict_fields)
+                count_inserts += len(records_batch)
+                records_batch.clear()
+
+        # Process any remaining records
+        if records_batch:
+            upsert_records(session, model_class, records_batch, conflict_fields)
+            count_inserts += len(records_batch)
+
+    logging.info(f"Upserted {count_inserts} {model_class.__tablename__} records")
+    return keys
+
+def load_teams(session, file_path):
+    """Upsert team.json and bump the teams data version."""
+    load_json_data(session, file_path, Team)
+    bump_data_version(session, Team.__tablename__)
+    session.commit()
+
+def load_game_schedule(session, file_path):
+    """Upsert game_schedule.json, refresh the tables that depend on the games it touched and bump its data version."""
+    game_ids = load_json_data(session, file_path, GameSchedule)
+    bump_data_version(session, GameSchedule.__tablename__)
+    refresh_schedule_tables(session, game_ids)
+
+def load_players(session, file_path):
+    """Upsert player.json, refresh the tables that depend on the players it touched and bump its data version."""
+    player_ids = load_json_data(session, file_path, Player)
+    bump_data_version(session, Player.__tablename__)
+    refresh_player_tables(session, player_ids)
+
+def load_team_affiliates(session, file_path):
+    """Upsert team_affiliate.json and bump the team_affiliate data version."""
+    load_json_data(session, file_path, TeamAffiliate)
+    bump_data_version(session, TeamAffiliate.__tablename__)
+    session.commit()
+
+def load_rosters(session, file_path):
+    """Load roster.json, which can also add players, and bump the roster and players data versions."""
+    load_roster(session, file_path, Roster, Player)
+    bump_data_version(session, Roster.__tablename__)
+    bump_data_version(session, Player.__tablename__)
+    session.commit()
 
 def load_roster(session, file_path, model_roster, model_player, batch_size=1000):
     existing_players = {player.player_id for player in session.query(model_player.player_id).all()}
@@ -28,7 +94,7 @@ def load_roster(session, file_path, model_roster, model_player, batch_size=1000)
     roster_records = []
     player_records = []
 
-    with open(file_path, 'r') as file:
+    with open(file_path, 'rb') as file:
         for record in ijson.items(file, 'item'):
             snake_case_record = convert_json_keys_to_snake_case(record)
             player_id = snake_case_record['player_id']
@@ -78,58 +144,122 @@ def load_roster(session, file_path, model_roster, model_player, batch_size=1000)
 
 
 
-# Load all the required data
-def load_data(session):
-
-    load_json_data(session, 'dev_test_data/team.json', Team)
-    load_json_data(session, 'dev_test_data/team_affiliate.json', TeamAffiliate)
-    load_json_data(session, 'dev_test_data/game_schedule.json', GameSchedule)
-    load_json_data(session, 'dev_test_data/player.json', Player)
-    load_roster(session, 'dev_test_data/roster.json', Roster, Player)
-
-    # for the lineups
-    def load_large_json(session, file_path, model_class, batch_size=1000):
-        conflict_fields = ['team_id', 'player_id', 'game_id', 'period', 'time_in', 'lineup_num']
-        records_batch = []
-        count_inserts = 0
-
-        with open(file_path, 'r') as file:
-            for record in ijson.items(file, 'item'):
-                snake_case_record = convert_json_keys_to_snake_case(record)
-                records_batch.append(snake_case_record)
-
-                if len(records_batch) >= batch_size:
-                    upsert_records(session, model_class, records_batch, conflict_fields)
-                    count_inserts += len(records_batch)
-                    records_batch.clear()
-
-            # Process any remaining records
-            if records_batch:
+LINEUP_CONFLICT_FIELDS = ['team_id', 'player_id', 'game_id', 'period', 'time_in', 'lineup_num']
+
+# for the lineups
+def load_large_json(session, file_path, model_class, batch_size=1000):
+    """Stream lineup records into model_class in batches. Returns the game_ids seen."""
+    conflict_fields = LINEUP_CONFLICT_FIELDS
+    records_batch = []
+    count_inserts = 0
+    game_ids = set()
+    start = time.perf_counter()
+
+    with open(file_path, 'rb') as file:
+        for record in ijson.items(file, 'item'):
+            snake_case_record = convert_json_keys_to_snake_case(record)
+            records_batch.append(snake_case_record)
+            game_ids.add(snake_case_record['game_id'])
+
+            if len(records_batch) >= batch_size:
                 upsert_records(session, model_class, records_batch, conflict_fields)
                 count_inserts += len(records_batch)
+                records_batch.clear()
+
+        # Process any remaining records
+        if records_batch:
+            upsert_records(session, model_class, records_batch, conflict_fields)
+            count_inserts += len(records_batch)
+
+    seconds = time.perf_counter() - start
+    logging.info("Finished processing large JSON file")
+    logging.info(f"Processed {count_inserts} records in {seconds:.2f}s ({count_inserts / seconds if seconds else count_inserts:.0f} rows/sec)")
+    return game_ids
 
-        logging.info("Finished processing large JSON file")
-        logging.info(f"Processed {count_inserts} records")
 
+def load_lineups(session, file_path):
+    """Upsert lineup.json and refresh the derived tables for the games it touched."""
+    game_ids = load_large_json(session, file_path, Lineup)
+    refresh_lineup_tables(session, game_ids)
 
 
+DATA_DIR = 'dev_test_data'
+
+# Files in load order: later files reference rows created by earlier ones
+DATA_FILES = [
+    ('team.json', load_teams),
+    ('team_affiliate.json', load_team_affiliates),
+    ('game_schedule.json', load_game_schedule),
+    ('player.json', load_players),
+    ('roster.json', load_rosters),
+    ('lineup.json', load_lineups),
+]
+
+# Load all the required data
+def load_data(session, data_dir=DATA_DIR, file_names=None):
+    """
+    Load the JSON files in data_dir into the database.
 
-    load_large_json(session, 'dev_test_data/lineup.json', Lineup)
+    Args:
+        session: SQLAlchemy session to load with.
+        data_dir (str): Directory holding the files listed in DATA_FILES.
+        file_names (iterable, optional): Only load these files. Defaults to all of them.
+    """
+    for file_name, loader in DATA_FILES:
+        if file_names is not None and file_name not in file_names:
+            continue
+        loader(session, os.path.join(data_dir, file_name))
 
 #------- Helper functions -------
 
-from sqlalchemy.dialects.postgresql import insert
+def get_conflict_fields(model_class, record):
+    """
+    Pick the columns that identify an existing row for record.
+
+    Returns the primary key columns if the record has values for all of them,
+    otherwise the columns of the first unique constraint the record covers,
+    otherwise None.
+    """
+    table = model_class.__table__
+    primary_key = [column.name for column in table.primary_key.columns]
+    if all(record.get(name) is not None for name in primary_key):
+        return primary_key
+
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            unique_fields = [column.name for column in constraint.columns]
+            if all(name in record for name in unique_fields):
+                return unique_fields
+
+    return None
+
+def dialect_insert(session, model_class):
+    """Build an INSERT for the session's database that supports ON CONFLICT."""
+    if session.get_bind().dialect.name == 'sqlite':
+        return sqlite_insert(model_class)
+    return insert(model_class)
 
 def upsert_records(session, model_class, records, conflict_fields):
-    stmt = insert(model_class).values(records)
-    
-    # Exclude primary keys and conflict fields from the update
-    update_dict = {c.name: c for c in stmt.excluded if c.name not in conflict_fields and not c.primary_key}
-    
-    stmt = stmt.on_conflict_do_update(
-        index_elements=conflict_fields,
-        set_=update_dict
-    )
+    if conflict_fields:
+        # ON CONFLICT cannot update the same row twice in one statement, keep the last duplicate
+        records = list({tuple(record[name] for name in conflict_fields): record for record in records}.values())
+
+    stmt = dialect_insert(session, model_class).values(records)
+
+    if conflict_fields:
+        # Exclude primary keys and conflict fields from the update, and only touch supplied columns
+        update_dict = {
+            c.name: c for c in stmt.excluded
+            if c.name not in conflict_fields and not c.primary_key and c.name in records[0]
+        }
+        if update_dict:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_fields,
+                set_=update_dict
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_fields)
+
     session.execute(stmt)
     session.commit()
 
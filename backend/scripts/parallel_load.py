@@ -0,0 +1,221 @@
+"""
+Parallel, partitioned loading of lineup data across a process pool.
+
+A single lineup.json is split by game_id range into one NDJSON file per partition;
+alternatively, several shard files can be passed and each shard is one partition.
+Each worker process parses, snake_cases and upserts its partition over its own
+database connection.
+
+Partitions are numbered in ascending game_id (or shard) order and results are
+always reported in that order. Range partitions never share a game, so workers
+never upsert the same lineup row. Shards should be split by game for the same
+reason.
+
+Usage (from the backend directory):
+    python -m scripts.parallel_load [--workers 4] [--partitions 8] lineup.json
+    python -m scripts.parallel_load [--workers 4] lineup_1.json lineup_2.json ...
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_right
+import ijson
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from config.settings import DATABASE_URL
+from db.models import Lineup
+from helpers.json_to_db_helpers import convert_json_keys_to_snake_case
+from scripts.errors import PartitionLoadError
+from scripts.load_data import LINEUP_CONFLICT_FIELDS, upsert_records
+from scripts.derived_tables import refresh_lineup_tables
+
+
+def game_id_bounds(min_game_id, max_game_id, partitions):
+    """
+    Split [min_game_id, max_game_id] into equal width ranges.
+
+    Returns:
+        list: The lower bound of every partition after the first, ascending.
+    """
+    width = max(1, -(-(max_game_id - min_game_id + 1) // partitions))
+    return [min_game_id + width * i for i in range(1, partitions) if min_game_id + width * i <= max_game_id]
+
+
+def split_by_game_range(file_path, bounds, out_dir):
+    """
+    Stream a lineup JSON array into one NDJSON file per game_id range.
+
+    Returns:
+        list: Partition file paths in ascending game_id order.
+    """
+    paths = [os.path.join(out_dir, f"lineup_part_{index:04d}.ndjson") for index in range(len(bounds) + 1)]
+    files = [open(path, 'w') for path in paths]
+    try:
+        with open(file_path, 'rb') as file:
+            for record in ijson.items(file, 'item', use_float=True):
+                game_id = record.get('game_id', record.get('gameId'))
+                files[bisect_right(bounds, game_id)].write(json.dumps(record) + '\n')
+    finally:
+        for partition_file in files:
+            partition_file.close()
+    return paths
+
+
+def read_partition(file_path):
+    """Yield the raw records of a partition, either NDJSON or a JSON array shard."""
+    with open(file_path, 'rb') as file:
+        if file_path.endswith('.ndjson'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from ijson.items(file, 'item', use_float=True)
+
+
+def load_partition(task):
+    """
+    Load one partition in a worker process.
+
+    Exceptions are caught and returned with the partition so the parent can
+    report failures in partition order. A failed partition rolls back its
+    current batch; earlier batches stay committed and are safe to re-run.
+
+    Args:
+        task (tuple): (partition index, file path, database url, batch size)
+
+    Returns:
+        dict: partition, file, rows, game_ids, seconds and error (None on success).
+    """
+    index, file_path, database_url, batch_size = task
+    start = time.perf_counter()
+    engine = create_engine(database_url, poolclass=NullPool)
+    session = sessionmaker(bind=engine)()
+    rows = 0
+    records_batch = []
+    game_ids = set()
+    error = None
+
+    try:
+        for record in read_partition(file_path):
+            snake_case_record = convert_json_keys_to_snake_case(record)
+            records_batch.append(snake_case_record)
+            game_ids.add(snake_case_record.get('game_id'))
+            if len(records_batch) >= batch_size:
+                upsert_records(session, Lineup, records_batch, LINEUP_CONFLICT_FIELDS)
+                rows += len(records_batch)
+                records_batch.clear()
+
+        if records_batch:
+            upsert_records(session, Lineup, records_batch, LINEUP_CONFLICT_FIELDS)
+            rows += len(records_batch)
+    except Exception as e:
+        session.rollback()
+        error = f"{type(e).__name__} after {rows} committed records: {e}"
+    finally:
+        session.close()
+        engine.dispose()
+
+    return {
+        'partition': index,
+        'file': file_path,
+        'rows': rows,
+        'game_ids': game_ids,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+def run_partitions(partition_paths, database_url, workers=None, batch_size=1000):
+    """
+    Load partitions on a process pool and collect their results in partition order.
+
+    Raises:
+        PartitionLoadError: If any partition failed, after every partition has run.
+    """
+    tasks = [(index, path, database_url, batch_size) for index, path in enumerate(partition_paths)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map returns results in task order regardless of completion order
+        results = list(executor.map(load_partition, tasks))
+    seconds = time.perf_counter() - start
+
+    for result in results:
+        if result['error'] is None:
+            logging.info(f"Partition {result['partition']}: {result['rows']} records in {result['seconds']:.2f}s")
+        else:
+            logging.error(f"Partition {result['partition']} ({result['file']}) failed: {result['error']}")
+
+    rows = sum(result['rows'] for result in results)
+    logging.info(f"Processed {rows} records in {seconds:.2f}s ({rows / seconds if seconds else rows:.0f} rows/sec) across {len(tasks)} partitions")
+
+    failed = [result for result in results if result['error'] is not None]
+    if failed:
+        raise PartitionLoadError(failed)
+    return results
+
+
+def parallel_load_lineups(session, file_path, workers=None, partitions=None, batch_size=1000):
+    """
+    Split lineup.json by game_id range and load the ranges in parallel.
+
+    The range bounds come from game_schedule, which every lineup row references.
+    Once every partition has loaded, the derived tables are refreshed for the
+    loaded games over the session.
+    """
+    workers = workers or os.cpu_count()
+    partitions = partitions or workers
+    min_game_id, max_game_id = session.execute(text("SELECT MIN(game_id), MAX(game_id) FROM game_schedule")).one()
+    session.commit()
+    if min_game_id is None:
+        raise ValueError("game_schedule is empty; load it before lineup.json")
+
+    bounds = game_id_bounds(min_game_id, max_game_id, partitions)
+    database_url = session.get_bind().url
+    with tempfile.TemporaryDirectory() as out_dir:
+        partition_paths = split_by_game_range(file_path, bounds, out_dir)
+        results = run_partitions(partition_paths, database_url, workers, batch_size)
+
+    refresh_lineup_tables(session, set().union(*(result['game_ids'] for result in results)))
+    return results
+
+
+# Loaders used in place of the batch loaders in scripts.load_data.DATA_FILES when
+# ingesting with --engine parallel
+PARALLEL_LOADERS = {
+    'lineup.json': parallel_load_lineups,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load lineup data in parallel partitions.")
+    parser.add_argument('file_paths', nargs='+', help="lineup.json to split by game_id, or pre-split shard files")
+    parser.add_argument('--database-url', default=DATABASE_URL, help="Database to load into")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--partitions', type=int, help="game_id ranges to split a single file into (default: workers)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Records per upsert")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    engine = create_engine(args.database_url)
+    session = sessionmaker(bind=engine)()
+    try:
+        if len(args.file_paths) > 1:
+            results = run_partitions(args.file_paths, args.database_url, args.workers, args.batch_size)
+            refresh_lineup_tables(session, set().union(*(result['game_ids'] for result in results)))
+        else:
+            parallel_load_lineups(session, args.file_paths[0], args.workers, args.partitions, args.batch_size)
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import io
+import pytest
+from flask import Flask, request
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet as pq
+from backend.helpers.arrow_stream import stream_columnar
+
+SCHEMA = pa.schema([
+    pa.field('n', pa.int64()),
+    pa.field('label', pa.string()),
+    pa.field('seconds', pa.float64()),
+])
+
+def create_app(session):
+    app = Flask(__name__)
+
+    @app.route('/export')
+    def export():
+        query = "SELECT n, 'row ' || n AS label, n * 1.5 AS seconds FROM numbers ORDER BY n"
+        return stream_columnar(session, query, {}, SCHEMA, request.args['format'], 'numbers', batch_size=2)
+
+    return app
+
+@pytest.fixture(scope="function")
+def client():
+    engine = create_engine('sqlite:///:memory:')
+    session = sessionmaker(bind=engine)()
+    session.execute(text("CREATE TABLE numbers (n INTEGER)"))
+    session.execute(text("INSERT INTO numbers (n) VALUES (1), (2), (3), (4), (5)"))
+    yield create_app(session).test_client()
+    session.close()
+
+EXPECTED = {
+    'n': [1, 2, 3, 4, 5],
+    'label': ['row 1', 'row 2', 'row 3', 'row 4', 'row 5'],
+    'seconds': [1.5, 3.0, 4.5, 6.0, 7.5],
+}
+
+def test_stream_columnar_arrow_sends_one_record_batch_per_fetch(client):
+    response = client.get('/export?format=arrow')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="numbers.arrow"'
+    reader = pa.ipc.open_stream(response.data)
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [2, 2, 1]
+    table = pa.Table.from_batches(batches)
+    assert table.schema == SCHEMA
+    assert table.to_pydict() == EXPECTED
+
+def test_stream_columnar_parquet(client):
+    response = client.get('/export?format=parquet')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.apache.parquet'
+    table = pq.read_table(io.BytesIO(response.data))
+    assert table.schema == SCHEMA
+    assert table.to_pydict() == EXPECTED
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip('asyncpg')
+
+from backend.db.async_pool import to_asyncpg, asyncpg_dsn
+from backend.handlers.lineup_routes import player_stints_cursor_query
+
+def test_to_asyncpg_numbers_parameters_in_order_of_first_use():
+    query, args = to_asyncpg(
+        "SELECT * FROM t WHERE a = :a AND b > :b AND c < :a LIMIT :page_size",
+        {'a': 1, 'b': 2, 'page_size': 50, 'unused': 3}
+    )
+    assert query == "SELECT * FROM t WHERE a = $1 AND b > $2 AND c < $1 LIMIT $3"
+    assert args == [1, 2, 50]
+
+def test_to_asyncpg_leaves_casts_and_clock_formats_alone():
+    query, args = to_asyncpg(player_stints_cursor_query(), {
+        'last_game_date': '2024-01-01', 'last_game_id': 1, 'last_team_name': 'A',
+        'last_player_name': 'B', 'last_period': 1, 'last_stint_number': 1, 'page_size': 10,
+    })
+    assert "'FMMI:SS'" in query
+    assert ':last_' not in query and ':page_size' not in query
+    assert len(args) == 7
+
+def test_asyncpg_dsn_drops_the_driver():
+    assert asyncpg_dsn('postgresql+psycopg2://user:pw@db:5432/lac') == 'postgresql://user:pw@db:5432/lac'
+    assert asyncpg_dsn('postgresql://user:pw@db:5432/lac?sslmode=disable') == 'postgresql://user:pw@db:5432/lac?sslmode=disable'
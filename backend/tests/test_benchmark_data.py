@@ -0,0 +1,91 @@
+import random
+from collections import Counter, defaultdict
+from backend.benchmarks.generate_data import (
+    generate_schedule, generate_rosters, team_lineups, generate_lineups,
+    GAMES_PER_TEAM, REGULATION_PERIODS, ROSTER_TURNOVER
+)
+from backend.benchmarks.suite import compare_results
+
+TEAM_IDS = list(range(1, 31))
+
+def test_schedule_gives_every_team_82_games_a_season_and_one_game_a_day():
+    games = generate_schedule(random.Random(0), TEAM_IDS, 2, 2021)
+    assert len(games) == 2 * len(TEAM_IDS) * GAMES_PER_TEAM // 2
+    assert [game['game_id'] for game in games] == list(range(1, len(games) + 1))
+    assert [game['game_date'] for game in games] == sorted(game['game_date'] for game in games)
+
+    games_played = Counter()
+    home_games = Counter()
+    days = defaultdict(list)
+    for game in games:
+        season = game['game_date'][:4] if game['game_date'][5:7] >= '10' else str(int(game['game_date'][:4]) - 1)
+        games_played[(season, game['home_id'])] += 1
+        games_played[(season, game['away_id'])] += 1
+        home_games[(season, game['home_id'])] += 1
+        assert game['home_score'] != game['away_score']
+        for team_id in (game['home_id'], game['away_id']):
+            days[team_id].append(game['game_date'][:10])
+    assert set(games_played.values()) == {GAMES_PER_TEAM}
+    assert all(abs(count - GAMES_PER_TEAM / 2) <= 1 for count in home_games.values())
+    assert all(len(set(team_days)) == len(team_days) for team_days in days.values())
+
+def test_rosters_turn_over_between_seasons():
+    players, rosters = generate_rosters(random.Random(0), TEAM_IDS, 3)
+    assert len(rosters) == 3
+    for team_id in TEAM_IDS:
+        assert len(set(rosters[1][team_id]) - set(rosters[0][team_id])) <= ROSTER_TURNOVER
+        assert set(rosters[2][team_id]) <= set(players)
+
+def test_team_lineups_cover_every_second_with_five_players():
+    roster = list(range(100, 115))
+    records = team_lineups(random.Random(0), 1, 1, roster, REGULATION_PERIODS + 1)
+
+    lineups = defaultdict(list)
+    for record in records:
+        lineups[record['lineupNum']].append(record)
+    assert sorted(lineups) == list(range(1, len(lineups) + 1))
+
+    by_period = defaultdict(list)
+    for lineup in lineups.values():
+        assert len({record['playerId'] for record in lineup}) == 5
+        assert len({(record['period'], record['timeIn'], record['timeOut']) for record in lineup}) == 1
+        by_period[lineup[0]['period']].append((lineup[0]['timeIn'], lineup[0]['timeOut']))
+    for period, stretches in by_period.items():
+        stretches.sort(reverse=True)
+        assert stretches[0][0] == (720.0 if period <= REGULATION_PERIODS else 300.0)
+        assert stretches[-1][1] == 0.0
+        assert all(previous[1] == current[0] for previous, current in zip(stretches, stretches[1:]))
+
+    # The starters open the first period and play the most
+    seconds = Counter()
+    for record in records:
+        seconds[record['playerId']] += record['timeIn'] - record['timeOut']
+    starters = {record['playerId'] for record in lineups[1]}
+    assert starters <= set(player_id for player_id, _ in seconds.most_common(8))
+
+def test_lineups_are_deterministic_per_seed():
+    games = generate_schedule(random.Random(0), TEAM_IDS, 1, 2021)[:5]
+    _, rosters = generate_rosters(random.Random(0), TEAM_IDS, 1)
+    first = list(generate_lineups(7, games, rosters, 2021))
+    assert first == list(generate_lineups(7, games, rosters, 2021))
+    assert first != list(generate_lineups(8, games, rosters, 2021))
+    # A game's lineups do not depend on the games before it
+    assert [record for record in first if record['gameId'] == 5] == list(generate_lineups(7, games[4:], rosters, 2021))
+
+def test_compare_results_flags_slower_routes_and_ingest():
+    baseline = {
+        'routes': {'/a': {'p50_ms': 10.0, 'p99_ms': 20.0}, '/b': {'p50_ms': 0.2, 'p99_ms': 0.3}},
+        'ingest': {'lineup.json': {'rows_per_second': 1000.0, 'seconds': 10.0},
+                   'team.json': {'rows_per_second': 1000.0, 'seconds': 0.03}},
+    }
+    current = {
+        'routes': {'/a': {'p50_ms': 11.0, 'p99_ms': 30.0}, '/b': {'p50_ms': 0.5, 'p99_ms': 0.6},
+                   '/new': {'p50_ms': 5.0, 'p99_ms': 5.0}},
+        'ingest': {'lineup.json': {'rows_per_second': 700.0, 'seconds': 14.3},
+                   'team.json': {'rows_per_second': 500.0, 'seconds': 0.06}},
+    }
+    assert compare_results(baseline, current, 0.2) == [
+        ('/a', 'p99_ms', 20.0, 30.0),
+        ('lineup.json', 'rows_per_second', 1000.0, 700.0),
+    ]
+    assert compare_results(baseline, baseline, 0.2) == []
@@ -0,0 +1,35 @@
+from decimal import Decimal
+from backend.scripts.bulk_load import CsvRecordStream, LINEUP_COLUMNS, ROSTER_COLUMNS
+
+def test_csv_record_stream_renders_lineups():
+    records = [
+        {"team_id": 1, "player_id": 2, "game_id": 3, "lineup_num": 1, "period": 1, "time_in": Decimal("720.0"), "time_out": Decimal("456.0")},
+        {"team_id": 1, "player_id": None, "game_id": 3, "lineup_num": 2, "period": 1, "time_in": Decimal("456.0"), "time_out": Decimal("0.0")},
+    ]
+    stream = CsvRecordStream(records, LINEUP_COLUMNS)
+
+    assert stream.read() == "1,2,3,1,1,720.0,456.0\n1,\\N,3,2,1,456.0,0.0\n"
+    assert stream.read() == ""
+    assert stream.rows == 2
+
+def test_csv_record_stream_reads_in_chunks():
+    records = [
+        {"player_id": 1, "team_id": 2, "first_name": "Jo, Jr.", "last_name": 'O"Neal', "position": "C", "contract_type": "NBA"},
+    ] * 3
+    stream = CsvRecordStream(records, ROSTER_COLUMNS)
+
+    chunks = []
+    while True:
+        chunk = stream.read(7)
+        if not chunk:
+            break
+        assert len(chunk) <= 7
+        chunks.append(chunk)
+
+    assert "".join(chunks) == '1,2,"Jo, Jr.","O""Neal",C,NBA\n' * 3
+
+def test_csv_record_stream_keeps_empty_strings_apart_from_nulls():
+    records = [{"player_id": 1, "team_id": None, "first_name": "", "last_name": "One", "position": "C", "contract_type": "NBA"}]
+    stream = CsvRecordStream(records, ROSTER_COLUMNS)
+
+    assert stream.read() == '1,\\N,,One,C,NBA\n'
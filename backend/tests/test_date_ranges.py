@@ -0,0 +1,15 @@
+from datetime import datetime
+from backend.handlers.validators import year_range, day_range
+
+def test_year_range_is_half_open():
+    assert year_range(2024) == (datetime(2024, 1, 1), datetime(2025, 1, 1))
+
+def test_year_range_is_empty_outside_the_years_a_datetime_can_hold():
+    for year in (-1, 0, 10000):
+        start, end = year_range(year)
+        assert start == end
+    assert year_range(9999) == (datetime(9999, 1, 1), datetime.max)
+
+def test_day_range_includes_the_end_date():
+    assert day_range('2024-02-28', '2024-02-29') == (datetime(2024, 2, 28), datetime(2024, 3, 1))
+    assert day_range('9999-12-01', '9999-12-31') == (datetime(9999, 12, 1), datetime.max)
@@ -0,0 +1,82 @@
+from datetime import datetime
+from backend.scripts.derived_tables import refresh_player_stints, refresh_team_games, refresh_player_court_time
+from backend.db.models import Lineup, PlayerStint, GameSchedule, TeamGame, PlayerCourtTime
+from backend.helpers.court_time import from_bytes, seconds, shared_bitset
+
+def add_lineup(db_session, player_id, period, time_in, time_out, lineup_num):
+    db_session.add(Lineup(team_id=1, player_id=player_id, game_id=1, lineup_num=lineup_num, period=period, time_in=time_in, time_out=time_out))
+
+def test_refresh_player_stints_splits_on_gaps_and_periods(db_session):
+    # Player 1: 720-300 continuous, off 300-120, back 120-0; then all of period 2
+    add_lineup(db_session, 1, 1, 720, 540, 1)
+    add_lineup(db_session, 1, 1, 540, 300, 2)
+    add_lineup(db_session, 1, 1, 120, 0, 4)
+    add_lineup(db_session, 1, 2, 720, 0, 5)
+    # Player 2: only the middle of period 1
+    add_lineup(db_session, 2, 1, 300, 120, 3)
+    db_session.commit()
+
+    refresh_player_stints(db_session)
+    db_session.commit()
+
+    stints = [
+        (stint.player_id, stint.period, stint.stint_number, float(stint.stint_start), float(stint.stint_end))
+        for stint in db_session.query(PlayerStint).order_by(PlayerStint.player_id, PlayerStint.period, PlayerStint.stint_number)
+    ]
+    assert stints == [
+        (1, 1, 1, 720.0, 300.0),
+        (1, 1, 2, 120.0, 0.0),
+        (1, 2, 1, 720.0, 0.0),
+        (2, 1, 1, 300.0, 120.0),
+    ]
+
+def test_refresh_team_games_adds_a_row_per_side(db_session):
+    db_session.add(GameSchedule(game_id=1, home_id=10, away_id=20, home_score=101, away_score=99, game_date=datetime(2024, 1, 5, 19)))
+    db_session.add(GameSchedule(game_id=2, home_id=20, away_id=10, home_score=0, away_score=0, game_date=datetime(2024, 1, 7, 19)))
+    db_session.commit()
+
+    refresh_team_games(db_session)
+    db_session.commit()
+
+    team_games = [
+        (team_game.game_id, team_game.team_id, team_game.opponent_id, team_game.location,
+         team_game.points_for, team_game.points_against, team_game.result)
+        for team_game in db_session.query(TeamGame).order_by(TeamGame.game_id, TeamGame.team_id)
+    ]
+    assert team_games == [
+        (1, 10, 20, 'home', 101, 99, 'W'),
+        (1, 20, 10, 'away', 99, 101, 'L'),
+        (2, 10, 20, 'away', 0, 0, None),
+        (2, 20, 10, 'home', 0, 0, None),
+    ]
+
+def test_refresh_player_court_time_intersects_to_shared_seconds(db_session):
+    # Player 1: 720-300 in two rows, 120-0, and all of period 2; player 2: 600-60 of period 1
+    add_lineup(db_session, 1, 1, 720, 540, 1)
+    add_lineup(db_session, 1, 1, 540, 300, 2)
+    add_lineup(db_session, 1, 1, 120, 0, 4)
+    add_lineup(db_session, 1, 2, 720, 0, 5)
+    add_lineup(db_session, 2, 1, 600, 60.5, 3)
+    db_session.commit()
+
+    refresh_player_court_time(db_session)
+    db_session.commit()
+
+    court_times = {row.player_id: row for row in db_session.query(PlayerCourtTime)}
+    assert {player_id: float(row.seconds_on_court) for player_id, row in court_times.items()} == {1: 1260.0, 2: 539.5}
+    # Together 600-300 and 120-60.5 of period 1
+    bitsets = [from_bytes(row.on_court) for row in court_times.values()]
+    assert seconds(shared_bitset(bitsets)) == 359.5
+
+
+def test_refreshes_skip_lineup_rows_without_a_player(db_session):
+    add_lineup(db_session, 1, 1, 720, 540, 1)
+    add_lineup(db_session, None, 1, 720, 540, 1)
+    db_session.commit()
+
+    refresh_player_stints(db_session)
+    refresh_player_court_time(db_session)
+    db_session.commit()
+
+    assert [stint.player_id for stint in db_session.query(PlayerStint)] == [1]
+    assert [row.player_id for row in db_session.query(PlayerCourtTime)] == [1]
@@ -0,0 +1,90 @@
+"""
+Checks of /games/batch against the API app.
+
+These need Postgres: set TEST_DATABASE_URL to a database the tests may create
+and drop a scratch schema in. The migrations are applied to that schema.
+"""
+import glob
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from backend.scripts.derived_tables import refresh_team_games
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+SCHEMA = 'game_batch_test'
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+@pytest.fixture(scope="module")
+def client():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '*.up.sql'))):
+            with open(path) as file:
+                connection.exec_driver_sql(file.read())
+
+        connection.execute(text("""
+            INSERT INTO teams (team_id, league_lk, team_name, team_name_short, team_nickname)
+            VALUES (1, 'NBA', 'Team 1', 'T1', 'T1'), (2, 'NBA', 'Team 2', 'T2', 'T2')
+        """))
+        # Team 1 hosts team 2 every day from 2024-01-01, 101 games in all
+        connection.execute(text("""
+            INSERT INTO game_schedule (game_id, home_id, away_id, home_score, away_score, game_date)
+            SELECT game_id, 1, 2, 100, 90, TIMESTAMP '2024-01-01 19:00' + (game_id - 1) * INTERVAL '1 day'
+            FROM generate_series(1, 101) AS game_id
+        """))
+        connection.execute(text("""
+            INSERT INTO players (player_id, first_name, last_name)
+            VALUES (1, 'First', 'One'), (2, 'Second', 'Two')
+        """))
+        connection.execute(text("""
+            INSERT INTO roster (player_id, team_id, first_name, last_name, position, contract_type)
+            VALUES (1, 1, 'First', 'One', 'PG', 'NBA'), (2, 2, 'Second', 'Two', 'C', 'NBA')
+        """))
+        # Games 1 and 2 have a player from each team on court for all of period 1
+        connection.execute(text("""
+            INSERT INTO lineup (team_id, player_id, game_id, lineup_num, period, time_in, time_out)
+            SELECT team_id, team_id, game_id, 1, 1, 720, 0
+            FROM generate_series(1, 2) AS game_id, generate_series(1, 2) AS team_id
+        """))
+        session = Session(bind=connection)
+        refresh_team_games(session)
+        session.commit()
+
+        from backend.app import create_app
+        separator = '&' if '?' in TEST_DATABASE_URL else '?'
+        app = create_app(f"{TEST_DATABASE_URL}{separator}options=-csearch_path%3D{SCHEMA}")
+        yield app.test_client()
+        session.close()
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+def test_batch_by_game_ids_returns_lineups_and_stints(client):
+    response = client.get('/games/batch?game_ids=2,1,3')
+    assert response.status_code == 200
+    batch = response.json
+    assert batch['game_ids'] == [1, 2, 3]
+    assert [len(batch['games'][game_id]['lineups']) for game_id in ('1', '2', '3')] == [2, 2, 0]
+    assert [player['seconds_played'] for player in batch['games']['1']['players']] == [720, 720]
+    assert batch['games']['3']['players'] == []
+
+    batch = client.get('/games/batch?game_ids=1&team_id=2').json
+    assert [lineup['team_id'] for lineup in batch['games']['1']['lineups']] == [2]
+    assert [player['player_id'] for player in batch['games']['1']['players']] == [2]
+
+def test_batch_by_team_rejects_ranges_over_the_game_limit(client):
+    batch = client.get('/games/batch?team_id=1&start_date=2024-01-01&end_date=2024-04-09').json
+    assert len(batch['game_ids']) == 100
+
+    response = client.get('/games/batch?team_id=1&start_date=2024-01-01&end_date=2024-04-10')
+    assert response.status_code == 400
+    assert 'more than 100 games' in response.json['error']
+
+def test_batch_needs_game_ids_or_a_team_and_dates(client):
+    assert client.get('/games/batch').status_code == 400
+    assert client.get('/games/batch?team_id=1&start_date=2024-01-01').status_code == 400
+    assert client.get('/games/batch?game_ids=' + ','.join(str(game_id) for game_id in range(1, 102))).status_code == 400
@@ -0,0 +1,57 @@
+import pytest
+import json
+import os
+import tempfile
+from backend.scripts.ingest import run_ingest, file_fingerprint
+from backend.db.models import Team, LoadState
+from backend.db.data_version import get_data_versions
+
+@pytest.fixture(scope="function")
+def data_dir():
+    with tempfile.TemporaryDirectory() as directory:
+        yield directory
+
+def write_teams(data_dir, teams):
+    with open(os.path.join(data_dir, 'team.json'), 'w') as file:
+        json.dump(teams, file)
+
+def test_run_ingest_skips_unchanged_files(db_session, data_dir):
+    write_teams(data_dir, [
+        {"teamId": 1610612737, "leagueLk": "NBA", "teamName": "Team 1", "teamNameShort": "T1", "teamNickname": "T1"},
+    ])
+
+    assert run_ingest(db_session, data_dir) == ['team.json']
+    assert run_ingest(db_session, data_dir) == []
+    assert run_ingest(db_session, data_dir, force=True) == ['team.json']
+
+    state = db_session.get(LoadState, 'team.json')
+    content_hash, byte_size = file_fingerprint(os.path.join(data_dir, 'team.json'))
+    assert state.content_hash == content_hash
+    assert state.byte_size == byte_size
+
+def test_run_ingest_reloads_changed_files(db_session, data_dir):
+    write_teams(data_dir, [
+        {"teamId": 1610612737, "leagueLk": "NBA", "teamName": "Team 1", "teamNameShort": "T1", "teamNickname": "T1"},
+    ])
+    run_ingest(db_session, data_dir)
+
+    write_teams(data_dir, [
+        {"teamId": 1610612737, "leagueLk": "NBA", "teamName": "Team 1", "teamNameShort": "T1", "teamNickname": "T1"},
+        {"teamId": 1610612738, "leagueLk": "NBA", "teamName": "Team 2", "teamNameShort": "T2", "teamNickname": "T2"},
+    ])
+
+    assert run_ingest(db_session, data_dir) == ['team.json']
+    assert db_session.query(Team).count() == 2
+
+def test_run_ingest_bumps_the_data_version_of_loaded_tables(db_session, data_dir):
+    write_teams(data_dir, [
+        {"teamId": 1610612737, "leagueLk": "NBA", "teamName": "Team 1", "teamNameShort": "T1", "teamNickname": "T1"},
+    ])
+    run_ingest(db_session, data_dir)
+    version, first_updated_at = get_data_versions(db_session)['teams']
+    assert version == 1
+
+    run_ingest(db_session, data_dir, force=True)
+    version, updated_at = get_data_versions(db_session)['teams']
+    assert version == 2
+    assert updated_at >= first_updated_at
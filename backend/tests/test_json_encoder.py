@@ -0,0 +1,31 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine, text
+from backend.helpers.json_encoder import OrjsonProvider, row_dicts
+
+pytest.importorskip('orjson')
+
+ROWS = [
+    {"game_date": datetime(2024, 1, 5, 19, 30), "team": "Team 1", "time_in": Decimal('720.0'), "period": 1},
+    {"game_date": date(2024, 1, 6), "team": "Team 2", "time_in": Decimal('12.5'), "period": None},
+]
+
+def encode(provider_class, debug=False):
+    app = Flask(__name__)
+    app.debug = debug
+    app.json = provider_class(app)
+    with app.app_context():
+        return app.json.response(ROWS).get_data()
+
+def test_orjson_provider_matches_default_provider():
+    assert encode(OrjsonProvider) == encode(DefaultJSONProvider)
+    assert encode(OrjsonProvider, debug=True) == encode(DefaultJSONProvider, debug=True)
+
+def test_row_dicts_keys_rows_by_column_name():
+    engine = create_engine('sqlite:///:memory:')
+    with engine.connect() as connection:
+        result = connection.execute(text("SELECT 1 AS game_id, 'Team 1' AS team UNION ALL SELECT 2, 'Team 2'"))
+        assert row_dicts(result) == [{"game_id": 1, "team": "Team 1"}, {"game_id": 2, "team": "Team 2"}]
@@ -0,0 +1,89 @@
+"""
+Checks of lineup_unit: the refresh and the index lookups behind /lineups/units.
+
+These need Postgres: set TEST_DATABASE_URL to a database the tests may create
+and drop a scratch schema in. The migrations are applied to that schema.
+"""
+import glob
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from backend.scripts.derived_tables import refresh_lineup_units
+from backend.helpers.lineup_units import unit_hash_sql
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+SCHEMA = 'lineup_unit_test'
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+@pytest.fixture(scope="module")
+def session():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '*.up.sql'))):
+            with open(path) as file:
+                connection.exec_driver_sql(file.read())
+
+        connection.execute(text("""
+            INSERT INTO teams (team_id, league_lk, team_name, team_name_short, team_nickname)
+            VALUES (1, 'NBA', 'Team 1', 'T1', 'T1'), (2, 'NBA', 'Team 2', 'T2', 'T2')
+        """))
+        connection.execute(text("""
+            INSERT INTO game_schedule (game_id, home_id, away_id, home_score, away_score, game_date)
+            VALUES (1, 1, 2, 100, 99, '2024-01-01 19:00')
+        """))
+        connection.execute(text("""
+            INSERT INTO players (player_id, first_name, last_name)
+            SELECT player_id, 'First', 'Player ' || player_id FROM generate_series(1, 7) AS player_id
+        """))
+        # Lineup 1 is players 1-5 (inserted out of order), lineup 2 swaps 5 for 6
+        connection.execute(text("""
+            INSERT INTO lineup (team_id, player_id, game_id, lineup_num, period, time_in, time_out)
+            SELECT 1, player_id, 1, 1, 1, 720, 600 FROM unnest(ARRAY[5, 3, 1, 4, 2]) AS player_id
+            UNION ALL
+            SELECT 1, player_id, 1, 2, 1, 600, 480 FROM unnest(ARRAY[1, 2, 3, 4, 6]) AS player_id
+            UNION ALL
+            SELECT 1, player_id, 1, 1, 2, 720, 700 FROM unnest(ARRAY[1, 2, 3, 4, 5]) AS player_id
+        """))
+        session = Session(bind=connection)
+        refresh_lineup_units(session)
+        yield session
+        session.close()
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+def test_refresh_lineup_units_sorts_and_hashes_each_lineup(session):
+    units = session.execute(text("""
+        SELECT lineup_num, period, time_in, time_out, player_ids, unit_hash
+        FROM lineup_unit
+        ORDER BY period, lineup_num
+    """)).fetchall()
+
+    assert [(row.lineup_num, row.period, row.player_ids) for row in units] == [
+        (1, 1, [1, 2, 3, 4, 5]),
+        (2, 1, [1, 2, 3, 4, 6]),
+        (1, 2, [1, 2, 3, 4, 5]),
+    ]
+    # The same five players hash the same regardless of the order they were loaded in
+    assert units[0].unit_hash == units[2].unit_hash != units[1].unit_hash
+    assert units[0].unit_hash == session.execute(
+        text(f"SELECT {unit_hash_sql('CAST(:player_ids AS BIGINT[])')}"), {'player_ids': [1, 2, 3, 4, 5]}
+    ).scalar()
+
+def test_unit_lookups_use_the_lineup_unit_indexes(session):
+    session.execute(text("SET enable_seqscan = off"))
+    exact = session.execute(text(f"""
+        EXPLAIN SELECT * FROM lineup_unit
+        WHERE unit_hash = {unit_hash_sql('CAST(:player_ids AS BIGINT[])')}
+    """), {'player_ids': [1, 2, 3, 4, 5]}).scalars().all()
+    contains = session.execute(text("""
+        EXPLAIN SELECT * FROM lineup_unit WHERE player_ids @> CAST(:player_ids AS BIGINT[])
+    """), {'player_ids': [6]}).scalars().all()
+    session.execute(text("RESET enable_seqscan"))
+
+    assert any('idx_lineup_unit_unit_hash' in line for line in exact)
+    assert any('idx_lineup_unit_player_ids' in line for line in contains)
@@ -1,23 +1,10 @@
-import pytest
 import json
 import tempfile
 from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from backend.scripts.load_data import load_json_data, load_roster, load_data
-from backend.db.models import Base, Team, TeamAffiliate, Roster, Player, GameSchedule, Lineup, ContractTypeEnum, PositionEnum, LeagueLkEnum
+from backend.db.models import Team, TeamAffiliate, Roster, Player, GameSchedule, Lineup, ContractTypeEnum, PositionEnum, LeagueLkEnum
 import logging
 
-@pytest.fixture(scope="function")
-def db_session():
-    # Create an in-memory SQLite database
-    engine = create_engine('sqlite:///:memory:', echo=True)
-    Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    yield session
-    session.close()
-
 def create_temp_json_file(data):
     temp_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.json')
     json.dump(data, temp_file)
@@ -83,6 +70,24 @@ def test_load_json_data(db_session):
     assert teams[2].team_name_short == "NT"
     assert teams[2].team_nickname == "Newbies"
 
+def test_load_json_data_updates_existing_rows(db_session):
+    setup_database(db_session)
+    # Same primary key as an existing team, plus a duplicate within the file
+    test_data = [
+        {"teamId": 1610612737, "leagueLk": "NBA", "teamName": "Renamed", "teamNameShort": "RN", "teamNickname": "Old"},
+        {"teamId": 1610612737, "leagueLk": "NBA", "teamName": "Renamed", "teamNameShort": "RN", "teamNickname": "New"},
+    ]
+    temp_file = create_temp_json_file(test_data)
+
+    load_json_data(db_session, temp_file, Team, batch_size=1)
+    load_json_data(db_session, temp_file, Team)
+
+    db_session.expire_all()
+    teams = db_session.query(Team).order_by(Team.team_id).all()
+    assert len(teams) == 2
+    assert teams[0].team_name == "Renamed"
+    assert teams[0].team_nickname == "New"
+
 def test_load_roster(db_session):
     setup_database(db_session)
     # Test data
@@ -0,0 +1,36 @@
+import json
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from backend.helpers.ndjson_stream import stream_ndjson
+
+def create_app(session):
+    app = Flask(__name__)
+
+    @app.route('/export')
+    def export():
+        return stream_ndjson(session, "SELECT n, 'row ' || n AS label FROM numbers ORDER BY n", {}, batch_size=2)
+
+    @app.route('/page')
+    def page():
+        result = session.execute(text("SELECT n, 'row ' || n AS label FROM numbers ORDER BY n"))
+        return jsonify([dict(row) for row in result])
+
+    return app
+
+def test_stream_ndjson_writes_one_json_object_per_row():
+    engine = create_engine('sqlite:///:memory:')
+    session = sessionmaker(bind=engine)()
+    session.execute(text("CREATE TABLE numbers (n INTEGER)"))
+    session.execute(text("INSERT INTO numbers (n) VALUES (1), (2), (3), (4), (5)"))
+    client = create_app(session).test_client()
+
+    response = client.get('/export')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    # Same rows and encoding as the paged JSON, across several batches
+    assert rows == client.get('/page').json
+    assert len(rows) == 5
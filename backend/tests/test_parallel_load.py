@@ -0,0 +1,57 @@
+import pytest
+import json
+import os
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.scripts.parallel_load import game_id_bounds, split_by_game_range, run_partitions, PartitionLoadError
+from backend.db.models import Base, Lineup
+
+@pytest.fixture(scope="function")
+def data_dir():
+    with tempfile.TemporaryDirectory() as directory:
+        yield directory
+
+def lineup_record(game_id, player_id, time_in=720.0, time_out=456.0):
+    return {"teamId": 1, "playerId": player_id, "lineupNum": 1, "period": 1, "timeIn": time_in, "timeOut": time_out, "gameId": game_id}
+
+def test_game_id_bounds():
+    assert game_id_bounds(1, 10, 3) == [5, 9]
+    assert game_id_bounds(1, 2, 4) == [2]
+    assert game_id_bounds(7, 7, 2) == []
+
+def test_split_by_game_range_keeps_games_together(data_dir):
+    file_path = os.path.join(data_dir, 'lineup.json')
+    with open(file_path, 'w') as file:
+        json.dump([lineup_record(game_id, player_id) for player_id in (1, 2) for game_id in range(1, 11)], file)
+
+    paths = split_by_game_range(file_path, game_id_bounds(1, 10, 3), data_dir)
+
+    partitions = []
+    for path in paths:
+        with open(path) as file:
+            partitions.append(sorted({json.loads(line)['gameId'] for line in file}))
+    assert partitions == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
+
+def test_run_partitions_reports_failures_in_partition_order(data_dir):
+    database_url = f"sqlite:///{os.path.join(data_dir, 'test.db')}"
+    Base.metadata.create_all(create_engine(database_url))
+
+    shards = []
+    for index, records in enumerate([
+        [lineup_record(1, 1), lineup_record(1, 2)],
+        [lineup_record(2, 1, time_in=None)],  # time_in is NOT NULL
+        [lineup_record(3, 1)],
+        [{"gameId": 4}],  # missing the conflict fields
+    ]):
+        shard = os.path.join(data_dir, f"shard_{index}.json")
+        with open(shard, 'w') as file:
+            json.dump(records, file)
+        shards.append(shard)
+
+    with pytest.raises(PartitionLoadError) as error:
+        run_partitions(shards, database_url, workers=2)
+
+    assert [result['partition'] for result in error.value.failed_partitions] == [1, 3]
+    session = sessionmaker(bind=create_engine(database_url))()
+    assert sorted(row.game_id for row in session.query(Lineup.game_id)) == [1, 1, 3]
@@ -0,0 +1,104 @@
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import scoped_session, sessionmaker
+from backend.helpers.json_encoder import init_json_provider
+from backend.helpers.profiling import init_profiling, request_metrics, slow_queries, prometheus_text, Histogram
+
+def create_client(slow_query_ms, json_provider='orjson'):
+    engine = create_engine('sqlite:///:memory:')
+    session = scoped_session(sessionmaker(bind=engine))
+    app = Flask(__name__)
+    init_json_provider(app, json_provider)
+    init_profiling(app, engine, slow_query_ms=slow_query_ms, explain_slow_queries=True)
+
+    @app.route('/numbers/<int:count>')
+    def numbers(count):
+        first = session.execute(text("SELECT 1 AS n")).scalar_one()
+        rows = session.execute(text(
+            "WITH RECURSIVE n(value) AS (SELECT 1 UNION ALL SELECT value + 1 FROM n WHERE value < :count) SELECT value FROM n"
+        ), {'count': count}).scalars().all()
+        return jsonify({"first": first, "numbers": rows})
+
+    # Built up front, so the route's time is almost all serialization
+    payload_rows = [{"value": value, "label": str(value)} for value in range(50000)]
+
+    @app.route('/payload')
+    def payload():
+        return jsonify(payload_rows)
+
+    @app.route('/failing')
+    def failing():
+        try:
+            session.execute(text("SELECT * FROM no_such_table"))
+        except OperationalError:
+            session.rollback()
+        return jsonify({"first": session.execute(text("SELECT 1")).scalar_one()})
+
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        session.remove()
+
+    return app.test_client()
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    request_metrics.reset()
+    slow_queries.reset()
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == [{'le': 1, 'count': 2}, {'le': 10, 'count': 3}, {'le': '+Inf', 'count': 4}]
+    assert (snapshot['count'], snapshot['sum'], snapshot['max']) == (4, 56.5, 50)
+
+def test_requests_are_recorded_per_route():
+    client = create_client(slow_query_ms=0)
+    for count in (3, 5):
+        response = client.get(f'/numbers/{count}')
+        assert response.status_code == 200
+        assert [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')] == ['sql', 'serialize', 'total']
+    assert client.get('/no-such-route').status_code == 404
+
+    routes = request_metrics.snapshot()
+    assert list(routes) == ['GET /numbers/<int:count>']
+    metrics = routes['GET /numbers/<int:count>']
+    assert (metrics['requests'], metrics['errors'], metrics['queries']) == (2, 0, 4)
+    for key in ('total_ms', 'sql_ms', 'serialize_ms', 'rows'):
+        assert metrics[key]['count'] == 2
+    assert metrics['total_ms']['sum'] >= metrics['sql_ms']['sum'] + metrics['serialize_ms']['sum']
+    assert slow_queries.snapshot() == []
+
+def test_slow_queries_are_kept_newest_first():
+    client = create_client(slow_query_ms=1e-9)
+    client.get('/numbers/3')
+    entries = slow_queries.snapshot()
+    assert [entry['route'] for entry in entries] == ['GET /numbers/<int:count>'] * 2
+    assert entries[0]['statement'].startswith('WITH RECURSIVE')
+    # EXPLAIN ANALYZE is only captured on Postgres
+    assert 'plan' not in entries[0]
+
+def test_prometheus_text_has_a_series_per_route_and_bucket():
+    client = create_client(slow_query_ms=0)
+    client.get('/numbers/3')
+    body = prometheus_text(request_metrics.snapshot())
+    assert 'api_requests_total{route="GET /numbers/<int:count>"} 1' in body
+    assert 'api_request_duration_milliseconds_bucket{route="GET /numbers/<int:count>",le="+Inf"} 1' in body
+    assert 'api_request_rows_count{route="GET /numbers/<int:count>"} 1' in body
+
+def server_timing(response):
+    return {name: float(duration) for name, duration in (part.split(';dur=') for part in response.headers['Server-Timing'].split(', '))}
+
+def test_serialization_is_timed_once_with_the_flask_provider():
+    client = create_client(slow_query_ms=0, json_provider='flask')
+    timing = server_timing(client.get('/payload'))
+    assert 0 < timing['serialize'] <= timing['total']
+
+def test_a_failing_query_is_not_counted():
+    client = create_client(slow_query_ms=0)
+    for _ in range(2):
+        assert client.get('/failing').json == {"first": 1}
+    assert request_metrics.snapshot()['GET /failing']['queries'] == 2
@@ -0,0 +1,75 @@
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from backend.db.query_registry import QueryRegistry, positional, where_clause
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+def numbers_query(where):
+    return f"""
+        WITH RECURSIVE n(value) AS (SELECT 1 UNION ALL SELECT value + 1 FROM n WHERE value < 10)
+        SELECT value FROM n {where} ORDER BY value
+    """
+
+def test_positional_numbers_each_name_once_and_skips_casts():
+    query, names = positional("SELECT a::text, TO_CHAR(b, 'FMMI:SS') FROM t WHERE a = :a AND b > :b AND c < :a")
+    assert query == "SELECT a::text, TO_CHAR(b, 'FMMI:SS') FROM t WHERE a = $1 AND b > $2 AND c < $1"
+    assert names == ['a', 'b']
+
+def test_where_clause():
+    assert where_clause([]) == ""
+    assert where_clause(["a = 1", "b = 2"]) == "WHERE a = 1 AND b = 2"
+
+def test_variants_register_every_combination_of_optional_conditions():
+    registry = QueryRegistry()
+    variants = registry.variants('numbers', numbers_query, {
+        'low': "value >= :low",
+        'high': "value <= :high",
+    }, required=["value % 2 = 0"])
+
+    assert sorted(query.name for query in variants) == ['numbers', 'numbers+high', 'numbers+low', 'numbers+low+high']
+    assert variants.get(['high', 'low']) is variants.get(['low', 'high'])
+    assert "WHERE value % 2 = 0 AND value >= :low AND value <= :high" in variants.get(['high', 'low']).sql
+    assert variants.get().parameters == []
+    assert variants.get(['high', 'low']).parameters == ['low', 'high']
+
+def test_register_rejects_different_sql_under_the_same_name():
+    registry = QueryRegistry()
+    query = registry.register('one', "SELECT 1")
+    assert registry.register('one', "SELECT 1") is query
+    with pytest.raises(ValueError):
+        registry.register('one', "SELECT 2")
+
+def test_statement_names_are_valid_identifiers_that_change_with_the_sql():
+    registry = QueryRegistry()
+    first = registry.register('wide_lineups+cursor', "SELECT 1")
+    second = registry.register('wide_lineups+game_id', "SELECT 2")
+    assert first.statement.startswith('wide_lineups_cursor_')
+    assert first.statement != second.statement
+    assert len(registry.register('x' * 100, "SELECT 3").statement) <= 63
+
+def test_execute_runs_text_where_it_cannot_prepare():
+    registry = QueryRegistry()
+    variants = registry.variants('numbers', numbers_query, {'low': "value >= :low"})
+    with Session(create_engine('sqlite:///:memory:')) as session:
+        assert session.execute(text("SELECT 1")).scalar() == 1
+        rows = variants.get(['low']).execute(session, {'low': 8, 'unused': 1}).scalars().all()
+    assert rows == [8, 9, 10]
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_execute_prepares_once_per_connection_on_postgres():
+    registry = QueryRegistry()
+    variants = registry.variants('numbers', numbers_query, {'low': "value >= :low", 'high': "value <= :high"})
+    query = variants.get(['low', 'high'])
+    with Session(create_engine(TEST_DATABASE_URL)) as session:
+        for low in (2, 5):
+            rows = query.execute(session, {'low': low, 'high': 6}, prepare=True).scalars().all()
+            assert rows == list(range(low, 7))
+        assert query.execute(session, {'low': 5, 'high': 6}, prepare=False).scalars().all() == [5, 6]
+
+        prepared = session.execute(text("SELECT COUNT(*) FROM pg_prepared_statements WHERE name = :name"), {'name': query.statement})
+        assert prepared.scalar() == 1
+        # Survives the end of the transaction it was prepared in
+        session.rollback()
+        assert query.execute(session, {'low': 6, 'high': 6}, prepare=True).scalars().all() == [6]
@@ -0,0 +1,159 @@
+from datetime import datetime
+from flask import Flask, jsonify, request
+from backend.helpers.response_cache import VersionedResponseCache, ConditionalGet
+
+class StubVersions:
+    def __init__(self):
+        self.current = {'game_schedule': 1}
+        self.updated_at = {'game_schedule': datetime(2024, 1, 2, 3, 4, 5, 600000)}
+
+    def version(self, *names):
+        return tuple(self.current.get(name, 0) for name in names)
+
+    def last_modified(self, *names):
+        return max((self.updated_at[name] for name in names if name in self.updated_at), default=None)
+
+def create_app(versions, calls):
+    app = Flask(__name__)
+    cache = VersionedResponseCache(versions, 'game_schedule')
+
+    @app.route('/standings')
+    def standings():
+        def render():
+            calls.append(1)
+            return jsonify([{"team_name": "Team 1", "version": versions.current['game_schedule']}])
+        return cache.respond(('standings',), render)
+
+    return app
+
+def test_versioned_response_cache_serves_until_version_changes():
+    versions = StubVersions()
+    calls = []
+    client = create_app(versions, calls).test_client()
+
+    first = client.get('/standings')
+    second = client.get('/standings')
+    assert first.data == second.data
+    assert first.mimetype == second.mimetype == 'application/json'
+    assert len(calls) == 1
+
+    versions.current['game_schedule'] = 2
+    third = client.get('/standings')
+    assert third.json == [{"team_name": "Team 1", "version": 2}]
+    assert len(calls) == 2
+
+def test_versioned_response_cache_leaves_validators_to_conditional_get():
+    versions = StubVersions()
+    calls = []
+    app = create_app(versions, calls)
+    conditional = ConditionalGet(versions)
+    cache = VersionedResponseCache(versions, 'game_schedule')
+
+    @app.route('/teams')
+    @conditional('game_schedule')
+    def teams():
+        return cache.respond(('teams',), lambda: jsonify([{"team_name": "Team 1"}]))
+
+    client = app.test_client()
+    assert 'ETag' not in client.get('/standings').headers
+    etag = client.get('/teams').headers['ETag']
+    assert etag.startswith('W/')
+    response = client.get('/teams', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def create_conditional_app(versions, calls):
+    app = Flask(__name__)
+    conditional = ConditionalGet(versions)
+
+    @app.route('/games')
+    @conditional('game_schedule')
+    def games():
+        calls.append(1)
+        if request.args.get('page_size') == '0':
+            return jsonify({"error": "page_size must be positive"}), 400
+        return jsonify([{"game_id": 1, "page_size": request.args.get('page_size')}])
+
+    @app.route('/games.ndjson')
+    @conditional('game_schedule')
+    def games_ndjson():
+        def rows():
+            try:
+                yield '{"game_id": 1}\n'
+            finally:
+                calls.append('closed')
+        return app.response_class(rows(), mimetype='application/x-ndjson')
+
+    return app
+
+def test_conditional_get_answers_matching_requests_without_running_the_view():
+    versions = StubVersions()
+    calls = []
+    client = create_conditional_app(versions, calls).test_client()
+
+    first = client.get('/games?page_size=10&team_id=1')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    assert first.headers['Last-Modified'] == 'Tue, 02 Jan 2024 03:04:05 GMT'
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    # Same arguments in another order
+    response = client.get('/games?team_id=1&page_size=10', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert len(calls) == 1
+
+    # Other arguments are another representation
+    assert client.get('/games?page_size=20&team_id=1', headers={'If-None-Match': etag}).status_code == 200
+    assert len(calls) == 2
+
+def test_conditional_get_answers_if_modified_since_after_the_view_accepts_the_request():
+    versions = StubVersions()
+    calls = []
+    client = create_conditional_app(versions, calls).test_client()
+
+    since = {'If-Modified-Since': client.get('/games').headers['Last-Modified']}
+    response = client.get('/games?page_size=10', headers=since)
+    assert response.status_code == 304
+    assert response.headers['ETag'].startswith('W/')
+    assert client.get('/games?page_size=0', headers=since).status_code == 400
+    assert len(calls) == 3
+
+def test_conditional_get_sends_streamed_bodies_for_if_modified_since():
+    versions = StubVersions()
+    calls = []
+    client = create_conditional_app(versions, calls).test_client()
+
+    since = {'If-Modified-Since': client.get('/games.ndjson').headers['Last-Modified']}
+    response = client.get('/games.ndjson', headers=since)
+    assert response.status_code == 200
+    assert response.data == b'{"game_id": 1}\n'
+    assert calls == ['closed', 'closed']
+
+    etag = response.headers['ETag']
+    assert client.get('/games.ndjson', headers={'If-None-Match': etag}).status_code == 304
+    assert calls == ['closed', 'closed']
+
+def test_conditional_get_changes_with_the_data_version():
+    versions = StubVersions()
+    calls = []
+    client = create_conditional_app(versions, calls).test_client()
+
+    first = client.get('/games')
+    versions.current['game_schedule'] = 2
+    versions.updated_at['game_schedule'] = datetime(2024, 1, 3)
+
+    response = client.get('/games', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != first.headers['ETag']
+    response = client.get('/games', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+def test_conditional_get_leaves_errors_alone():
+    versions = StubVersions()
+    client = create_conditional_app(versions, []).test_client()
+
+    response = client.get('/games?page_size=0')
+    assert response.status_code == 400
+    assert 'ETag' not in response.headers
@@ -0,0 +1,184 @@
+import threading
+import time
+from flask import Flask, jsonify, request
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from backend.db.models import ResultCacheEntry
+from backend.helpers.result_cache import MemoryTier, PostgresTier, ResultCache, CachedResponses
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class StubVersions:
+    def __init__(self):
+        self.current = {'game_schedule': 1}
+
+    def version(self, *names):
+        return tuple(self.current.get(name, 0) for name in names)
+
+def entry(size):
+    return (b'x' * (size - len('application/json')), 'application/json')
+
+def test_memory_tier_evicts_least_recently_used_bytes_and_expires_entries():
+    clock = FakeClock()
+    tier = MemoryTier(max_bytes=300, ttl_seconds=10, clock=clock)
+    for key in ('a', 'b', 'c'):
+        tier.set(key, entry(100))
+    assert tier.get('a') == entry(100)
+
+    tier.set('d', entry(100))
+    assert tier.get('b') is None
+    assert [tier.get(key) is not None for key in ('a', 'c', 'd')] == [True, True, True]
+    assert tier.stats()['bytes'] == 300
+    assert tier.stats()['evictions'] == 1
+
+    clock.now = 10
+    assert tier.get('a') is None
+    assert tier.stats()['expirations'] == 1
+
+def test_fetch_computes_a_key_once_for_concurrent_requests():
+    cache = ResultCache([MemoryTier()], lock_wait_seconds=5)
+    started = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return (b'[]', 'application/json')
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.fetch('key', compute)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(cache.fetch('key', compute))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(outcome for _, outcome in results) == ['coalesced', 'coalesced', 'coalesced', 'miss']
+    assert cache.fetch('key', compute) == ((b'[]', 'application/json'), 'memory')
+    snapshot = cache.snapshot()
+    assert (snapshot['misses'], snapshot['coalesced'], snapshot['hits']['memory']) == (1, 3, 1)
+    assert snapshot['hit_ratio'] == 0.8
+
+def test_shared_tier_serves_other_workers_and_trims_oldest_entries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    ResultCacheEntry.__table__.create(engine)
+    workers = [ResultCache([MemoryTier(), PostgresTier(engine, max_bytes=250, ttl_seconds=60)]) for _ in range(2)]
+
+    workers[0].fetch('a', lambda: entry(100))
+    assert workers[1].fetch('a', lambda: None) == (entry(100), 'postgres')
+    assert workers[1].fetch('a', lambda: None) == (entry(100), 'memory')
+
+    time.sleep(0.01)
+    workers[0].fetch('b', lambda: entry(100))
+    time.sleep(0.01)
+    workers[0].fetch('c', lambda: entry(100))
+    shared = workers[0].tiers[1]
+    assert shared.get('a') is None
+    assert shared.stats()['entries'] == 2
+    assert shared.stats()['evictions'] == 1
+
+    expired = PostgresTier(engine, ttl_seconds=0)
+    expired.set('d', entry(100))
+    assert expired.get('d') is None
+
+def test_shared_tier_trims_below_its_budget_and_only_when_over_it(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    ResultCacheEntry.__table__.create(engine)
+    shared = PostgresTier(engine, max_bytes=1000, ttl_seconds=60)
+    other_worker = PostgresTier(engine, max_bytes=1000, ttl_seconds=60)
+
+    for key in range(11):
+        shared.set(str(key), entry(100))
+    # Down to 90% of the budget, oldest first
+    assert (shared.stats()['entries'], shared.stats()['evictions']) == (9, 2)
+    assert shared.get('1') is None and shared.get('2') is not None
+
+    shared.set('11', entry(100))
+    assert (shared.stats()['entries'], shared.stats()['evictions']) == (10, 2)
+
+    # A worker's first store sums the table, and trims what the others stored
+    other_worker.set('12', entry(100))
+    assert (other_worker.stats()['bytes'], other_worker.stats()['evictions']) == (900, 2)
+    # The first worker's estimate is over the budget, but the sum is not
+    shared.set('13', entry(100))
+    assert (shared.stats()['bytes'], shared.stats()['evictions']) == (1000, 2)
+
+def test_results_over_the_entry_limit_are_not_stored():
+    cache = ResultCache([MemoryTier()], max_entry_bytes=50)
+    assert cache.fetch('key', lambda: entry(100)) == (entry(100), 'miss')
+    assert cache.fetch('key', lambda: None) == (None, 'miss')
+    assert cache.snapshot()['too_large'] == 1
+
+def test_cached_responses_are_keyed_on_arguments_and_data_versions():
+    versions = StubVersions()
+    calls = []
+    app = Flask(__name__)
+    cached = CachedResponses(ResultCache([MemoryTier()]), versions)
+
+    @app.route('/most-rest')
+    @cached('game_schedule')
+    def most_rest():
+        calls.append(1)
+        if request.args.get('start_date') == 'bad':
+            return jsonify({"error": "bad date"}), 400
+        return jsonify([{"start_date": request.args.get('start_date'), "version": versions.current['game_schedule']}])
+
+    client = app.test_client()
+    first = client.get('/most-rest?start_date=2024-01-01&page=1')
+    second = client.get('/most-rest?page=1&start_date=2024-01-01')
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('miss', 'memory')
+    assert first.data == second.data
+    assert first.mimetype == second.mimetype == 'application/json'
+    assert len(calls) == 1
+
+    client.get('/most-rest?start_date=2024-02-01&page=1')
+    assert len(calls) == 2
+
+    versions.current['game_schedule'] = 2
+    assert client.get('/most-rest?start_date=2024-01-01&page=1').json[0]['version'] == 2
+    assert len(calls) == 3
+
+    for _ in range(2):
+        assert client.get('/most-rest?start_date=bad').status_code == 400
+    assert len(calls) == 5
+
+class FailingTier:
+    """A shared tier whose database is down."""
+    name = 'postgres'
+    can_lock = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def fail(self, *args):
+        self.calls += 1
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    get = set = try_lock = unlock = stats = fail
+
+def test_shared_tier_errors_are_misses_computed_at_once():
+    shared = FailingTier()
+    cache = ResultCache([MemoryTier(), shared], lock_wait_seconds=2)
+
+    start = time.monotonic()
+    assert cache.fetch('key', lambda: entry(100)) == (entry(100), 'miss')
+    assert time.monotonic() - start < 1
+    # The lookup, the lock and the store
+    assert shared.calls == 3
+    assert cache.fetch('key', lambda: None) == (entry(100), 'memory')
+
+    alone = ResultCache([FailingTier()], lock_wait_seconds=2)
+    assert alone.fetch('key', lambda: entry(100)) == (entry(100), 'miss')
+    snapshot = alone.snapshot()
+    assert snapshot['stores'] == 0
+    assert snapshot['errors'] == 3
+    assert snapshot['tiers']['postgres'] is None
@@ -0,0 +1,91 @@
+"""
+EXPLAIN based checks that the schedule queries are index scans over team_game.
+
+These need Postgres: set TEST_DATABASE_URL to a database the tests may create
+and drop a scratch schema in. The migrations are applied to that schema.
+"""
+import glob
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from backend.handlers.schedule_routes import PAST_GAMES_QUERY, MOST_3_IN_4S_QUERY
+from backend.handlers.validators import year_range, day_range
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+SCHEMA = 'explain_test'
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '*.up.sql'))):
+            with open(path) as file:
+                connection.exec_driver_sql(file.read())
+
+        # Two seasons of games between 30 teams
+        connection.execute(text("""
+            INSERT INTO teams (team_id, league_lk, team_name, team_name_short, team_nickname)
+            SELECT team_id, 'NBA', 'Team ' || team_id, 'T' || team_id, 'T' || team_id
+            FROM generate_series(1, 30) AS team_id
+        """))
+        connection.execute(text("""
+            INSERT INTO game_schedule (game_id, home_id, away_id, home_score, away_score, game_date)
+            SELECT game_id, game_id % 30 + 1, (game_id + 7) % 30 + 1, 100, 99,
+                   TIMESTAMP '2023-01-01 19:00' + (game_id / 15) * INTERVAL '1 day'
+            FROM generate_series(1, 2460) AS game_id
+        """))
+        connection.execute(text("""
+            INSERT INTO team_game (game_id, team_id, opponent_id, location, game_date, points_for, points_against, result)
+            SELECT game_id, home_id, away_id, 'home', game_date, home_score, away_score, 'W' FROM game_schedule
+            UNION ALL
+            SELECT game_id, away_id, home_id, 'away', game_date, away_score, home_score, 'L' FROM game_schedule
+        """))
+        connection.execute(text("ANALYZE"))
+        # Any scan that could use an index must do so
+        connection.execute(text("SET enable_seqscan = off"))
+        yield connection
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+def team_game_scans(connection, query, params):
+    """
+    Scan node types on team_game, and the index conditions of every
+    team_game index used by the plan.
+    """
+    plan = connection.execute(text("EXPLAIN (FORMAT JSON) " + query.strip().rstrip(';')), params).scalar()
+    scans = []
+    index_conditions = []
+
+    def walk(node):
+        if node.get('Relation Name') == 'team_game':
+            scans.append(node['Node Type'])
+        if node.get('Index Name', '').startswith('idx_team_game_'):
+            index_conditions.append(node.get('Index Cond', ''))
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return scans, index_conditions
+
+def test_past_games_uses_team_game_date_index(connection):
+    year_start, year_end = year_range(2023)
+    scans, index_conditions = team_game_scans(connection, PAST_GAMES_QUERY, {'team_id': 5, 'year_start': year_start, 'year_end': year_end})
+
+    assert scans
+    assert 'Seq Scan' not in scans
+    # The team and year must both bound the index scan, not be applied as a filter afterwards
+    assert index_conditions
+    assert all('team_id =' in condition and 'game_date >=' in condition for condition in index_conditions)
+
+def test_most_3_in_4s_uses_team_game_date_index(connection):
+    range_start, range_end = day_range('2023-03-01', '2023-03-31')
+    scans, index_conditions = team_game_scans(connection, MOST_3_IN_4S_QUERY, {'range_start': range_start, 'range_end': range_end})
+
+    assert scans
+    assert 'Seq Scan' not in scans
+    assert any('game_date >=' in condition for condition in index_conditions)
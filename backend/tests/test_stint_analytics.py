@@ -0,0 +1,82 @@
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from backend.db.models import Lineup, Player, GameSchedule
+
+pytest.importorskip('numpy')
+from backend.helpers.stint_analytics import StintAnalytics
+
+class StubVersions:
+    def __init__(self):
+        self.current = 1
+
+    def version(self, *names):
+        return (self.current,) * len(names)
+
+def add_lineup(db_session, game_id, player_id, period, time_in, time_out, lineup_num):
+    db_session.add(Lineup(team_id=1, player_id=player_id, game_id=game_id, lineup_num=lineup_num, period=period, time_in=time_in, time_out=time_out))
+
+@pytest.fixture(scope="function")
+def analytics(db_session):
+    db_session.add(Player(player_id=1, first_name='First', last_name='One'))
+    db_session.add(Player(player_id=2, first_name='Second', last_name='Two'))
+    # Team 1 wins game 1 at home and loses game 2 away
+    db_session.add(GameSchedule(game_id=1, home_id=1, away_id=2, home_score=100, away_score=90, game_date=datetime(2024, 1, 5, 19)))
+    db_session.add(GameSchedule(game_id=2, home_id=2, away_id=1, home_score=110, away_score=100, game_date=datetime(2024, 1, 7, 19)))
+    # Player 1, game 1: stints 720-300 and 120-0 in period 1, 720-0 in period 2.
+    # Stint 1 of both periods is one 720s stint of the game, stint 2 is 120s
+    add_lineup(db_session, 1, 1, 1, 720, 540, 1)
+    add_lineup(db_session, 1, 1, 1, 540, 300, 2)
+    add_lineup(db_session, 1, 1, 1, 120, 0, 4)
+    add_lineup(db_session, 1, 1, 2, 720, 0, 5)
+    # Player 1, game 2: one 150s stint
+    add_lineup(db_session, 2, 1, 1, 600, 450, 1)
+    # Player 2, game 1: one 180s stint
+    add_lineup(db_session, 1, 2, 1, 300, 120, 3)
+    # A lineup row without a player, which the loader keeps and the results leave out
+    add_lineup(db_session, 1, None, 1, 720, 540, 1)
+    db_session.commit()
+    return StintAnalytics(db_session, StubVersions())
+
+def test_stint_averages_page(analytics):
+    assert analytics.stint_averages(None, 10) == [
+        {'player_name': 'First One', 'avg_stints_per_game': Decimal('1.50'), 'avg_stint_length': '05:30'},
+        {'player_name': 'Second Two', 'avg_stints_per_game': Decimal('1.00'), 'avg_stint_length': '03:00'},
+    ]
+    assert [row['player_name'] for row in analytics.stint_averages(None, 1)] == ['First One']
+    assert [row['player_name'] for row in analytics.stint_averages('First One', 10)] == ['Second Two']
+
+def test_win_loss_stints_splits_by_result(analytics):
+    first, second = analytics.win_loss_stints(None, 10)
+
+    assert first == {
+        'player_name': 'First One',
+        'total_games': 2,
+        'avg_stints_per_game': Decimal('1.50'),
+        'avg_stint_length': '05:30',
+        'total_games_wins': 1,
+        'avg_stints_per_game_wins': Decimal('2.00'),
+        'avg_stint_length_wins': '07:00',
+        'total_games_losses': 1,
+        'avg_stints_per_game_losses': Decimal('1.00'),
+        'avg_stint_length_losses': '02:30',
+        'avg_stints_per_game_diff': Decimal('1.00'),
+        'avg_stint_length_diff': '04:30',
+    }
+    # No losses: the loss averages and the differences are null, as with NULLIF in SQL
+    assert second['total_games_losses'] == 0
+    assert second['avg_stints_per_game_losses'] is None
+    assert second['avg_stint_length_losses'] is None
+    assert second['avg_stints_per_game_diff'] is None
+    assert second['avg_stint_length_diff'] is None
+
+def test_results_are_rebuilt_when_the_data_version_changes(analytics, db_session):
+    assert len(analytics.stint_averages(None, 10)) == 2
+
+    db_session.add(Player(player_id=3, first_name='Third', last_name='Three'))
+    add_lineup(db_session, 2, 3, 1, 720, 0, 2)
+    db_session.commit()
+    assert len(analytics.stint_averages(None, 10)) == 2
+
+    analytics._data_versions.current = 2
+    assert [row['player_name'] for row in analytics.stint_averages(None, 10)] == ['First One', 'Second Two', 'Third Three']
@@ -0,0 +1,69 @@
+from backend.helpers.stint_engine import load_game_lineups, compute_stints, elapsed_seconds, game_lineups_query, TEAM_CONDITION, _load_lineups
+from backend.db.query_registry import QueryRegistry
+from backend.scripts.derived_tables import refresh_player_stints
+from backend.db.models import Lineup, Player, PlayerStint
+
+def add_lineup(db_session, player_id, period, time_in, time_out, lineup_num, game_id=1, team_id=1):
+    db_session.add(Lineup(team_id=team_id, player_id=player_id, game_id=game_id, lineup_num=lineup_num, period=period, time_in=time_in, time_out=time_out))
+
+def test_compute_stints_matches_player_stint(db_session):
+    db_session.add(Player(player_id=1, first_name='First', last_name='One'))
+    db_session.add(Player(player_id=2, first_name='Second', last_name='Two'))
+    # Player 1: 720-300 continuous, off 300-120, back 120-0; then all of period 2
+    add_lineup(db_session, 1, 1, 720, 540, 1)
+    add_lineup(db_session, 1, 1, 540, 300, 2)
+    add_lineup(db_session, 1, 1, 120, 0, 4)
+    add_lineup(db_session, 1, 2, 720, 0, 5)
+    # Player 2: only the middle of period 1
+    add_lineup(db_session, 2, 1, 300, 120, 3)
+    # Another game is not read
+    add_lineup(db_session, 1, 1, 720, 0, 1, game_id=2)
+    db_session.commit()
+
+    players = compute_stints(load_game_lineups(db_session, 1))
+
+    engine_stints = [
+        (player['player_id'], stint['period'], stint['stint_number'], stint['time_in'], stint['time_out'])
+        for player in players
+        for stint in player['stints']
+    ]
+    refresh_player_stints(db_session)
+    db_session.commit()
+    table_stints = [
+        (stint.player_id, stint.period, stint.stint_number, float(stint.stint_start), float(stint.stint_end))
+        for stint in db_session.query(PlayerStint).filter(PlayerStint.game_id == 1).order_by(PlayerStint.player_id, PlayerStint.period, PlayerStint.stint_number)
+    ]
+    assert engine_stints == table_stints
+
+    player_one = players[0]
+    assert player_one['player_name'] == 'First One'
+    assert player_one['stint_count'] == 3
+    assert player_one['seconds_played'] == 420 + 120 + 720
+    assert player_one['minutes_played'] == 21.0
+    assert [(stint['start_elapsed'], stint['end_elapsed']) for stint in player_one['stints']] == [(0, 420), (600, 720), (720, 1440)]
+
+def test_elapsed_seconds_covers_overtime():
+    assert elapsed_seconds(1, 720) == 0
+    assert elapsed_seconds(4, 0) == 2880
+    assert elapsed_seconds(5, 300) == 2880
+    assert elapsed_seconds(6, 0) == 3480
+
+def test_load_lineups_splits_rows_by_game(db_session):
+    db_session.add(Player(player_id=1, first_name='First', last_name='One'))
+    db_session.add(Player(player_id=2, first_name='Second', last_name='Two'))
+    add_lineup(db_session, 1, 1, 720, 300, 1, game_id=1)
+    add_lineup(db_session, 2, 1, 720, 0, 1, game_id=1, team_id=2)
+    add_lineup(db_session, 1, 1, 720, 0, 1, game_id=2)
+    add_lineup(db_session, 1, 1, 720, 0, 1, game_id=3)
+    db_session.commit()
+    # GAMES_LINEUPS filters with game_id = ANY(:game_ids), which SQLite lacks
+    variants = QueryRegistry().variants('games_lineups', game_lineups_query, TEAM_CONDITION, required=["l.game_id IN (1, 2)"])
+
+    games = _load_lineups(db_session, variants, {}, None)
+    assert sorted(games) == [1, 2]
+    assert [player['player_id'] for player in compute_stints(games[1])] == [1, 2]
+    assert [player['seconds_played'] for player in compute_stints(games[2])] == [720]
+
+    games = _load_lineups(db_session, variants, {}, 2)
+    assert sorted(games) == [1]
+    assert [player['player_id'] for player in compute_stints(games[1])] == [2]